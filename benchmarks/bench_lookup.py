@@ -0,0 +1,59 @@
+"""
+Benchmark command lookup under a long, cluttered PATH and the same PATH after cleanup.
+
+Builds a synthetic directory tree, so it runs on any platform.
+Usage: python benchmarks/bench_lookup.py [directories] [commands]
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src', 'path_editor'))
+
+import lookup  # noqa: E402
+from backends import MemoryPathModel  # noqa: E402
+
+
+def build_tree(root, count):
+    """
+    Create directories resembling a real PATH: every fifth is dead, every fourth is empty, the
+    rest hold a few tools, and the commands looked up live near the end.
+
+    Returns:
+        The PATH entries, in lookup order
+    """
+    entries = []
+    for i in range(count):
+        directory = os.path.join(root, f'tool{i}', 'bin')
+        entries.append(directory)
+        if i % 5 == 0:
+            continue
+        os.makedirs(directory)
+        if i % 4 != 0:
+            for name in (f'tool{i}.exe', f'helper{i}.cmd'):
+                open(os.path.join(directory, name), 'w').close()
+    return entries
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    command_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as root:
+        entries = build_tree(root, count)
+        step = max(1, count // command_count)
+        commands = [f'tool{i}' for i in range(count - 1, 0, -step) if i % 5 and i % 4]
+        commands = commands[:command_count]
+
+        model = MemoryPathModel(entries, [],
+                                environment={'PATHEXT': '.COM;.EXE;.BAT;.CMD;.VBS;.JS;.MSC'})
+        # Clean up the edited PATH the way RM Dead and RM Useless would
+        model.user_paths = [path for path in model.user_paths if model.get_executables(path)]
+
+        for report in lookup.compare(model, commands):
+            print(report)
+
+
+if __name__ == '__main__':
+    main()
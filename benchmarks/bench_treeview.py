@@ -0,0 +1,67 @@
+"""
+Benchmark filling the treeview row by row versus with PathView.insert_paths().
+
+Usage: python benchmarks/bench_treeview.py [entries per section] [repetitions]
+Requires a display, since it creates a (hidden) Tk window.
+"""
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src', 'path_editor'))
+
+from view import PathView  # noqa: E402
+
+
+def make_rows(count):
+    """Create (path, exists, filecount) rows resembling a real PATH."""
+    return [(f'c:/program files/tool {i}/bin', i % 7 != 0, i % 50) for i in range(count)]
+
+
+def fill_per_row(view, rows):
+    parent = view.treeview.insert('', tk.END, text='USER PATH', open=True, tags=['header'])
+    for path, exists, filecount in rows:
+        view.insert_path(parent, path, exists, filecount, 'user')
+
+
+def fill_bulk(view, rows):
+    parent = view.treeview.insert('', tk.END, text='USER PATH', open=True, tags=['header'])
+    view.insert_paths(parent, rows, 'user')
+
+
+def measure(view, fill, rows, repetitions):
+    """Get the best time of several fills, clearing the treeview in between."""
+    best = float('inf')
+    for _ in range(repetitions):
+        view.treeview.delete(*view.treeview.get_children())
+        view.path_index.clear()
+        start = time.perf_counter()
+        fill(view, rows)
+        view.root.update_idletasks()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    root = tk.Tk()
+    root.withdraw()
+    view = PathView(root)
+    view.create_widgets(lambda event: None)
+    rows = make_rows(count)
+
+    per_row = measure(view, fill_per_row, rows, repetitions)
+    bulk = measure(view, fill_bulk, rows, repetitions)
+    print(f'{count} rows, best of {repetitions}')
+    print(f'  per-row insert: {per_row * 1000:8.1f} ms')
+    print(f'  insert_paths:   {bulk * 1000:8.1f} ms')
+    print(f'  per-row / insert_paths: {per_row / bulk:.2f}')
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
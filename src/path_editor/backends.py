@@ -0,0 +1,196 @@
+import base64
+import json
+import re
+import subprocess
+from subprocess import CompletedProcess
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from history import PathHistory
+from model import PathModel
+
+
+class RemotePathModel(PathModel):
+    """
+    PathModel that reads and writes the PATH of another machine through PowerShell remoting.
+    """
+    def __init__(self, computer_name: str, timeout: Optional[float] = None, debug: bool = True,
+                 environment: Optional[Mapping[str, str]] = None,
+                 history: Optional[PathHistory] = None,
+                 variables: Optional[Iterable[str]] = None):
+        """
+        Initialize the model for a remote machine.
+
+        Args:
+            computer_name: Name of the machine passed to Invoke-Command
+            timeout: Seconds after which a single remote command is aborted
+            debug: Whether writes are only printed instead of executed
+            environment: Variables used to expand %VAR% entries
+            history: Optional snapshot store
+            variables: Names of the list variables to load, LIST_VARIABLES by default
+        """
+        self.computer_name = computer_name
+        self.timeout = timeout
+        super().__init__(debug=debug, environment=environment, history=history, variables=variables)
+
+    def run_command(self, command: str) -> Union[CompletedProcess, CompletedProcess[bytes]]:
+        """
+        Run a PowerShell command on the remote machine.
+
+        Args:
+            command: PowerShell command to run
+
+        Returns:
+            CompletedProcess object with the command result
+        """
+        # Quotes are doubled to stay inside the single-quoted literal; PowerShell also treats the
+        # typographic single quotes as quotes
+        computer_name = re.sub("['\u2018\u2019\u201a\u201b]", lambda m: m.group(0) * 2,
+                               self.computer_name)
+        remote_command = (f"Invoke-Command -ComputerName '{computer_name}' "
+                          f"-ScriptBlock {{ {command} }}")
+        return subprocess.run(['powershell.exe', remote_command], capture_output=True,
+                              timeout=self.timeout)
+
+    def path_exists(self, path_str: str) -> bool:
+        """
+        Check if a path exists on the remote machine.
+
+        Args:
+            path_str: Path to check, possibly with %VAR% references
+
+        Returns:
+            True if the path exists, False otherwise
+        """
+        return self.paths_exist([path_str])[0]
+
+    def paths_exist(self, paths: List[str]) -> List[bool]:
+        """
+        Check several paths on the remote machine in one round trip.
+
+        %VAR% references are expanded in the remote environment. The paths travel as base64-encoded
+        JSON and the results come back the same way.
+
+        Args:
+            paths: Paths to check
+
+        Returns:
+            Whether each path exists, in the order of paths
+        """
+        if not paths:
+            return []
+        encoded = base64.b64encode(json.dumps(list(paths)).encode('utf-8')).decode('ascii')
+        completed = self.run_command(
+            f"$paths = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}')) "
+            f"| ConvertFrom-Json; "
+            f"$exists = @(foreach ($path in $paths) {{ "
+            f"Test-Path -LiteralPath ([Environment]::ExpandEnvironmentVariables($path)) }}); "
+            f"[Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes("
+            f"(ConvertTo-Json -Compress -InputObject $exists)))"
+        )
+        completed.check_returncode()
+        results = json.loads(base64.b64decode(completed.stdout).decode('utf-8'))
+        return [bool(exists) for exists in results]
+
+    def is_admin(self) -> bool:
+        """
+        Remote sessions run with the connecting account's full token.
+
+        Returns:
+            Always True; missing rights surface as a failed remote command instead
+        """
+        return True
+
+
+class MemoryPathModel(PathModel):
+    """
+    PathModel backed by in-process lists instead of the OS.
+
+    Used as a stand-in for real or remote machines, e.g. when testing fleet operations.
+    """
+    def __init__(self, user_paths: List[str], system_paths: List[str], admin: bool = True,
+                 environment: Optional[Mapping[str, str]] = None,
+                 history: Optional[PathHistory] = None,
+                 variables: Optional[Mapping[str, Tuple[List[str], List[str]]]] = None):
+        """
+        Initialize the model with the given "OS" state.
+
+        Args:
+            user_paths: USER path entries the fake OS holds
+            system_paths: SYSTEM path entries the fake OS holds
+            admin: Whether the fake process has admin privileges
+            environment: Variables used to expand %VAR% entries
+            history: Optional snapshot store
+            variables: Other list variables the fake OS holds, name -> (USER entries,
+                SYSTEM entries); these are the variables the model loads besides Path
+        """
+        # Variable name -> scope -> entries the fake OS holds
+        self.os_variables: Dict[str, Dict[str, List[str]]] = {}
+        listed = [('Path', (user_paths, system_paths))] + list((variables or {}).items())
+        for name, (user_values, system_values) in listed:
+            self.os_variables[name] = {
+                'user': [self.normalize_path(value) for value in user_values],
+                'system': [self.normalize_path(value) for value in system_values]
+            }
+        self.admin = admin
+        super().__init__(debug=False, environment=environment if environment is not None else {},
+                         history=history, variables=list(self.os_variables))
+
+    @property
+    def os_user_paths(self) -> List[str]:
+        """USER path entries the fake OS holds."""
+        return self.os_variables['Path']['user']
+
+    @os_user_paths.setter
+    def os_user_paths(self, paths: List[str]) -> None:
+        self.os_variables['Path']['user'] = paths
+
+    @property
+    def os_system_paths(self) -> List[str]:
+        """SYSTEM path entries the fake OS holds."""
+        return self.os_variables['Path']['system']
+
+    @os_system_paths.setter
+    def os_system_paths(self, paths: List[str]) -> None:
+        self.os_variables['Path']['system'] = paths
+
+    def get_variables_from_os(self, names: Iterable[str]) -> Dict[str, Tuple[List[str], List[str]]]:
+        """
+        Get list variables from the in-process state.
+
+        Args:
+            names: Names of the variables
+
+        Returns:
+            Dictionary mapping each name to a tuple of its USER and SYSTEM entries
+        """
+        values = {}
+        for name in names:
+            scopes = self.os_variables.get(name, {'user': [], 'system': []})
+            values[name] = (list(scopes['user']), list(scopes['system']))
+        return values
+
+    def run_command(self, command: str) -> Union[CompletedProcess, CompletedProcess[bytes]]:
+        """
+        Apply registry writes to the in-process state.
+
+        Args:
+            command: PowerShell command produced by get_write_command
+
+        Returns:
+            CompletedProcess object with an empty result
+        """
+        encoded = re.search(r"FromBase64String\('([^']*)'\)", command).group(1)
+        data = json.loads(base64.b64decode(encoded))
+        scopes = self.os_variables.setdefault(data['name'], {'user': [], 'system': []})
+        scope = 'user' if data['key'] == self.USER_ENVIRONMENT_KEY else 'system'
+        scopes[scope] = data['value'].split(';')
+        return CompletedProcess(['powershell.exe', command], 0, stdout=b'', stderr=b'')
+
+    def is_admin(self) -> bool:
+        """
+        Check if the fake process has admin privileges.
+
+        Returns:
+            The configured admin flag
+        """
+        return self.admin
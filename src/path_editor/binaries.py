@@ -0,0 +1,308 @@
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from model import PathModel
+
+# Hash algorithm used to compare executables
+HASH_ALGORITHM = 'blake2b'
+
+
+class HashCache:
+    """
+    Persistent cache of file hashes keyed by path, size and modification time.
+
+    A cached hash is only used while the file's size and modification time are unchanged, so
+    repeated analyses only hash files that were added or modified in between.
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS hashes (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL
+        );
+    '''
+
+    def __init__(self, database_path: str = ':memory:'):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            database_path: Location of the SQLite database file, or ':memory:'
+        """
+        if database_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        self.connection = sqlite3.connect(database_path)
+        self.connection.executescript(self.SCHEMA)
+        # Path -> (size, mtime_ns, digest), loaded once so lookups need no queries
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        rows = self.connection.execute('SELECT path, size, mtime_ns, digest FROM hashes')
+        for path, size, mtime_ns, digest in rows:
+            self._hashes[path] = (size, mtime_ns, digest)
+
+    @staticmethod
+    def default_location() -> str:
+        """
+        Get the default database location in the user's local application data.
+
+        Returns:
+            Path of the cache database file
+        """
+        base = (os.environ.get('LOCALAPPDATA')
+                or os.path.join(os.path.expanduser('~'), '.local', 'share'))
+        return os.path.join(base, 'path-editor', 'hashes.sqlite3')
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        Get the cached hash of a file.
+
+        Args:
+            path: Path of the file
+            size: Current size of the file
+            mtime_ns: Current modification time of the file
+
+        Returns:
+            The hash, or None if it is not cached or the file changed since
+        """
+        cached = self._hashes.get(path)
+        if cached is None or cached[:2] != (size, mtime_ns):
+            return None
+        return cached[2]
+
+    def update(self, hashes: List[Tuple[str, int, int, str]]) -> None:
+        """
+        Store new hashes in one transaction.
+
+        Args:
+            hashes: List of (path, size, mtime_ns, digest)
+        """
+        for path, size, mtime_ns, digest in hashes:
+            self._hashes[path] = (size, mtime_ns, digest)
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)', hashes)
+
+
+class BinaryReport:
+    """
+    Identical executables found in several PATH entries, and the entries they make redundant.
+    """
+    def __init__(self, groups: List[List[Tuple[str, int, str]]], redundant: List[Tuple[str, int]],
+                 wasted_bytes: int, hashed: int, cached: int):
+        """
+        Initialize the report.
+
+        Args:
+            groups: Groups of identical files, each a list of (scope, index, file name) in lookup
+                order
+            redundant: Entries whose removal changes no command lookup, as
+                ('user' | 'system', index)
+            wasted_bytes: Bytes taken by all copies beyond the first of each group
+            hashed: Number of files hashed in this run
+            cached: Number of hashes taken from the cache
+        """
+        self.groups = groups
+        self.redundant = redundant
+        self.wasted_bytes = wasted_bytes
+        self.hashed = hashed
+        self.cached = cached
+
+    def describe(self, user_paths: List[str], system_paths: List[str]) -> str:
+        """
+        Format the report with one line per copy.
+
+        Args:
+            user_paths: List of USER path entries the report refers to
+            system_paths: List of SYSTEM path entries the report refers to
+
+        Returns:
+            The formatted report
+        """
+        paths = {'user': user_paths, 'system': system_paths}
+        if not self.groups:
+            return 'No identical executables found.'
+        lines = []
+        for group in self.groups:
+            lines.append(f'{group[0][2]} ({len(group)} copies)')
+            lines.extend(f'    [{scope.upper()}] {paths[scope][index]}/{name}'
+                         for scope, index, name in group)
+        lines.append('')
+        lines.append(f'Redundant entries: {len(self.redundant)}')
+        lines.extend(f'    [{scope.upper()}] {paths[scope][index]}'
+                     for scope, index in self.redundant)
+        lines.append(f'Space taken by copies: {self.wasted_bytes / 1024 / 1024:.1f} MiB')
+        return '\n'.join(lines)
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash a file, reading it in chunks.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, HASH_ALGORITHM).hexdigest()
+
+
+def find_duplicate_binaries(model: PathModel, user_paths: List[str], system_paths: List[str],
+                            cache: Optional[HashCache] = None,
+                            max_workers: int = 8) -> BinaryReport:
+    """
+    Find identical executables across all PATH entries.
+
+    Files are bucketed by size first; only files sharing their size with another file are
+    hashed, in parallel, and hashes are reused from the cache while a file is unchanged.
+
+    An entry is redundant if removing it changes no command lookup: every command it can answer,
+    with or without extension, still resolves to a file of the same name and identical contents
+    among the entries that are kept. Entries are considered from the end of the lookup order, so
+    later copies are dropped first.
+
+    Args:
+        model: The PathModel used to expand entries and read PATHEXT
+        user_paths: List of USER path entries
+        system_paths: List of SYSTEM path entries
+        cache: Optional hash cache
+        max_workers: Maximum number of files hashed at the same time
+
+    Returns:
+        The report
+    """
+    extensions = tuple(model.get_pathext())
+
+    # (scope, index) -> {name: (path, size, mtime_ns)} for every entry in lookup order
+    files: Dict[Tuple[str, int], Dict[str, Tuple[str, int, int]]] = {}
+    scanned: Set[str] = set()
+    for scope, paths in (('system', system_paths), ('user', user_paths)):
+        for index, entry in enumerate(paths):
+            directory = model.expand_path(entry) if entry else ''
+            if not directory or os.path.normcase(directory) in scanned:
+                # The same directory listed twice is a string duplicate, not a copy
+                continue
+            scanned.add(os.path.normcase(directory))
+            executables = {}
+            try:
+                with os.scandir(directory) as entries:
+                    for item in entries:
+                        if item.name.lower().endswith(extensions) and item.is_file():
+                            stat = item.stat()
+                            executables[item.name.lower()] = (item.path, stat.st_size,
+                                                              stat.st_mtime_ns)
+            except OSError:
+                continue
+            files[(scope, index)] = executables
+
+    sizes: Dict[int, List[Tuple[str, int, int]]] = {}
+    for executables in files.values():
+        for file in executables.values():
+            sizes.setdefault(file[1], []).append(file)
+    candidates = [file for bucket in sizes.values() if len(bucket) > 1 for file in bucket]
+
+    digests: Dict[str, str] = {}
+    uncached = []
+    for path, size, mtime_ns in candidates:
+        digest = cache.get(path, size, mtime_ns) if cache is not None else None
+        if digest is None:
+            uncached.append((path, size, mtime_ns))
+        else:
+            digests[path] = digest
+
+    hashed = []
+    if uncached:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_try_hash_file, [path for path, _, _ in uncached])
+            for (path, size, mtime_ns), digest in zip(uncached, results):
+                if digest is not None:
+                    digests[path] = digest
+                    hashed.append((path, size, mtime_ns, digest))
+    if cache is not None and hashed:
+        cache.update(hashed)
+
+    # Group identical files across entries, keeping lookup order
+    groups: Dict[str, List[Tuple[str, int, str]]] = {}
+    wasted_bytes = 0
+    for (scope, index), executables in files.items():
+        for name, (path, size, _) in executables.items():
+            digest = digests.get(path)
+            if digest is None:
+                continue
+            group = groups.setdefault(digest, [])
+            if group:
+                wasted_bytes += size
+            group.append((scope, index, name))
+
+    # Drop entries from the end while no command lookup would resolve to a different file
+    kept = [location for location in files if files[location]]
+    redundant = []
+    for location in reversed(list(kept)):
+        remaining = [other for other in kept if other != location]
+        if all(_resolves_identically(files, digests, kept, remaining, command, extensions)
+               for command in _get_commands(files[location], extensions)):
+            redundant.append(location)
+            kept = remaining
+    redundant.reverse()
+
+    return BinaryReport([group for group in groups.values() if len(group) > 1], redundant,
+                        wasted_bytes, len(hashed), len(candidates) - len(uncached))
+
+
+def _get_commands(executables: Dict[str, Tuple[str, int, int]],
+                  extensions: Tuple[str, ...]) -> Set[str]:
+    """Get the lookups an entry can answer: each file name, and each name without its extension."""
+    commands = set(executables)
+    for name in executables:
+        for extension in extensions:
+            if name.endswith(extension):
+                commands.add(name[:-len(extension)])
+    return commands
+
+
+def _resolve(files: Dict[Tuple[str, int], Dict[str, Tuple[str, int, int]]],
+             locations: List[Tuple[str, int]], command: str,
+             extensions: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """
+    Resolve a command like cmd.exe: the first entry holding it wins, and within an entry a name
+    without extension is tried with each PATHEXT extension in order.
+
+    Returns:
+        (file name, path) of the winning file, or None if no entry holds the command
+    """
+    names = [command] + [command + extension for extension in extensions]
+    for location in locations:
+        for name in names:
+            file = files[location].get(name)
+            if file is not None:
+                return name, file[0]
+    return None
+
+
+def _resolves_identically(files: Dict[Tuple[str, int], Dict[str, Tuple[str, int, int]]],
+                          digests: Dict[str, str], before: List[Tuple[str, int]],
+                          after: List[Tuple[str, int]], command: str,
+                          extensions: Tuple[str, ...]) -> bool:
+    """Check that a command resolves to a file of the same name and contents either way."""
+    old = _resolve(files, before, command, extensions)
+    new = _resolve(files, after, command, extensions)
+    if old is None or new is None:
+        return old is new
+    if old[1] == new[1]:
+        return True
+    return (old[0] == new[0] and digests.get(old[1]) is not None
+            and digests.get(old[1]) == digests.get(new[1]))
+
+
+def _try_hash_file(path: str) -> Optional[str]:
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
@@ -0,0 +1,354 @@
+import argparse
+import ctypes
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, List, Tuple
+
+from model import PathModel
+
+# Seconds the helper waits for the editor to connect, and the editor waits for the helper
+CONNECT_TIMEOUT = 60.0
+
+# Characters that cannot be part of a single entry: ';' separates entries and the registry value
+# ends at a null. Entries reach PowerShell as an encoded payload, so this is not an escaping rule
+SEPARATOR_CHARACTERS = set(';\0')
+
+
+class BrokerError(Exception):
+    """
+    Error raised when the elevated helper cannot be started or refuses a request.
+    """
+
+
+class WriteBroker:
+    """
+    Serves SYSTEM path writes for one unelevated editor.
+
+    The broker runs in a separate (elevated) process and accepts exactly one authenticated
+    connection. It only knows how to write SYSTEM list variables, and the model passes the entries
+    to PowerShell as data rather than command text, so the connection cannot be used to run
+    arbitrary commands.
+    """
+    def __init__(self, model: PathModel):
+        """
+        Initialize the broker.
+
+        Args:
+            model: The PathModel used for writing; it must be able to write the SYSTEM path
+        """
+        self.model = model
+
+    def serve(self, listener: Listener, connect_timeout: float = CONNECT_TIMEOUT) -> None:
+        """
+        Accept one connection and answer its requests until it is closed or shut down.
+
+        Args:
+            listener: Listener bound to the address the editor connects to
+            connect_timeout: Seconds to wait for the editor before exiting the process
+        """
+        # Listener.accept() cannot time out, so a timer ends the process if nobody connects
+        watchdog = threading.Timer(connect_timeout, os._exit, args=(1,))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            while True:
+                try:
+                    connection = listener.accept()
+                    break
+                except AuthenticationError:
+                    # Someone else tried to connect; keep waiting for the editor
+                    continue
+        finally:
+            watchdog.cancel()
+
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    break
+                if request == ('shutdown',):
+                    connection.send(('ok', None))
+                    break
+                connection.send(self.handle(request))
+
+    def handle(self, request: Any) -> Tuple[str, Any]:
+        """
+        Handle one request.
+
+        Args:
+            request: ('ping',), ('set_system_path', entries) or
+                ('set_system_variable', name, entries)
+
+        Returns:
+            ('ok', result) or ('error', message)
+        """
+        if request == ('ping',):
+            return 'ok', 'pong'
+        kind = request[0] if isinstance(request, tuple) and request else None
+        if kind == 'set_system_path' and len(request) == 2:
+            name, entries = 'Path', request[1]
+        elif kind == 'set_system_variable' and len(request) == 3:
+            name, entries = request[1], request[2]
+            if not isinstance(name, str) or not PathModel.VARIABLE_NAME_PATTERN.match(name):
+                return 'error', f'Invalid variable name {name!r}'
+        else:
+            return 'error', 'Unsupported request'
+
+        if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+            return 'error', 'Entries must be a list of strings'
+        for entry in entries:
+            if SEPARATOR_CHARACTERS & set(entry):
+                return 'error', f'Invalid character in entry {entry!r}'
+
+        if name == 'Path':
+            written = self.model.set_path_to_os(system_path=entries)
+        else:
+            written = self.model.set_variable_to_os(name, system_values=entries)
+        if not written:
+            return 'error', 'The helper is not running with admin privileges'
+        return 'ok', len(entries)
+
+
+class BrokerClient:
+    """
+    Connection from the editor to a running WriteBroker.
+    """
+    def __init__(self, connection: Connection):
+        """
+        Initialize the client.
+
+        Args:
+            connection: Authenticated connection to the broker
+        """
+        self.connection = connection
+        self.lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, address: str, authkey: bytes,
+                timeout: float = CONNECT_TIMEOUT) -> 'BrokerClient':
+        """
+        Connect to a broker, retrying while it starts up.
+
+        Args:
+            address: Address the broker listens on
+            authkey: Shared secret both sides authenticate with
+            timeout: Seconds to keep retrying
+
+        Returns:
+            The connected client
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return cls(Client(address, authkey=authkey))
+            except OSError as e:
+                # The broker has not created its pipe or socket yet
+                if time.monotonic() > deadline:
+                    raise BrokerError(f'The elevated helper did not start: {e}')
+                time.sleep(0.1)
+
+    def request(self, *request: Any) -> Any:
+        """
+        Send a request and wait for its response.
+
+        Args:
+            request: The request tuple
+
+        Returns:
+            The result of the request
+        """
+        with self.lock:
+            try:
+                self.connection.send(request)
+                status, result = self.connection.recv()
+            except (EOFError, OSError) as e:
+                raise BrokerError(f'Lost connection to the elevated helper: {e}')
+        if status != 'ok':
+            raise BrokerError(result)
+        return result
+
+    def ping(self) -> bool:
+        """Check that the broker is alive."""
+        return self.request('ping') == 'pong'
+
+    def set_system_path(self, entries: List[str]) -> None:
+        """
+        Write the SYSTEM path through the broker.
+
+        Args:
+            entries: The normalized SYSTEM path entries
+        """
+        self.request('set_system_path', list(entries))
+
+    def set_system_variable(self, name: str, entries: List[str]) -> None:
+        """
+        Write a SYSTEM list variable through the broker.
+
+        Args:
+            name: Name of the variable, e.g. 'Path' or 'PSModulePath'
+            entries: The normalized SYSTEM entries
+        """
+        if name == 'Path':
+            self.set_system_path(entries)
+        else:
+            self.request('set_system_variable', name, list(entries))
+
+    def close(self) -> None:
+        """Shut the broker down and close the connection."""
+        try:
+            self.request('shutdown')
+        except BrokerError:
+            pass
+        self.connection.close()
+
+
+def new_address() -> str:
+    """
+    Create an unused address for a broker.
+
+    Returns:
+        A named pipe on Windows, a Unix socket in a private directory elsewhere
+    """
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\path-editor-{secrets.token_hex(16)}'
+    return os.path.join(tempfile.mkdtemp(prefix='path-editor-'), 'broker.sock')
+
+
+def can_elevate() -> bool:
+    """
+    Check if an elevated helper can be started on this platform.
+
+    Returns:
+        True on Windows, False elsewhere
+    """
+    return sys.platform == 'win32'
+
+
+def is_user_writable(path: str) -> bool:
+    """
+    Check if the current (unelevated) process can modify a file or directory.
+
+    Access is checked by actually opening the file for writing, or creating a temporary file in
+    the directory, so the check honours ACLs and not only the read-only attribute.
+
+    Args:
+        path: The file or directory
+
+    Returns:
+        True if the path can be modified or replaced, False otherwise
+    """
+    try:
+        if os.path.isdir(path):
+            with tempfile.TemporaryFile(dir=path):
+                return True
+        with open(path, 'r+b'):
+            return True
+    except OSError:
+        return False
+
+
+def get_untrusted_paths() -> List[str]:
+    """
+    Find the files run by the elevated helper that an unelevated process could replace.
+
+    A user-writable interpreter, standard library or helper script would let any program of the
+    current user run code as admin the next time the helper is elevated.
+
+    Returns:
+        The user-writable files and directories; empty if the helper is safe to elevate
+    """
+    script = os.path.realpath(__file__)
+    executable = os.path.realpath(sys.executable)
+    # The interpreter, the standard library and the helper's own modules (model imports history and
+    # pathdiff from the same directory)
+    candidates = [executable, os.path.dirname(executable),
+                  os.path.realpath(os.path.dirname(os.__file__)), script, os.path.dirname(script)]
+    candidates += [os.path.join(os.path.dirname(script), f'{name}.py')
+                   for name in ('model', 'history', 'pathdiff')]
+    return [path for path in dict.fromkeys(candidates) if is_user_writable(path)]
+
+
+def launch(elevated: bool = True, timeout: float = CONNECT_TIMEOUT) -> BrokerClient:
+    """
+    Start a broker process and connect to it.
+
+    The shared secret is passed through a file only the current user can read, which the broker
+    deletes after reading, so it never shows up on a command line.
+
+    The elevated helper is only started if the interpreter and the helper's modules cannot be
+    replaced by the current user (see get_untrusted_paths), and it runs with -E -s, so
+    PYTHON* variables and the user site-packages cannot inject code either.
+
+    Args:
+        elevated: Whether to start the broker elevated through a UAC prompt (Windows only);
+            otherwise an unelevated stand-in writing to an in-memory PATH is started
+        timeout: Seconds to wait for the broker to start
+
+    Returns:
+        The connected client
+
+    Raises:
+        BrokerError: If the helper cannot be started safely or does not start
+    """
+    if elevated:
+        untrusted = get_untrusted_paths()
+        if untrusted:
+            raise BrokerError('The elevated helper was not started because these paths are '
+                              'writable without admin privileges: ' + ', '.join(untrusted))
+
+    address = new_address()
+    authkey = secrets.token_bytes(32)
+    descriptor, keyfile = tempfile.mkstemp(prefix='path-editor-', suffix='.key')
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(authkey)
+
+    arguments = [os.path.realpath(__file__), '--address', address, '--keyfile', keyfile]
+    try:
+        if elevated:
+            parameters = subprocess.list2cmdline(['-E', '-s'] + arguments)
+            # ShellExecute returns more than 32 on success; the user may decline the prompt
+            shell32 = ctypes.windll.shell32
+            if shell32.ShellExecuteW(None, 'runas', sys.executable, parameters, None, 0) <= 32:
+                raise BrokerError('The elevated helper was not started')
+        else:
+            subprocess.Popen([sys.executable] + arguments + ['--memory'])
+        return BrokerClient.connect(address, authkey, timeout)
+    finally:
+        if os.path.exists(keyfile):
+            os.remove(keyfile)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Write the SYSTEM PATH on behalf of an unelevated editor.')
+    parser.add_argument('--address', required=True, help='named pipe or socket to listen on')
+    parser.add_argument('--keyfile', required=True,
+                        help='file holding the shared secret; deleted after reading')
+    parser.add_argument('--memory', action='store_true',
+                        help='write to an in-memory PATH (unelevated stand-in)')
+    args = parser.parse_args()
+
+    with open(args.keyfile, 'rb') as file:
+        authkey = file.read()
+    os.remove(args.keyfile)
+
+    if args.memory:
+        from backends import MemoryPathModel
+        model = MemoryPathModel([], [])
+    else:
+        model = PathModel(debug=False)
+
+    with Listener(args.address, authkey=authkey) as listener:
+        WriteBroker(model).serve(listener)
+
+
+if __name__ == '__main__':
+    main()
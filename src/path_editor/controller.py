@@ -1,7 +1,18 @@
 import collections
+import contextlib
+import queue
+import subprocess
+import threading
 import tkinter as tk
 from tkinter import messagebox
 
+import binaries
+import broker
+import pathdiff
+import reconcile
+import serializer
+import transfer
+from broker import BrokerError
 from model import PathModel
 from view import PathView
 
@@ -11,6 +22,9 @@ class PathController:
     Controller class for the PATH editor application.
     Connects the model and view components.
     """
+    # Maximum number of undo steps kept
+    UNDO_LIMIT = 50
+
     def __init__(self, model: PathModel, view: PathView):
         """
         Initialize the controller with model and view.
@@ -24,6 +38,25 @@ class PathController:
         self.selected_path = ''
         self.selected_path_type = 'user'  # Default to 'user' or 'system'
 
+        # Batched mutations: nesting depth, rows to delete at the end, and whether a refresh is
+        # queued
+        self._batch_depth = 0
+        self._pending_deletes = []
+        self._refresh_pending = False
+
+        # Path lists before each batch that changed them, most recent last
+        self._undo_stack = []
+        self._undo_snapshot = None
+
+        # Persistent executable hashes, opened on the first duplicate binary analysis
+        self._hash_cache = None
+
+        # Entries whose file count is only a lower bound, counted exactly by a background thread
+        self._count_queue = collections.deque()
+        self._count_results = queue.Queue()
+        self._count_lock = threading.Lock()
+        self._count_thread = None
+
         # Initialize the view
         self.view.create_widgets(self.item_selected)
 
@@ -40,14 +73,54 @@ class PathController:
             'remove': self.remove_entry,
             'up': self.up_entry,
             'down': self.down_entry,
+            'top': self.top_entry,
+            'bottom': self.bottom_entry,
+            'move_to': self.move_to_position,
+            'drop': self.drop_entries,
+            'count_files': self.count_selected_files,
+            'other_scope': self.other_scope_entry,
+            'undo': self.undo,
             'reload': self.reload_path,
             'save_user': self.save_user_path,
             'save_system': self.save_system_path,
             'save_both': self.save_path,
             'remove_duplicates': self.remove_duplicates,
-            'remove_dead': self.remove_dead
+            'remove_dead': self.remove_dead,
+            'remove_useless': self.remove_useless,
+            'history': self.show_history,
+            'reconcile': self.reconcile_path,
+            'import': self.import_paths,
+            'export': self.export_paths,
+            'duplicate_binaries': self.find_duplicate_binaries,
+            'compact': self.compact_entries
         }
-        self.view.bind_commands(commands)
+        self.view.bind_commands({name: self._unfiltered(command)
+                                 for name, command in commands.items()})
+
+    def _unfiltered(self, command):
+        """
+        Wrap a command so it runs with all rows attached and the filter is reapplied afterwards.
+
+        Mutations rely on the treeview rows matching the model lists one to one, which does not
+        hold while the search filter has rows detached.
+
+        Args:
+            command: The command callback to wrap
+
+        Returns:
+            The wrapped callback
+        """
+        def run(*args):
+            self.view.show_all_rows()
+            try:
+                command(*args)
+            finally:
+                try:
+                    self.view.apply_filter()
+                except tk.TclError:
+                    # The window was closed while the command ran
+                    pass
+        return run
 
     def item_selected(self, event):
         """
@@ -80,8 +153,8 @@ class PathController:
 
     def add_entry(self):
         """Show dialog for adding a new path entry."""
-        ok_button = self.view.show_add_dialog(self.selected_path_type, self.model.is_admin())
-        ok_button.config(command=self.confirm_add)
+        ok_button = self.view.show_add_dialog(self.selected_path_type, self._can_edit_system())
+        ok_button.config(command=self._unfiltered(self.confirm_add))
 
     def confirm_add(self):
         """Process the add dialog and add a new path entry."""
@@ -95,41 +168,21 @@ class PathController:
 
         # Check if user has admin privileges for SYSTEM path
         path_type = self.view.add_path_type.get()
-        if path_type == 'system' and not self.model.is_admin():
+        if path_type == 'system' and not self._ensure_system_access():
             self.view.set_add_error('Admin privileges required to modify SYSTEM path!')
             return
 
         filepath = self.model.normalize_path(filepath)
-        filecount = self.model.get_filecount(filepath) if self.model.path_exists(filepath) else 0
-        data = (filepath, filecount)
-
-        # Find the parent node for the selected path type
-        parent_nodes = [child for child in self.view.treeview.get_children() 
-                        if self.view.treeview.item(child)['text'] in ['USER PATH', 'SYSTEM PATH']]
-        parent_node = ''
-        for node in parent_nodes:
-            if self.view.treeview.item(node)['text'] == f"{path_type.upper()} PATH":
-                parent_node = node
-                break
-
-        # Insert the new entry under the appropriate parent node
-        self.view.treeview.insert(parent_node, tk.END, values=data, tags=[
-            ('exists' if self.model.path_exists(filepath) else 'nexists'),
-            ('sys32' if 'windows/system32' in filepath else 'nsys32'),
-            ('empty' if filecount == 0 else 'nempty'),
-            f'{path_type}_path'
-        ])
-
-        # Add to the appropriate path list
-        if path_type == 'user':
-            self.model.user_paths.append(filepath)
-        else:  # system
-            self.model.system_paths.append(filepath)
-
-        # For backward compatibility
-        self.model.applications.append(filepath)
+        entry = self.model.create_entry(filepath, path_type)
+        exists, _ = self.model.probe_entry(entry)
+        filecount = self.model.format_filecount(entry)
+
+        with self.batch():
+            # Insert the new entry under the appropriate section and add it to the store
+            self.view.insert_path(self._get_parent_node(path_type), entry.raw, exists, filecount,
+                                  path_type)
+            self._get_entries(path_type).append(entry)
 
-        self.update_statistics()
         self.view.close_add_dialog()
 
     def edit_entry(self):
@@ -137,8 +190,9 @@ class PathController:
         if not self.selected_path:
             return
 
-        ok_button = self.view.show_edit_dialog(self.selected_path, self.selected_path_type, self.model.is_admin())
-        ok_button.config(command=self.confirm_edit)
+        ok_button = self.view.show_edit_dialog(self.selected_path, self.selected_path_type,
+                                                self._can_edit_system())
+        ok_button.config(command=self._unfiltered(self.confirm_edit))
 
     def confirm_edit(self):
         """Process the edit dialog and update the path entry."""
@@ -152,340 +206,871 @@ class PathController:
 
         # Check if user has admin privileges for SYSTEM path
         new_path_type = self.view.edit_path_type.get()
-        if new_path_type == 'system' and not self.model.is_admin():
+        if new_path_type == 'system' and not self._ensure_system_access():
             self.view.set_edit_error('Admin privileges required to modify SYSTEM path!')
             return
 
         filepath = self.model.normalize_path(filepath)
-        filecount = self.model.get_filecount(filepath) if self.model.path_exists(filepath) else 0
-        data = (filepath, filecount)
+        entry = self.model.create_entry(filepath, new_path_type)
+        exists, _ = self.model.probe_entry(entry)
+        filecount = self.model.format_filecount(entry)
 
-        # Get the selected item and its parent
+        # Locate the edited row and its entry by position
         selected_item = self.view.treeview.focus()
-        old_item = self.view.treeview.item(selected_item)['values'][0]
-        old_parent = self.view.treeview.parent(selected_item)
-
-        # Find the parent node for the new path type
-        parent_nodes = [child for child in self.view.treeview.get_children() 
-                        if self.view.treeview.item(child)['text'] in ['USER PATH', 'SYSTEM PATH']]
-        new_parent = ''
-        for node in parent_nodes:
-            if self.view.treeview.item(node)['text'] == f"{new_path_type.upper()} PATH":
-                new_parent = node
-                break
-
-        # Remove from old path list
-        if self.selected_path_type == 'user':
-            if old_item in self.model.user_paths:
-                self.model.user_paths.remove(old_item)
-        else:  # system
-            if old_item in self.model.system_paths:
-                self.model.system_paths.remove(old_item)
-
-        # Add to new path list
-        if new_path_type == 'user':
-            self.model.user_paths.append(filepath)
-        else:  # system
-            self.model.system_paths.append(filepath)
-
-        # Update applications list for backward compatibility
-        if old_item in self.model.applications:
-            self.model.applications.remove(old_item)
-        self.model.applications.append(filepath)
-
-        # Delete the old item and insert the new one under the appropriate parent
-        self.view.treeview.delete(selected_item)
-        self.view.treeview.insert(new_parent, tk.END, values=data, tags=[
-            ('exists' if self.model.path_exists(filepath) else 'nexists'),
-            ('sys32' if 'windows/system32' in filepath else 'nsys32'),
-            ('empty' if filecount == 0 else 'nempty'),
-            f'{new_path_type}_path'
-        ])
-
-        # Update the selected path type
-        self.selected_path_type = new_path_type
+        old_parent = self._get_parent_node(self.selected_path_type)
+        old_children = self.view.treeview.get_children(old_parent)
+        if selected_item not in old_children:
+            return
+        index = old_children.index(selected_item)
+
+        with self.batch():
+            if new_path_type == self.selected_path_type:
+                # Replace the entry in place, keeping its position
+                self._get_entries(new_path_type)[index] = entry
+                self.view.update_path(selected_item, entry.raw, exists, filecount, new_path_type)
+            else:
+                # Move the entry to the end of the other section
+                del self._get_entries(self.selected_path_type)[index]
+                self._get_entries(new_path_type).append(entry)
+                self.view.treeview.delete(selected_item)
+                self.view.insert_path(self._get_parent_node(new_path_type), entry.raw, exists,
+                                      filecount, new_path_type)
+
+            # Update the selected path and its type
+            self.selected_path = entry.raw
+            self.selected_path_type = new_path_type
 
-        self.update_statistics()
         self.view.close_edit_dialog()
 
     def remove_entry(self):
-        """Remove the selected path entry."""
-        # Get the selected item
-        selected_item = self.view.treeview.focus()
-        if not selected_item:
+        """Remove all selected path entries."""
+        selected_rows = self._get_selected_rows()
+        if not any(selected_rows.values()):
             return
 
-        # Check if this is a header item (parent node)
-        if self.view.treeview.item(selected_item)['text'] in ['USER PATH', 'SYSTEM PATH']:
+        # Check if user has admin privileges for SYSTEM path
+        if selected_rows['system'] and not self._ensure_system_access():
             return
 
-        # Get the path value and tags
-        item_data = self.view.treeview.item(selected_item)
-        if not item_data['values']:
-            return
+        with self.batch():
+            for path_type, rows in selected_rows.items():
+                if not rows:
+                    continue
 
-        path_value = item_data['values'][0]
-        tags = item_data['tags']
+                # Keep the remaining entries in order, in the entry store and in the treeview
+                entries = self._get_entries(path_type)
+                children = self.view.treeview.get_children(self._get_parent_node(path_type))
+                entries[:] = [entry for entry, child in zip(entries, children) if child not in rows]
+                for child in rows:
+                    self._delete_row(child)
 
-        # Check if user has admin privileges for SYSTEM path
-        if 'system_path' in tags and not self.model.is_admin():
-            self.view.show_admin_required_message()
-            return
+    def up_entry(self):
+        """Move the selected path entries up by one position."""
+        self._move_selection(lambda order, selected: self._shift(order, selected, -1))
 
-        # Remove from the appropriate path list
-        if 'user_path' in tags:
-            if path_value in self.model.user_paths:
-                self.model.user_paths.remove(path_value)
-        elif 'system_path' in tags:
-            if path_value in self.model.system_paths:
-                self.model.system_paths.remove(path_value)
+    def down_entry(self):
+        """Move the selected path entries down by one position."""
+        self._move_selection(lambda order, selected: self._shift(order, selected, 1))
 
-        # Remove from applications list for backward compatibility
-        if path_value in self.model.applications:
-            self.model.applications.remove(path_value)
+    def top_entry(self):
+        """Move the selected path entries to the top of their section."""
+        self._move_selection(lambda order, selected: self._place(order, selected, 0))
 
-        # Delete the item from the treeview
-        self.view.treeview.delete(selected_item)
-        self.update_statistics()
+    def bottom_entry(self):
+        """Move the selected path entries to the bottom of their section."""
+        self._move_selection(lambda order, selected: self._place(order, selected, len(order)))
 
-    def up_entry(self):
-        """Move the selected path entry up in the list."""
-        # Get the selected item
-        selected_item = self.view.treeview.focus()
-        if not selected_item:
+    def move_to_position(self):
+        """Move the selected path entries to a position entered by the user."""
+        selected_rows = self._get_selected_rows()
+        if not any(selected_rows.values()):
             return
 
-        # Check if this is a header item (parent node)
-        if self.view.treeview.item(selected_item)['text'] in ['USER PATH', 'SYSTEM PATH']:
+        count = max(len(self._get_entries(path_type))
+                    for path_type, rows in selected_rows.items() if rows)
+        position = self.view.ask_position(count)
+        if position is None:
             return
+        self._move_selection(lambda order, selected: self._place(order, selected, position - 1))
+
+    def drop_entries(self, target, after):
+        """
+        Move the selected path entries of the target's section next to a row (drag and drop).
 
-        # Get the parent and index
-        parent = self.view.treeview.parent(selected_item)
-        index = self.view.treeview.index(selected_item)
+        Args:
+            target: The row (or section header) the entries were dropped on
+            after: Whether to insert after the target row instead of before it
+        """
+        item = self.view.treeview.item(target)
+        if item['text'] in ['USER PATH', 'SYSTEM PATH']:
+            # Dropping on a header moves the entries to the top of its section
+            path_type = item['text'].split()[0].lower()
+            insert_at = 0
+        else:
+            path_type = 'user' if 'user_path' in item['tags'] else 'system'
+            children = self.view.treeview.get_children(self._get_parent_node(path_type))
+            insert_at = children.index(target) + (1 if after else 0)
+
+        # The block goes where the target is once the selected entries are taken out
+        self._move_selection(
+            lambda order, selected: self._place(
+                order, selected, len([i for i in order[:insert_at] if i not in selected])),
+            path_types=[path_type]
+        )
 
-        # Can't move up if already at the top
-        if index == 0:
+    def other_scope_entry(self):
+        """Move the selected path entries to the end of the other section (USER <-> SYSTEM)."""
+        selected_rows = self._get_selected_rows()
+        if not any(selected_rows.values()):
             return
 
-        # Get the path value and tags
-        item_data = self.view.treeview.item(selected_item)
-        if not item_data['values']:
+        # Moving in either direction modifies the SYSTEM path
+        if not self._ensure_system_access():
             return
 
-        path_value = item_data['values'][0]
-        tags = item_data['tags']
+        with self.batch():
+            moves = {}
+            for path_type, rows in selected_rows.items():
+                entries = self._get_entries(path_type)
+                children = self.view.treeview.get_children(self._get_parent_node(path_type))
+                moves[path_type] = (
+                    [(entry, child) for entry, child in zip(entries, children) if child in rows],
+                    [(entry, child) for entry, child in zip(entries, children) if child not in rows]
+                )
+
+            for path_type, other_type in (('user', 'system'), ('system', 'user')):
+                # Moved entries get new records so the undo snapshot keeps the old ones intact
+                incoming = [(self.model.create_entry(entry.raw, path_type), child)
+                            for entry, child in moves[other_type][0]]
+                kept = moves[path_type][1]
+                self.model.entries[path_type] = [entry for entry, _ in kept + incoming]
+                self.view.treeview.set_children(self._get_parent_node(path_type),
+                                                *[child for _, child in kept + incoming])
+                self.view.retag_rows([child for _, child in incoming], f'{other_type}_path',
+                                     f'{path_type}_path')
+
+    def undo(self):
+        """Revert the most recent change to the path lists."""
+        if not self._undo_stack:
+            return
 
-        # Check if user has admin privileges for SYSTEM path
-        if 'system_path' in tags and not self.model.is_admin():
-            self.view.show_admin_required_message()
-            return
-
-        # Move the item up in the treeview
-        self.view.treeview.move(selected_item, parent, index - 1)
-
-        # Reorder in the appropriate path list
-        if 'user_path' in tags:
-            # Find the index in user_paths
-            if path_value in self.model.user_paths:
-                path_index = self.model.user_paths.index(path_value)
-                if path_index > 0:
-                    self.model.user_paths[path_index], self.model.user_paths[path_index - 1] = \
-                        self.model.user_paths[path_index - 1], self.model.user_paths[path_index]
-        elif 'system_path' in tags:
-            # Find the index in system_paths
-            if path_value in self.model.system_paths:
-                path_index = self.model.system_paths.index(path_value)
-                if path_index > 0:
-                    self.model.system_paths[path_index], self.model.system_paths[path_index - 1] = \
-                        self.model.system_paths[path_index - 1], self.model.system_paths[path_index]
-
-        # For backward compatibility
-        if path_value in self.model.applications:
-            app_index = self.model.applications.index(path_value)
-            if app_index > 0:
-                self.model.applications[app_index], self.model.applications[app_index - 1] = \
-                    self.model.applications[app_index - 1], self.model.applications[app_index]
+        self.model.entries['user'], self.model.entries['system'] = self._undo_stack.pop()
+        self._populate()
+        self.schedule_refresh()
 
-    def down_entry(self):
-        """Move the selected path entry down in the list."""
-        # Get the selected item
-        selected_item = self.view.treeview.focus()
-        if not selected_item:
+    def _move_selection(self, reorder, path_types=('user', 'system')):
+        """
+        Reorder the selected entries of each section as one operation.
+
+        Args:
+            reorder: Callback receiving the current order (list of row positions) and the set of
+                selected positions, returning the new order
+            path_types: Sections whose selected entries are moved
+        """
+        selected_rows = {path_type: (rows if path_type in path_types else set())
+                         for path_type, rows in self._get_selected_rows().items()}
+        if not any(selected_rows.values()):
             return
 
-        # Check if this is a header item (parent node)
-        if self.view.treeview.item(selected_item)['text'] in ['USER PATH', 'SYSTEM PATH']:
+        # Check if user has admin privileges for SYSTEM path
+        if selected_rows['system'] and not self._ensure_system_access():
             return
 
-        # Get the parent and index
-        parent = self.view.treeview.parent(selected_item)
-        index = self.view.treeview.index(selected_item)
+        with self.batch():
+            for path_type, rows in selected_rows.items():
+                if not rows:
+                    continue
 
-        # Get all siblings
-        siblings = self.view.treeview.get_children(parent)
+                parent = self._get_parent_node(path_type)
+                entries = self._get_entries(path_type)
+                children = self.view.treeview.get_children(parent)
+                selected = {index for index, child in enumerate(children) if child in rows}
+                order = reorder(list(range(len(children))), selected)
 
-        # Can't move down if already at the bottom
-        if index == len(siblings) - 1:
-            return
+                # Apply the same permutation to the entry store and the treeview
+                entries[:] = [entries[index] for index in order]
+                self.view.treeview.set_children(parent, *[children[index] for index in order])
 
-        # Get the path value and tags
-        item_data = self.view.treeview.item(selected_item)
-        if not item_data['values']:
-            return
+    @staticmethod
+    def _place(order, selected, position):
+        """
+        Move the selected positions as one block so that it starts at the given position.
 
-        path_value = item_data['values'][0]
-        tags = item_data['tags']
+        Args:
+            order: Current order of row positions
+            selected: Set of selected positions
+            position: Index of the block in the new order; clamped to the section
 
-        # Check if user has admin privileges for SYSTEM path
-        if 'system_path' in tags and not self.model.is_admin():
-            self.view.show_admin_required_message()
-            return
-
-        # Move the item down in the treeview
-        self.view.treeview.move(selected_item, parent, index + 1)
-
-        # Reorder in the appropriate path list
-        if 'user_path' in tags:
-            # Find the index in user_paths
-            if path_value in self.model.user_paths:
-                path_index = self.model.user_paths.index(path_value)
-                if path_index < len(self.model.user_paths) - 1:
-                    self.model.user_paths[path_index], self.model.user_paths[path_index + 1] = \
-                        self.model.user_paths[path_index + 1], self.model.user_paths[path_index]
-        elif 'system_path' in tags:
-            # Find the index in system_paths
-            if path_value in self.model.system_paths:
-                path_index = self.model.system_paths.index(path_value)
-                if path_index < len(self.model.system_paths) - 1:
-                    self.model.system_paths[path_index], self.model.system_paths[path_index + 1] = \
-                        self.model.system_paths[path_index + 1], self.model.system_paths[path_index]
-
-        # For backward compatibility
-        if path_value in self.model.applications:
-            app_index = self.model.applications.index(path_value)
-            if app_index < len(self.model.applications) - 1:
-                self.model.applications[app_index], self.model.applications[app_index + 1] = \
-                    self.model.applications[app_index + 1], self.model.applications[app_index]
+        Returns:
+            The new order
+        """
+        rest = [i for i in order if i not in selected]
+        block = [i for i in order if i in selected]
+        position = max(0, min(position, len(rest)))
+        return rest[:position] + block + rest[position:]
+
+    @staticmethod
+    def _shift(order, selected, step):
+        """
+        Move every selected position one step, letting selected blocks move as a whole.
+
+        Args:
+            order: Current order of row positions
+            selected: Set of selected row positions
+            step: -1 to move up, 1 to move down
+
+        Returns:
+            The new order
+        """
+        order = list(order)
+        indices = range(1, len(order)) if step < 0 else range(len(order) - 2, -1, -1)
+        for index in indices:
+            neighbour = index + step
+            if order[index] in selected and order[neighbour] not in selected:
+                order[index], order[neighbour] = order[neighbour], order[index]
+        return order
+
+    def _get_selected_rows(self):
+        """
+        Get the selected path rows grouped by section.
+
+        Returns:
+            Dictionary mapping 'user' and 'system' to the set of selected rows
+        """
+        selection = set(self.view.treeview.selection())
+        return {
+            'user': selection & set(self.view.treeview.tag_has('user_path')),
+            'system': selection & set(self.view.treeview.tag_has('system_path'))
+        }
+
+    def _get_parent_node(self, path_type):
+        """
+        Get the header node of a section.
+
+        Args:
+            path_type: 'user' or 'system'
+
+        Returns:
+            The header item, or '' if it does not exist
+        """
+        for node in self.view.treeview.get_children():
+            if self.view.treeview.item(node)['text'] == f"{path_type.upper()} PATH":
+                return node
+        return ''
+
+    def _get_entries(self, path_type):
+        """
+        Get the entry records of a section, in order.
+
+        Args:
+            path_type: 'user' or 'system'
+
+        Returns:
+            The live USER or SYSTEM entry list of the model
+        """
+        return self.model.entries[path_type]
+
+    def _populate(self):
+        """Fill the treeview from the entry store, probing only entries without cached results."""
+        self.view.populate_treeview(
+            [self._get_row(entry) for entry in self.model.entries['user']],
+            [self._get_row(entry) for entry in self.model.entries['system']]
+        )
+
+    def _get_row(self, entry):
+        """
+        Probe an entry and get its treeview row contents.
+
+        Args:
+            entry: The PathEntry to show
+
+        Returns:
+            Tuple of (path, exists, filecount), with the filecount formatted for display
+        """
+        exists, _ = self.model.probe_entry(entry)
+        return entry.raw, exists, self.model.format_filecount(entry)
 
     def reload_path(self):
         """Reload PATH environment variables from the OS."""
         self.model.reload_path()
-        self.view.populate_treeview(
-            self.model.user_paths, 
-            self.model.system_paths, 
-            self.model.get_filecount, 
-            self.model.path_exists
-        )
-        self.update_statistics()
+        self._undo_stack.clear()
+        self._populate()
+        self.schedule_refresh()
+
+        # Finish the counts cut short by the probing budget without blocking the window
+        self.complete_filecounts(self.model.entries['system'] + self.model.entries['user'])
+
+    def count_selected_files(self):
+        """Count the files of the selected entries exactly, ahead of other pending counts."""
+        selected_rows = self._get_selected_rows()
+        entries = []
+        for path_type, rows in selected_rows.items():
+            children = self.view.treeview.get_children(self._get_parent_node(path_type))
+            entries.extend(entry for entry, child in zip(self._get_entries(path_type), children)
+                           if child in rows)
+        self.complete_filecounts(entries, first=True)
+
+    def complete_filecounts(self, entries, first=False):
+        """
+        Queue entries with a lower-bound file count for exact counting in the background.
+
+        Args:
+            entries: The entries to count; entries with an exact count are skipped
+            first: Whether to count these entries before the ones already queued
+        """
+        pending = [entry for entry in entries if entry.exists and not entry.filecount_complete]
+        if not pending:
+            return
+
+        with self._count_lock:
+            if first:
+                self._count_queue.extendleft(reversed(pending))
+            else:
+                self._count_queue.extend(pending)
+            if self._count_thread is None:
+                self._count_thread = threading.Thread(target=self._count_worker, daemon=True)
+                self._count_thread.start()
+                self.view.root.after(100, self._poll_filecounts)
+
+    def _count_worker(self):
+        """Count queued entries until the queue is empty; runs in a background thread."""
+        while True:
+            with self._count_lock:
+                if not self._count_queue:
+                    self._count_thread = None
+                    return
+                entry = self._count_queue.popleft()
+            if not entry.filecount_complete:
+                # Only the count happens here; the entry is updated on the Tk thread
+                self._count_results.put((entry, self.model.get_filecount(entry.raw)))
+
+    def _poll_filecounts(self):
+        """Apply finished counts to the entries and their rows; runs on the Tk thread."""
+        counted = {}
+        while not self._count_results.empty():
+            entry, count = self._count_results.get()
+            entry.filecount = count
+            entry.filecount_complete = True
+            counted[id(entry)] = entry
+
+        if counted:
+            self._unfiltered(lambda: self._update_rows(counted))()
+
+        with self._count_lock:
+            running = self._count_thread is not None
+        if running or not self._count_results.empty():
+            try:
+                self.view.root.after(100, self._poll_filecounts)
+            except tk.TclError:
+                # The window was closed
+                pass
+
+    def _update_rows(self, entries):
+        """
+        Refresh the rows of the given entries from their probe results.
+
+        Args:
+            entries: Dictionary mapping id() of each entry to the entry
+        """
+        for path_type in ('user', 'system'):
+            children = self.view.treeview.get_children(self._get_parent_node(path_type))
+            for entry, child in zip(self._get_entries(path_type), children):
+                if id(entry) in entries:
+                    self.view.update_path(child, *self._get_row(entry), path_type)
 
     def save_user_path(self):
         """Save only the USER path."""
-        self.model.set_path_to_os(user_path=self.model.user_paths)
+        self._review_changes(('user',))
 
     def save_system_path(self):
         """Save only the SYSTEM path."""
-        if not self.model.is_admin():
-            if self.view.show_admin_required_message():
-                # User wants to restart with elevated permissions
-                self.view.root.destroy()  # Close the current instance
-                import main
-                main.restart_with_admin()
+        if not self._ensure_system_access():
             return
-        self.model.set_path_to_os(system_path=self.model.system_paths)
+        self._review_changes(('system',))
 
     def save_path(self):
         """Save both USER and SYSTEM paths."""
-        success = self.model.set_path_to_os(
-            user_path=self.model.user_paths, 
-            system_path=self.model.system_paths
+        # Without SYSTEM access the USER path is still saved
+        self._ensure_system_access()
+        self._review_changes(('user', 'system'))
+
+    def _review_changes(self, path_types):
+        """
+        Show the minimal edit script from the saved to the pending entries; save on confirmation.
+
+        Args:
+            path_types: The sections to save
+        """
+        pending = {path_type: [entry.raw for entry in self._get_entries(path_type)]
+                   for path_type in path_types}
+        # The script is only valid for these exact lists
+        reviewed = {path_type: list(self._get_entries(path_type)) for path_type in path_types}
+        self._review_write(pending, reviewed=reviewed)
+
+    def _review_write(self, pending, reviewed=None, on_written=None):
+        """
+        Check the lengths of the values to save, show their edit script, and write on confirmation.
+
+        Only sections that differ from what is saved are written. If the entries are compacted to
+        fit, the compacted entries are what the review shows and what is written.
+
+        Args:
+            pending: Dictionary mapping each section to save to its entries
+            reviewed: Dictionary mapping sections to the editor entries the save is based on; the
+                save is refused if they change during the review, and compacted entries replace them
+            on_written: Called with the result of the write after it happened
+        """
+        loaded = {'user': self.model.loaded_user_paths, 'system': self.model.loaded_system_paths}
+        pending = {path_type: [self.model.normalize_path(path) for path in paths]
+                   for path_type, paths in pending.items()}
+        changed = pathdiff.diff_scopes(loaded, pending).changed_scopes()
+        if not changed:
+            messagebox.showinfo("No changes", "The selected PATH already matches what is saved.")
+            return
+
+        values = self._check_lengths({path_type: pending[path_type] for path_type in changed})
+        if values is None:
+            return
+        compacted = values != {path_type: pending[path_type] for path_type in changed}
+        script = pathdiff.diff_scopes(loaded, values)
+
+        def save():
+            self.view.close_review_dialog()
+            if reviewed is not None and any(self._get_entries(path_type) != entries
+                                            for path_type, entries in reviewed.items()):
+                messagebox.showinfo("PATH changed",
+                                    "The PATH changed during the review. Please save again.")
+                return
+            success = self._write_paths(user_path=values.get('user'),
+                                        system_path=values.get('system'))
+            if compacted and reviewed is not None:
+                # Show the entries as they were written
+                self._replace_paths({path_type: paths for path_type, paths in values.items()
+                                     if path_type in reviewed})
+            if on_written is not None:
+                on_written(success)
+
+        save_button = self.view.show_review_dialog(script.describe())
+        save_button.config(command=self._unfiltered(save))
+
+    def _check_lengths(self, values):
+        """
+        Check the lengths of the values a save would write, offering to compact the entries.
+
+        Values that are too long for Windows are not written; values that are long enough to
+        break some tools need confirmation.
+
+        Args:
+            values: Dictionary mapping each section to write to its entries
+
+        Returns:
+            The entries to write, compacted if the user chose so, or None if the save is cancelled
+        """
+        report = serializer.check_lengths(self.model, values.get('user'), values.get('system'))
+        errors = report.get_errors()
+        if errors and report.get_errors(compact=True):
+            messagebox.showerror("PATH too long",
+                                 '\n'.join(report.get_errors(compact=True)) + '\n\n' +
+                                 report.describe())
+            return None
+
+        problems = errors + report.get_warnings()
+        if not problems:
+            return values
+        compact = self.view.show_length_warning('\n'.join(problems), report.describe(),
+                                                report.can_compact(), required=bool(errors))
+        if compact is None:
+            return None
+        if compact:
+            return {path_type: serializer.compact_entries(self.model, paths, path_type)
+                    for path_type, paths in values.items()}
+        return values
+
+    def _write_paths(self, user_path=None, system_path=None):
+        """
+        Write paths to the OS, reporting a failed elevated helper.
+
+        Args:
+            user_path: List of paths to set for the USER path
+            system_path: List of paths to set for the SYSTEM path
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            return self.model.set_path_to_os(user_path=user_path, system_path=system_path)
+        except BrokerError as e:
+            # The helper is gone; the next SYSTEM write offers to start a new one
+            self.model.broker = None
+            messagebox.showerror("Saving the SYSTEM path failed", str(e))
+            return False
+        except subprocess.CalledProcessError as e:
+            messagebox.showerror("Saving the PATH failed",
+                                 (e.stderr or b'').decode('utf-8', 'replace') or str(e))
+            return False
+        except ValueError as e:
+            messagebox.showerror("PATH too long", str(e))
+            return False
+
+    def compact_entries(self, path_types=('user', 'system')):
+        """
+        Replace known directory prefixes with %VAR% references, e.g. c:/windows with %systemroot%.
+
+        Args:
+            path_types: The sections to compact
+        """
+        compacted = {}
+        for path_type in path_types:
+            current = [entry.raw for entry in self._get_entries(path_type)]
+            paths = serializer.compact_entries(self.model, current, path_type)
+            if paths != current:
+                compacted[path_type] = paths
+        if 'system' in compacted and not self._ensure_system_access():
+            del compacted['system']
+        self._replace_paths(compacted)
+
+    def _replace_paths(self, paths_by_type):
+        """
+        Replace the entries of sections one by one, keeping entries whose string is unchanged.
+
+        Args:
+            paths_by_type: Dictionary mapping sections to their new entries, one per current entry
+        """
+        if not paths_by_type:
+            return
+
+        with self.batch():
+            for path_type, paths in paths_by_type.items():
+                entries = self._get_entries(path_type)
+                children = self.view.treeview.get_children(self._get_parent_node(path_type))
+                for index, (entry, path, child) in enumerate(zip(list(entries), paths, children)):
+                    if path != entry.raw:
+                        entries[index] = self.model.create_entry(path, path_type)
+                        self.view.update_path(child, *self._get_row(entries[index]), path_type)
+
+    def _can_edit_system(self):
+        """Check if the SYSTEM path can be written now or after starting the elevated helper."""
+        return self.model.can_write_system() or broker.can_elevate()
+
+    def _ensure_system_access(self):
+        """
+        Make sure the SYSTEM path can be written, offering to start the elevated helper.
+
+        The helper is started once and then serves every SYSTEM write of the session, so unsaved
+        edits are kept instead of restarting the application elevated.
+
+        Returns:
+            True if the SYSTEM path can be written, False otherwise
+        """
+        if self.model.can_write_system():
+            return True
+        if not broker.can_elevate():
+            messagebox.showerror("Admin privileges required",
+                                 "You need to run this application as administrator to modify "
+                                 "the SYSTEM path.")
+            return False
+        if not self.view.show_admin_required_message():
+            return False
+
+        try:
+            self.model.broker = broker.launch()
+        except (BrokerError, OSError) as e:
+            messagebox.showerror("Elevation failed", str(e))
+            return False
+        return True
+
+    def show_history(self):
+        """Show the snapshot history browser."""
+        if self.model.history is None:
+            messagebox.showinfo("History unavailable", "Snapshot history is not enabled.")
+            return
+
+        snapshots = self.model.history.list_snapshots()
+        diff_button, restore_button = self.view.show_history_dialog(snapshots)
+        diff_button.config(command=self.diff_snapshots)
+        restore_button.config(command=self.restore_snapshot)
+
+    def diff_snapshots(self):
+        """Show the differences between the two selected snapshots."""
+        selected = self.view.get_selected_snapshots()
+        if len(selected) != 2:
+            self.view.set_history_text('Select exactly two snapshots to compare.')
+            return
+
+        old_id, new_id = sorted(selected)
+        self.view.show_history_diff(old_id, new_id, self.model.history.diff(old_id, new_id))
+
+    def restore_snapshot(self):
+        """Write the selected snapshot back to the OS."""
+        selected = self.view.get_selected_snapshots()
+        if len(selected) != 1:
+            self.view.set_history_text('Select exactly one snapshot to restore.')
+            return
+
+        user_paths, system_paths = self.model.history.get_snapshot(selected[0])
+        self._ensure_system_access()
+
+        def written(success):
+            if not success:
+                messagebox.showwarning(
+                    "Partially restored",
+                    "Not every section of the snapshot could be written."
+                )
+            self.view.close_history_dialog()
+            self.reload_path()
+
+        self._review_write({'user': user_paths, 'system': system_paths}, on_written=written)
+
+    def reconcile_path(self):
+        """Bring both paths to a desired state loaded from a JSON file."""
+        filename = self.view.ask_desired_state_file()
+        if not filename:
+            return
+
+        try:
+            reconcile_plan = reconcile.plan(self.model, reconcile.DesiredState.load(filename))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            messagebox.showerror("Invalid desired state", str(e))
+            return
+
+        if reconcile_plan.is_empty():
+            messagebox.showinfo("Reconcile", reconcile_plan.describe())
+            return
+
+        if 'system' in reconcile_plan.changed_scopes() and not self._ensure_system_access():
+            return
+
+        if not self.view.show_reconcile_plan(reconcile_plan.describe()):
+            return
+
+        # Apply to the model only; the changes are written with the regular save buttons
+        with self.batch():
+            reconcile.apply(self.model, reconcile_plan, write=False)
+            self._populate()
+
+    def import_paths(self):
+        """Import entries from a file and append the new ones as a single batch."""
+        filename = self.view.ask_import_file()
+        if not filename:
+            return
+
+        try:
+            new_entries = transfer.plan_import(
+                self.model, transfer.read_entries(filename, self.selected_path_type or 'user')
+            )
+        except (OSError, ValueError, UnicodeError) as e:
+            messagebox.showerror("Import failed", str(e))
+            return
+
+        if not any(new_entries.values()):
+            messagebox.showinfo("Import", "All entries in the file are already present.")
+            return
+
+        # Check if user has admin privileges for SYSTEM path
+        if new_entries['system'] and not self._ensure_system_access():
+            return
+
+        probes = transfer.probe_entries(self.model, new_entries['user'] + new_entries['system'])
+
+        with self.batch():
+            for path_type, paths in new_entries.items():
+                parent = self._get_parent_node(path_type)
+                for path in paths:
+                    entry = self.model.create_entry(path, path_type)
+                    entry.exists, entry.filecount, entry.filecount_complete = probes[path]
+                    self.view.insert_path(parent, entry.raw, entry.exists,
+                                          self.model.format_filecount(entry), path_type)
+                    self._get_entries(path_type).append(entry)
+
+        messagebox.showinfo(
+            "Import",
+            f"Imported {len(new_entries['user'])} USER and {len(new_entries['system'])} SYSTEM "
+            f"entries."
         )
-        if not success:
-            if self.view.show_admin_required_message():
-                # User wants to restart with elevated permissions
-                self.view.root.destroy()  # Close the current instance
-                import main
-                main.restart_with_admin()
+
+    def export_paths(self):
+        """Export the entries to a file."""
+        filename = self.view.ask_export_file()
+        if not filename:
+            return
+
+        try:
+            transfer.export_paths(filename, self.model.user_paths, self.model.system_paths,
+                                  self.selected_path_type or 'user')
+        except OSError as e:
+            messagebox.showerror("Export failed", str(e))
 
     def remove_duplicates(self):
         """Remove duplicate path entries for the selected section."""
-        # Find duplicates in USER paths
-        user_duplicates = [item for item, count in collections.Counter(self.model.user_paths).items() if count > 1]
+        # Process only the selected section
+        selected_parents = self._get_selected_parents()
 
-        # Find duplicates in SYSTEM paths
-        system_duplicates = [item for item, count in collections.Counter(self.model.system_paths).items() if count > 1]
+        # If no section is selected, show a message and return
+        if not selected_parents:
+            messagebox.showinfo("Selection Required", "Please select a USER or SYSTEM path entry first.")
+            return
 
-        # Find duplicates across both lists (paths that appear in both USER and SYSTEM)
-        cross_duplicates = [item for item in self.model.user_paths if item in self.model.system_paths]
+        with self.batch():
+            # Process selected parents
+            for parent in selected_parents:
+                is_user = self.view.treeview.item(parent)['text'] == 'USER PATH'
 
-        # Process only the selected section
-        selected_parents = []
-        for parent in self.view.treeview.get_children():
-            # Skip if this is not a parent node
-            if self.view.treeview.item(parent)['text'] not in ['USER PATH', 'SYSTEM PATH']:
-                continue
+                # Check if we can write the SYSTEM path
+                if not is_user and not self._ensure_system_access():
+                    continue
 
-            # Only process the selected section
-            parent_type = self.view.treeview.item(parent)['text'].split()[0].lower()  # 'user' or 'system'
-            if parent_type == self.selected_path_type or not self.selected_path_type:
-                selected_parents.append(parent)
+                path_type, other_type = ('user', 'system') if is_user else ('system', 'user')
+                entries = self._get_entries(path_type)
+                children = self.view.treeview.get_children(parent)
+
+                # Keep the first occurrence of every entry that does not also appear in the other
+                # section, comparing both the spelling and the directory it points to
+                seen = set()
+                for entry in self._get_entries(other_type):
+                    seen.add(entry.key)
+                    seen.add(self.model.get_path_identity(entry.raw))
+                seen.discard(None)
+                kept = []
+                for entry, child in zip(entries, children):
+                    identity = self.model.get_path_identity(entry.raw)
+                    if entry.key in seen or identity in seen:
+                        self._delete_row(child)
+                    else:
+                        seen.add(entry.key)
+                        if identity is not None:
+                            seen.add(identity)
+                        kept.append(entry)
+                entries[:] = kept
+
+    def remove_dead(self):
+        """Remove non-existent path entries for the selected section."""
+        # Process only the selected section
+        selected_parents = self._get_selected_parents()
 
         # If no section is selected, show a message and return
         if not selected_parents:
             messagebox.showinfo("Selection Required", "Please select a USER or SYSTEM path entry first.")
             return
 
-        # Process selected parents
-        for parent in selected_parents:
-            is_user = self.view.treeview.item(parent)['text'] == 'USER PATH'
+        with self.batch():
+            # Process selected parents
+            for parent in selected_parents:
+                is_user = self.view.treeview.item(parent)['text'] == 'USER PATH'
 
-            # Check if we need admin privileges for SYSTEM path
-            if not is_user and not self.model.is_admin():
-                if self.view.show_admin_required_message():
-                    # User wants to restart with elevated permissions
-                    self.view.root.destroy()  # Close the current instance
-                    import main
-                    main.restart_with_admin()
-                    return
-                continue
+                # Check if we can write the SYSTEM path
+                if not is_user and not self._ensure_system_access():
+                    continue
+
+                entries = self._get_entries('user' if is_user else 'system')
+                children = self.view.treeview.get_children(parent)
+                dead = set(self.view.treeview.tag_has('nexists'))
+
+                # Keep the entries whose rows are not marked as non-existent
+                kept = []
+                for entry, child in zip(entries, children):
+                    if child in dead:
+                        self._delete_row(child)
+                    else:
+                        kept.append(entry)
+                entries[:] = kept
+
+    def remove_useless(self):
+        """Remove entries that provide no executables for the selected section."""
+        empty, shadowed = self.model.find_useless_paths(self.model.user_paths,
+                                                        self.model.system_paths)
+
+        # Process only the selected section
+        selected_parents = self._get_selected_parents()
+
+        # If no section is selected, show a message and return
+        if not selected_parents:
+            messagebox.showinfo("Selection Required",
+                                "Please select a USER or SYSTEM path entry first.")
+            return
+
+        selected_types = [self.view.treeview.item(parent)['text'].split()[0].lower()
+                          for parent in selected_parents]
+        useless = {entry for entry in empty + shadowed if entry[0] in selected_types}
+        if not useless:
+            messagebox.showinfo("Nothing to remove",
+                                "Every entry in the selected section provides executables.")
+            return
+
+        empty_count = len([entry for entry in empty if entry in useless])
+        shadowed_count = len(useless) - empty_count
+        probes_saved = self.model.get_probes_saved(len(useless))
+        if not self.view.show_useless_report(empty_count, shadowed_count, probes_saved):
+            return
 
-            # Process children of this parent
-            for child in reversed(self.view.treeview.get_children(parent)):
-                item = self.view.treeview.item(child)
-                if not item['values']:
+        with self.batch():
+            # Process selected parents
+            for parent in selected_parents:
+                is_user = self.view.treeview.item(parent)['text'] == 'USER PATH'
+                path_type = 'user' if is_user else 'system'
+
+                # Check if we can write the SYSTEM path
+                if not is_user and not self._ensure_system_access():
                     continue
 
-                value = item['values'][0]
-
-                # Check if this is a duplicate
-                if (is_user and value in user_duplicates) or (not is_user and value in system_duplicates) or value in cross_duplicates:
-                    # Remove from the appropriate list
-                    if is_user:
-                        if value in user_duplicates:
-                            user_duplicates.remove(value)
-                        if value in self.model.user_paths:
-                            self.model.user_paths.remove(value)
-                    else:  # system
-                        if value in system_duplicates:
-                            system_duplicates.remove(value)
-                        if value in self.model.system_paths:
-                            self.model.system_paths.remove(value)
-
-                    # Remove from cross_duplicates if it's there
-                    if value in cross_duplicates:
-                        cross_duplicates.remove(value)
-
-                    # Remove from applications for backward compatibility
-                    if value in self.model.applications:
-                        self.model.applications.remove(value)
+                entries = self._get_entries(path_type)
+
+                # Process children of this parent, back to front so indices stay valid
+                children = self.view.treeview.get_children(parent)
+                for index in reversed(range(len(children))):
+                    if (path_type, index) not in useless:
+                        continue
+
+                    del entries[index]
 
                     # Delete from treeview
-                    self.view.treeview.delete(child)
+                    self._delete_row(children[index])
+
+    def find_duplicate_binaries(self):
+        """Show identical executables across all entries and offer to remove redundant entries."""
+        if self._hash_cache is None:
+            self._hash_cache = binaries.HashCache(binaries.HashCache.default_location())
+
+        report = binaries.find_duplicate_binaries(self.model, self.model.user_paths,
+                                                  self.model.system_paths, self._hash_cache)
+        # The report refers to entries by position, so it is only valid for these exact lists
+        analyzed = {path_type: list(self.model.entries[path_type])
+                    for path_type in ('user', 'system')}
+
+        def remove_redundant():
+            if any(self.model.entries[path_type] != entries
+                   for path_type, entries in analyzed.items()):
+                messagebox.showinfo("PATH changed",
+                                    "The PATH changed since the analysis. Please run it again.")
+                return
+            removes_system = any(path_type == 'system' for path_type, _ in report.redundant)
+            if removes_system and not self._ensure_system_access():
+                return
+
+            with self.batch():
+                for path_type in ('user', 'system'):
+                    indices = {index for scope, index in report.redundant if scope == path_type}
+                    if not indices:
+                        continue
+                    entries = self._get_entries(path_type)
+                    children = self.view.treeview.get_children(self._get_parent_node(path_type))
+                    entries[:] = [entry for index, entry in enumerate(entries)
+                                  if index not in indices]
+                    for index in indices:
+                        self._delete_row(children[index])
+            self.view.close_binary_report()
+
+        remove_button = self.view.show_binary_report(
+            report.describe(self.model.user_paths, self.model.system_paths), len(report.redundant)
+        )
+        remove_button.config(command=self._unfiltered(remove_redundant))
 
-        self.update_statistics()
+    def _get_selected_parents(self):
+        """
+        Get the header nodes of the selected section.
 
-    def remove_dead(self):
-        """Remove non-existent path entries for the selected section."""
-        # Process only the selected section
+        Returns:
+            List of USER/SYSTEM header items matching the selected path type
+        """
         selected_parents = []
         for parent in self.view.treeview.get_children():
             # Skip if this is not a parent node
@@ -493,54 +1078,66 @@ class PathController:
                 continue
 
             # Only process the selected section
-            parent_type = self.view.treeview.item(parent)['text'].split()[0].lower()  # 'user' or 'system'
+            # 'user' or 'system'
+            parent_type = self.view.treeview.item(parent)['text'].split()[0].lower()
             if parent_type == self.selected_path_type or not self.selected_path_type:
                 selected_parents.append(parent)
+        return selected_parents
 
-        # If no section is selected, show a message and return
-        if not selected_parents:
-            messagebox.showinfo("Selection Required", "Please select a USER or SYSTEM path entry first.")
-            return
-
-        # Process selected parents
-        for parent in selected_parents:
-            is_user = self.view.treeview.item(parent)['text'] == 'USER PATH'
-
-            # Check if we need admin privileges for SYSTEM path
-            if not is_user and not self.model.is_admin():
-                if self.view.show_admin_required_message():
-                    # User wants to restart with elevated permissions
-                    self.view.root.destroy()  # Close the current instance
-                    import main
-                    main.restart_with_admin()
-                    return
-                continue
-
-            # Process children of this parent
-            for child in reversed(self.view.treeview.get_children(parent)):
-                item = self.view.treeview.item(child)
-                if not item['values']:
-                    continue
-
-                # Check if this path doesn't exist
-                if 'nexists' in item['tags']:
-                    value = item['values'][0]
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Group model and treeview mutations into a single view update and undo step.
 
-                    # Remove from the appropriate list
-                    if is_user:
-                        if value in self.model.user_paths:
-                            self.model.user_paths.remove(value)
-                    else:  # system
-                        if value in self.model.system_paths:
-                            self.model.system_paths.remove(value)
+        Inside the batch, rows removed through _delete_row are collected and deleted with one
+        treeview call when the outermost batch ends, and statistics are refreshed once afterwards.
+        If the batch changed the path lists, their previous state is pushed onto the undo stack.
+        """
+        if not self._batch_depth:
+            self._undo_snapshot = (list(self.model.entries['user']),
+                                   list(self.model.entries['system']))
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                current = (self.model.entries['user'], self.model.entries['system'])
+                if self._undo_snapshot != current:
+                    self._undo_stack.append(self._undo_snapshot)
+                    del self._undo_stack[:-self.UNDO_LIMIT]
+                self._undo_snapshot = None
+                pending_deletes, self._pending_deletes = self._pending_deletes, []
+                try:
+                    if pending_deletes:
+                        self.view.treeview.delete(*pending_deletes)
+                    self.schedule_refresh()
+                except tk.TclError:
+                    # The window was closed inside the batch, e.g. to restart with admin privileges
+                    pass
+
+    def _delete_row(self, item):
+        """
+        Delete a treeview row, deferred to the end of the current batch if there is one.
 
-                    # Remove from applications for backward compatibility
-                    if value in self.model.applications:
-                        self.model.applications.remove(value)
+        Args:
+            item: The treeview item to delete
+        """
+        if self._batch_depth:
+            self._pending_deletes.append(item)
+        else:
+            self.view.treeview.delete(item)
 
-                    # Delete from treeview
-                    self.view.treeview.delete(child)
+    def schedule_refresh(self):
+        """Refresh the statistics once the event loop is idle, coalescing repeated requests."""
+        if self._refresh_pending or self._batch_depth:
+            return
+        self._refresh_pending = True
+        self.view.root.after_idle(self._flush_refresh)
 
+    def _flush_refresh(self):
+        """Run the refresh queued by schedule_refresh."""
+        self._refresh_pending = False
         self.update_statistics()
 
     def update_statistics(self):
@@ -552,11 +1149,22 @@ class PathController:
         system_duplicates = self.model.get_duplicate_count(self.model.system_paths)
 
         # Count duplicates across both lists (paths that appear in both USER and SYSTEM)
-        cross_duplicates = len([item for item in self.model.user_paths if item in self.model.system_paths])
-
-        # Calculate path lengths
+        system_paths = set(self.model.system_paths)
+        cross_duplicates = len([item for item in self.model.user_paths if item in system_paths])
+
+        # Count entries spelled differently from an earlier entry pointing to the same directory
+        identity_groups = self.model.find_identity_duplicates(self.model.user_paths,
+                                                              self.model.system_paths)
+        paths = {'user': self.model.user_paths, 'system': self.model.system_paths}
+        identity_duplicates = sum(len({paths[path_type][index] for path_type, index in group}) - 1
+                                  for group in identity_groups)
+        self.view.set_identity_groups(identity_groups)
+
+        # Calculate path lengths and the registry bytes %VAR% compaction would save
         user_length = self.model.get_path_length(self.model.user_paths)
         system_length = self.model.get_path_length(self.model.system_paths)
+        length_report = serializer.check_lengths(self.model, self.model.user_paths,
+                                                 self.model.system_paths)
 
         # Update statistics in the view
         self.view.update_statistics(
@@ -566,5 +1174,8 @@ class PathController:
             len(self.model.user_paths), 
             len(self.model.system_paths), 
             user_length, 
-            system_length
+            system_length,
+            identity_duplicates,
+            length_report.saved_bytes['user'],
+            length_report.saved_bytes['system']
         )
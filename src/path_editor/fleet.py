@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from model import PathModel
+
+
+class TargetResult:
+    """
+    Outcome of running an operation against one target.
+    """
+    def __init__(self, name: str, value: Any = None, error: Optional[BaseException] = None,
+                 attempts: int = 0, elapsed: float = 0.0):
+        """
+        Initialize the result.
+
+        Args:
+            name: Name of the target
+            value: Return value of the operation, if it succeeded
+            error: Exception of the last attempt, if every attempt failed
+            attempts: Number of attempts made
+            elapsed: Seconds spent on the target including retries
+        """
+        self.name = name
+        self.value = value
+        self.error = error
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation succeeded."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = 'ok' if self.ok else f'error={self.error!r}'
+        return (f'TargetResult({self.name!r}, {state}, attempts={self.attempts}, '
+                f'elapsed={self.elapsed:.3f})')
+
+
+class FleetSummary:
+    """
+    Aggregated PATH statistics over all targets analyzed with analyze_paths().
+    """
+    def __init__(self):
+        self.targets = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.dead = 0
+        self.length = 0
+
+    def add(self, result: TargetResult) -> None:
+        """
+        Add one target result to the summary.
+
+        Args:
+            result: Result whose value was produced by analyze_paths()
+        """
+        self.targets += 1
+        if not result.ok:
+            self.failed += 1
+            return
+        self.duplicates += result.value['duplicates']
+        self.dead += result.value['dead']
+        self.length += result.value['length']
+
+    def __str__(self) -> str:
+        return (f'Targets: {self.targets} ({self.failed} failed), duplicates: {self.duplicates}, '
+                f'dead entries: {self.dead}, total length: {self.length}')
+
+
+def read_paths(model: PathModel) -> Dict[str, Any]:
+    """
+    Read operation returning both scopes of a target.
+
+    Args:
+        model: The target's PathModel
+
+    Returns:
+        Dictionary with 'user' and 'system' entry lists
+    """
+    return {'user': list(model.user_paths), 'system': list(model.system_paths)}
+
+
+def analyze_paths(model: PathModel) -> Dict[str, Any]:
+    """
+    Analysis operation returning the statistics shown in the editor.
+
+    Args:
+        model: The target's PathModel
+
+    Returns:
+        Dictionary with 'duplicates', 'dead' and 'length' counts over both scopes
+    """
+    system_set = set(model.system_paths)
+    duplicates = (model.get_duplicate_count(model.user_paths)
+                  + model.get_duplicate_count(model.system_paths)
+                  + len([item for item in model.user_paths if item in system_set]))
+    # One batched check, so a remote target answers in a single round trip on its own filesystem
+    entries = [path for path in model.system_paths + model.user_paths if path]
+    dead = model.paths_exist(entries).count(False)
+    length = model.get_path_length(model.user_paths) + model.get_path_length(model.system_paths)
+    return {'duplicates': duplicates, 'dead': dead, 'length': length}
+
+
+class FleetRunner:
+    """
+    Runs the same operation against many PATH backends concurrently.
+
+    Each target is described by a factory returning its PathModel (e.g. a RemotePathModel or,
+    in tests, a MemoryPathModel), so connecting and loading happen inside the worker and count
+    towards the target's timeout.
+
+    A timed out attempt cannot be cancelled and keeps running in the background. It keeps its
+    slot until it really finishes, so at most max_workers attempts run at any time, and only
+    idempotent operations are retried.
+    """
+    def __init__(self, max_workers: int = 16, timeout: Optional[float] = 60.0, retries: int = 1,
+                 retry_delay: float = 1.0):
+        """
+        Initialize the runner.
+
+        Args:
+            max_workers: Maximum number of targets processed at the same time
+            timeout: Seconds a single attempt may take, or None for no limit
+            retries: Number of additional attempts after a failed or timed out one
+            retry_delay: Seconds to wait between attempts
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        # Held by every running attempt, including timed out ones that have not finished yet
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def run(self, targets: Dict[str, Callable[[], PathModel]],
+            operation: Callable[[PathModel], Any],
+            idempotent: bool = False) -> Iterator[TargetResult]:
+        """
+        Run an operation against all targets, yielding results as they complete.
+
+        Args:
+            targets: Mapping of target name to a factory creating its PathModel
+            operation: Callable receiving the loaded PathModel; its return value is reported
+            idempotent: Whether the operation may be repeated safely, e.g. a read; only then are
+                failed or timed out attempts retried, since a timed out edit may still be applied
+
+        Yields:
+            One TargetResult per target in completion order
+        """
+        results: 'queue.Queue[TargetResult]' = queue.Queue()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for name, factory in targets.items():
+                executor.submit(lambda n=name, f=factory: results.put(
+                    self._run_target(n, f, operation, idempotent)))
+            for _ in range(len(targets)):
+                yield results.get()
+
+    def summarize(self, targets: Dict[str, Callable[[], PathModel]],
+                  on_result: Callable[[TargetResult], None] = None) -> FleetSummary:
+        """
+        Analyze all targets and aggregate their statistics.
+
+        Args:
+            targets: Mapping of target name to a factory creating its PathModel
+            on_result: Optional callback receiving each result as it arrives
+
+        Returns:
+            The fleet summary
+        """
+        summary = FleetSummary()
+        for result in self.run(targets, analyze_paths, idempotent=True):
+            summary.add(result)
+            if on_result is not None:
+                on_result(result)
+        return summary
+
+    def _run_target(self, name: str, factory: Callable[[], PathModel],
+                    operation: Callable[[PathModel], Any], idempotent: bool) -> TargetResult:
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(1, attempts + 1):
+            if attempt > 1:
+                time.sleep(self.retry_delay)
+            try:
+                value = self._call_with_timeout(lambda: operation(factory()))
+                return TargetResult(name, value, None, attempt, time.perf_counter() - start)
+            except Exception as e:
+                error = e
+        return TargetResult(name, None, error, attempts, time.perf_counter() - start)
+
+    def _call_with_timeout(self, function: Callable[[], Any]) -> Any:
+        outcome = {}
+
+        def target():
+            try:
+                outcome['value'] = function()
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                self._slots.release()
+
+        # Wait for a slot; abandoned attempts still hold theirs. The wait counts towards the timeout
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f'No free slot within {self.timeout} seconds')
+        remaining = None
+        if self.timeout is not None:
+            remaining = max(0.0, self.timeout - (time.perf_counter() - start))
+        # A timed out attempt cannot be killed; it is abandoned as a daemon thread
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(remaining)
+        if thread.is_alive():
+            raise TimeoutError(f'Operation timed out after {self.timeout} seconds')
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
@@ -0,0 +1,188 @@
+import collections
+import os
+import sqlite3
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class PathHistory:
+    """
+    Local snapshot store for USER and SYSTEM PATH values.
+
+    Every distinct entry string is stored once; a snapshot is two packed sequences of entry IDs,
+    so thousands of snapshots of long PATHs stay small and can be compared without string work.
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            value TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            reason TEXT NOT NULL,
+            user_ids BLOB NOT NULL,
+            system_ids BLOB NOT NULL
+        );
+    '''
+
+    def __init__(self, database_path: str):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            database_path: Location of the SQLite database file, or ':memory:'
+        """
+        if database_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        self.connection = sqlite3.connect(database_path)
+        self.connection.executescript(self.SCHEMA)
+        # Entry string -> ID and back, loaded from the entries table when the database is opened
+        self._entry_ids: Dict[str, int] = {}
+        self._entry_values: Dict[int, str] = {}
+        for entry_id, value in self.connection.execute('SELECT id, value FROM entries'):
+            self._entry_ids[value] = entry_id
+            self._entry_values[entry_id] = value
+
+    @staticmethod
+    def default_location() -> str:
+        """
+        Get the default database location in the user's local application data.
+
+        Returns:
+            Path of the history database file
+        """
+        base = (os.environ.get('LOCALAPPDATA')
+                or os.path.join(os.path.expanduser('~'), '.local', 'share'))
+        return os.path.join(base, 'path-editor', 'history.sqlite3')
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def record(self, user_paths: List[str], system_paths: List[str], reason: str) -> int:
+        """
+        Record a snapshot of both scopes.
+
+        A snapshot identical to the most recent one is not stored again.
+
+        Args:
+            user_paths: List of USER path entries
+            system_paths: List of SYSTEM path entries
+            reason: Why the snapshot was taken, e.g. 'load' or 'save'
+
+        Returns:
+            ID of the recorded (or identical latest) snapshot
+        """
+        user_ids = self._pack(self._intern_all(user_paths))
+        system_ids = self._pack(self._intern_all(system_paths))
+
+        latest = self.connection.execute(
+            'SELECT id, user_ids, system_ids FROM snapshots ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+        if latest is not None and latest[1] == user_ids and latest[2] == system_ids:
+            return latest[0]
+
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO snapshots (timestamp, reason, user_ids, system_ids) '
+                'VALUES (?, ?, ?, ?)',
+                (time.time(), reason, user_ids, system_ids)
+            )
+        return cursor.lastrowid
+
+    def list_snapshots(self) -> List[Tuple[int, float, str]]:
+        """
+        List all snapshots, newest first.
+
+        Returns:
+            List of (snapshot ID, timestamp, reason)
+        """
+        return self.connection.execute(
+            'SELECT id, timestamp, reason FROM snapshots ORDER BY id DESC'
+        ).fetchall()
+
+    def get_snapshot(self, snapshot_id: int) -> Tuple[List[str], List[str]]:
+        """
+        Load the entries of a snapshot.
+
+        Args:
+            snapshot_id: ID of the snapshot
+
+        Returns:
+            Tuple containing USER paths and SYSTEM paths
+        """
+        user_ids, system_ids = self._get_ids(snapshot_id)
+        return ([self._entry_values[i] for i in user_ids],
+                [self._entry_values[i] for i in system_ids])
+
+    def diff(self, old_id: int, new_id: int) -> Dict[str, Tuple[List[str], List[str], bool]]:
+        """
+        Compare two snapshots scope by scope.
+
+        The comparison works on entry IDs and is linear in the length of the PATHs.
+
+        Args:
+            old_id: ID of the older snapshot
+            new_id: ID of the newer snapshot
+
+        Returns:
+            Mapping of 'user'/'system' to (added entries, removed entries, order changed)
+        """
+        old_user, old_system = self._get_ids(old_id)
+        new_user, new_system = self._get_ids(new_id)
+
+        result = {}
+        scopes = (('user', old_user, new_user), ('system', old_system, new_system))
+        for path_type, old, new in scopes:
+            old_counts = collections.Counter(old)
+            new_counts = collections.Counter(new)
+            added = [self._entry_values[i] for i in (new_counts - old_counts).elements()]
+            removed = [self._entry_values[i] for i in (old_counts - new_counts).elements()]
+            # Only report a reorder when the remaining common entries changed their relative order
+            common = new_counts & old_counts
+            old_kept = self._keep(old, common)
+            new_kept = self._keep(new, common)
+            result[path_type] = (added, removed, old_kept != new_kept)
+        return result
+
+    def _get_ids(self, snapshot_id: int) -> Tuple[array, array]:
+        row = self.connection.execute(
+            'SELECT user_ids, system_ids FROM snapshots WHERE id = ?', (snapshot_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f'Unknown snapshot {snapshot_id}')
+        return self._unpack(row[0]), self._unpack(row[1])
+
+    def _intern_all(self, paths: List[str]) -> List[int]:
+        missing = [path for path in dict.fromkeys(paths) if path not in self._entry_ids]
+        if missing:
+            with self.connection:
+                for path in missing:
+                    cursor = self.connection.execute('INSERT INTO entries (value) VALUES (?)',
+                                                     (path,))
+                    self._entry_ids[path] = cursor.lastrowid
+                    self._entry_values[cursor.lastrowid] = path
+        return [self._entry_ids[path] for path in paths]
+
+    @staticmethod
+    def _keep(ids: array, counts: collections.Counter) -> List[int]:
+        remaining = collections.Counter(counts)
+        kept = []
+        for entry_id in ids:
+            if remaining[entry_id] > 0:
+                remaining[entry_id] -= 1
+                kept.append(entry_id)
+        return kept
+
+    @staticmethod
+    def _pack(ids: List[int]) -> bytes:
+        return array('I', ids).tobytes()
+
+    @staticmethod
+    def _unpack(blob: Optional[bytes]) -> array:
+        ids = array('I')
+        if blob:
+            ids.frombytes(blob)
+        return ids
@@ -0,0 +1,238 @@
+import argparse
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from model import PathModel
+
+# Assumed cost of probing a file in a directory that is not cached yet (disk seek, network share)
+# and in a directory whose entries are already cached, in seconds
+COLD_PROBE_COST = 2e-3
+WARM_PROBE_COST = 2e-5
+
+
+def lookup_directories(model: PathModel, user_paths: Iterable[str],
+                       system_paths: Iterable[str]) -> List[str]:
+    """
+    Get the directories a command lookup searches, in lookup order (SYSTEM before USER).
+
+    Args:
+        model: The PathModel used to expand %VAR% references
+        user_paths: List of USER path entries
+        system_paths: List of SYSTEM path entries
+
+    Returns:
+        Expanded directories; empty entries are skipped
+    """
+    return [model.expand_path(path) for path in list(system_paths) + list(user_paths) if path]
+
+
+def resolve(command: str, directories: List[str], pathext: List[str],
+            is_file: Callable[[str], bool] = os.path.isfile) -> Tuple[Optional[str], int]:
+    """
+    Resolve a command like shutil.which() does on Windows, counting the file probes.
+
+    A command ending in one of the PATHEXT extensions is only looked up under its own name;
+    otherwise every PATHEXT extension is tried in order in each directory.
+
+    Args:
+        command: Command name, e.g. 'git' or 'git.exe'
+        directories: Directories in lookup order
+        pathext: Lowercase PATHEXT extensions including the leading dot
+        is_file: Callable checking whether a file exists
+
+    Returns:
+        Tuple of (path of the matched file or None, number of probes)
+    """
+    command = command.lower()
+    names = [command] if command.endswith(tuple(pathext)) else [command + ext for ext in pathext]
+    probes = 0
+    for directory in directories:
+        for name in names:
+            probes += 1
+            path = os.path.join(directory, name)
+            if is_file(path):
+                return path, probes
+    return None, probes
+
+
+class ColdCacheFilesystem:
+    """
+    Simulated filesystem charging a fixed cost per probe.
+
+    The first probe of a directory is charged as a cold lookup, later probes of the same
+    directory as warm ones. The directory listings are read once up front, so measuring does
+    not depend on the state of the OS cache.
+    """
+    def __init__(self, directories: Iterable[str], cold_cost: float = COLD_PROBE_COST,
+                 warm_cost: float = WARM_PROBE_COST):
+        """
+        Initialize the simulation.
+
+        Args:
+            directories: Directories whose listings are simulated
+            cold_cost: Seconds charged for the first probe of a directory
+            warm_cost: Seconds charged for every later probe of a directory
+        """
+        self.cold_cost = cold_cost
+        self.warm_cost = warm_cost
+        self.listings: Dict[str, Set[str]] = {}
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    self.listings[directory] = {entry.name.lower() for entry in entries
+                                                if entry.is_file()}
+            except OSError:
+                # Missing directories are probed (and charged) all the same
+                self.listings[directory] = set()
+        self.cost = 0.0
+        self._warm: Set[str] = set()
+
+    def reset(self) -> None:
+        """Empty the simulated cache and the charged cost."""
+        self.cost = 0.0
+        self._warm.clear()
+
+    def is_file(self, path: str) -> bool:
+        """
+        Probe a file, charging its simulated cost.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            True if the file exists in the simulated listings
+        """
+        directory, name = os.path.split(path)
+        if directory in self._warm:
+            self.cost += self.warm_cost
+        else:
+            self.cost += self.cold_cost
+            self._warm.add(directory)
+        return name.lower() in self.listings.get(directory, ())
+
+
+class LookupReport:
+    """
+    Measured cost of resolving a set of commands against one PATH.
+    """
+    def __init__(self, label: str, directories: int, commands: int, found: int, probes: int,
+                 seconds: float):
+        """
+        Initialize the report.
+
+        Args:
+            label: Description of the PATH and the measurement
+            directories: Number of directories searched
+            commands: Number of commands resolved per run
+            found: Number of commands that were found
+            probes: File probes per run
+            seconds: Seconds per run (measured or simulated)
+        """
+        self.label = label
+        self.directories = directories
+        self.commands = commands
+        self.found = found
+        self.probes = probes
+        self.seconds = seconds
+
+    def __str__(self) -> str:
+        return (f'{self.label:<24} {self.directories:5} dirs '
+                f'{self.found:4}/{self.commands:<4} found '
+                f'{self.probes:7} probes {self.seconds * 1000:10.2f} ms')
+
+
+def measure(label: str, commands: List[str], directories: List[str], pathext: List[str],
+            is_file: Callable[[str], bool] = os.path.isfile, repeat: int = 5) -> LookupReport:
+    """
+    Time resolving all commands against the real filesystem.
+
+    Args:
+        label: Description used in the report
+        commands: Command names to resolve
+        directories: Directories in lookup order
+        pathext: Lowercase PATHEXT extensions
+        is_file: Callable checking whether a file exists
+        repeat: Number of runs; the fastest one is reported
+
+    Returns:
+        The report
+    """
+    best = float('inf')
+    found = probes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [resolve(command, directories, pathext, is_file) for command in commands]
+        best = min(best, time.perf_counter() - start)
+        found = len([path for path, _ in results if path is not None])
+        probes = sum(count for _, count in results)
+    return LookupReport(label, len(directories), len(commands), found, probes, best)
+
+
+def simulate(label: str, commands: List[str], directories: List[str], pathext: List[str],
+             cold_cost: float = COLD_PROBE_COST,
+             warm_cost: float = WARM_PROBE_COST) -> LookupReport:
+    """
+    Estimate resolving all commands once with a cold filesystem cache.
+
+    Args:
+        label: Description used in the report
+        commands: Command names to resolve
+        directories: Directories in lookup order
+        pathext: Lowercase PATHEXT extensions
+        cold_cost: Seconds charged for the first probe of a directory
+        warm_cost: Seconds charged for every later probe of a directory
+
+    Returns:
+        The report, with the simulated cost as its time
+    """
+    filesystem = ColdCacheFilesystem(directories, cold_cost, warm_cost)
+    results = [resolve(command, directories, pathext, filesystem.is_file) for command in commands]
+    return LookupReport(label, len(directories), len(commands),
+                        len([path for path, _ in results if path is not None]),
+                        sum(count for _, count in results), filesystem.cost)
+
+
+def compare(model: PathModel, commands: List[str], repeat: int = 5,
+            cold_cost: float = COLD_PROBE_COST,
+            warm_cost: float = WARM_PROBE_COST) -> List[LookupReport]:
+    """
+    Compare command lookup under the PATH the OS holds with the edited, unsaved PATH of the model.
+
+    Args:
+        model: The PathModel holding both the loaded and the edited entries
+        commands: Command names to resolve
+        repeat: Number of timed runs against the real filesystem
+        cold_cost: Seconds charged for the first probe of a directory in the simulation
+        warm_cost: Seconds charged for every later probe of a directory in the simulation
+
+    Returns:
+        Reports for the current and the edited PATH, measured and simulated
+    """
+    pathext = model.get_pathext()
+    paths = {
+        'current': lookup_directories(model, model.loaded_user_paths, model.loaded_system_paths),
+        'edited': lookup_directories(model, model.user_paths, model.system_paths)
+    }
+    reports = []
+    for name, directories in paths.items():
+        reports.append(measure(f'{name} (filesystem)', commands, directories, pathext,
+                               repeat=repeat))
+        reports.append(simulate(f'{name} (cold cache)', commands, directories, pathext,
+                                cold_cost, warm_cost))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure command lookup cost under the current PATH.')
+    parser.add_argument('commands', nargs='+', help='command names to resolve, e.g. git python ssh')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs')
+    args = parser.parse_args()
+
+    for report in compare(PathModel(debug=True), args.commands, args.repeat):
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
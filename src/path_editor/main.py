@@ -1,7 +1,5 @@
 import tkinter as tk
-import sys
-import os
-import ctypes
+from src.path_editor.history import PathHistory
 from src.path_editor.model import PathModel
 from src.path_editor.view import PathView
 from src.path_editor.controller import PathController
@@ -9,7 +7,7 @@ from src.path_editor.controller import PathController
 
 def main():
     # Create the model
-    model = PathModel(debug=True)
+    model = PathModel(debug=True, history=PathHistory(PathHistory.default_location()))
 
     # Create the view (with a new Tkinter root window)
     root = tk.Tk()
@@ -22,19 +20,5 @@ def main():
     root.mainloop()
 
 
-def restart_with_admin():
-    """
-    Restart the application with administrator privileges.
-    """
-    # Get the path to the current Python executable and script
-    python_exe = sys.executable
-    script_path = os.path.abspath(__file__)
-
-    # Use ctypes to elevate privileges
-    if ctypes.windll.shell32.IsUserAnAdmin() == 0:  # Not admin
-        # ShellExecute parameters: hwnd, operation, file, parameters, directory, show_cmd
-        ctypes.windll.shell32.ShellExecuteW(None, "runas", python_exe, f'"{script_path}"', None, 1)
-
-
 if __name__ == '__main__':
     main()
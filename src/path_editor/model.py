@@ -1,26 +1,445 @@
+import base64
 import ctypes
+import json
 import os
+import re
 import subprocess
-from typing import List, Tuple, Union
+import sys
+import time
+from collections.abc import MutableSequence, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import CompletedProcess
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from history import PathHistory
+from pathdiff import EditScript, diff_entries
+
+
+class PathEntry:
+    """
+    A single PATH entry and its cached probe results.
+
+    Entry strings are interned, so repeated entries and their canonical keys share one string
+    object.
+    """
+    __slots__ = ('raw', 'key', 'scope', 'exists', 'filecount', 'filecount_complete')
+
+    def __init__(self, raw: str, key: str, scope: str):
+        """
+        Initialize the entry.
+
+        Args:
+            raw: The entry as stored in the environment, possibly with %VAR% references
+            key: Canonical form used to compare entries
+            scope: 'user' or 'system'
+        """
+        self.raw = sys.intern(raw)
+        self.key = sys.intern(key)
+        self.scope = scope
+        self.exists: Optional[bool] = None  # None until probed
+        self.filecount: Optional[int] = None
+        self.filecount_complete = True  # False if filecount is only a lower bound
+
+    def __repr__(self) -> str:
+        return f'PathEntry({self.raw!r}, {self.scope!r})'
+
+
+class PathList(MutableSequence):
+    """
+    List of entry strings of one scope of a list variable, backed by the PathModel's entry store.
+    """
+    __slots__ = ('_model', '_scope', '_variable')
+
+    def __init__(self, model: 'PathModel', scope: str, variable: str = 'Path'):
+        self._model = model
+        self._scope = scope
+        self._variable = variable
+
+    @property
+    def _entries(self) -> List[PathEntry]:
+        return self._model.variables[self._variable][self._scope]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        entries = self._entries
+        if isinstance(index, slice):
+            return [entry.raw for entry in entries[index]]
+        return entries[index].raw
+
+    def __setitem__(self, index, value) -> None:
+        entries = self._entries
+        if isinstance(index, slice):
+            entries[index] = [self._model.create_entry(path, self._scope) for path in value]
+        else:
+            entries[index] = self._model.create_entry(value, self._scope)
+
+    def __delitem__(self, index) -> None:
+        del self._entries[index]
+
+    def __iter__(self):
+        return (entry.raw for entry in self._entries)
+
+    def __contains__(self, value) -> bool:
+        return any(entry.raw == value for entry in self._entries)
+
+    def insert(self, index: int, value: str) -> None:
+        self._entries.insert(index, self._model.create_entry(value, self._scope))
+
+    def __add__(self, other: Iterable[str]) -> List[str]:
+        return list(self) + list(other)
+
+    def __radd__(self, other: Iterable[str]) -> List[str]:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Sequence, PathList)) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class CombinedPathList(Sequence):
+    """
+    Read-only list of all entry strings in lookup order (SYSTEM before USER).
+    """
+    __slots__ = ('_model',)
+
+    def __init__(self, model: 'PathModel'):
+        self._model = model
+
+    def __len__(self) -> int:
+        return len(self._model.entries['system']) + len(self._model.entries['user'])
+
+    def __getitem__(self, index):
+        system, user = self._model.entries['system'], self._model.entries['user']
+        if isinstance(index, slice):
+            return [entry.raw for entry in (system + user)[index]]
+        length = len(system) + len(user)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('list index out of range')
+        return system[index].raw if index < len(system) else user[index - len(system)].raw
+
+    def __iter__(self):
+        for scope in ('system', 'user'):
+            for entry in self._model.entries[scope]:
+                yield entry.raw
+
+    def __add__(self, other: Iterable[str]) -> List[str]:
+        return list(self) + list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
 class PathModel:
     """
     Model class for handling PATH environment variables data.
     """
-    def __init__(self, debug: bool = True):
+    # Matches %VAR% references inside a REG_EXPAND_SZ entry
+    VARIABLE_PATTERN = re.compile(r'%([^%;/\\]+)%')
+
+    # Used when PATHEXT is not defined in the environment
+    DEFAULT_PATHEXT = '.COM;.EXE;.BAT;.CMD;.VBS;.VBE;.JS;.JSE;.WSF;.WSH;.MSC'
+
+    # Budget for counting one directory's files while probing; larger directories get a lower bound
+    FILECOUNT_ENTRY_LIMIT = 5000
+    FILECOUNT_TIME_LIMIT = 0.2
+
+    # Registry keys holding the raw (unexpanded) USER and SYSTEM environment
+    USER_ENVIRONMENT_KEY = 'HKCU:\\Environment'
+    SYSTEM_ENVIRONMENT_KEY = (
+        'HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment'
+    )
+
+    # ';'-separated variables loaded by default; Path is always loaded
+    LIST_VARIABLES = ('Path', 'PATHEXT', 'PSModulePath', 'PYTHONPATH')
+
+    # List variables whose entries are not directories, and are therefore never probed
+    NON_DIRECTORY_VARIABLES = ('PATHEXT',)
+
+    # Longest environment variable value Windows accepts, in characters without the terminating null
+    MAX_VALUE_LENGTH = 32766
+
+    # Tells running programs (mainly Explorer) that the environment changed, as
+    # SetEnvironmentVariable does
+    BROADCAST_COMMAND = (
+        "Add-Type -Namespace PathEditor -Name Native -MemberDefinition '[DllImport(\"user32.dll\", "
+        "CharSet = CharSet.Unicode)] public static extern IntPtr SendMessageTimeout(IntPtr hWnd, "
+        "uint Msg, UIntPtr wParam, string lParam, uint fuFlags, uint uTimeout, "
+        "out UIntPtr lpdwResult);'; "
+        "$result = [UIntPtr]::Zero; "
+        "[void][PathEditor.Native]::SendMessageTimeout([IntPtr]0xffff, 0x1a, [UIntPtr]::Zero, "
+        "'Environment', 2, 5000, [ref]$result)"
+    )
+
+    # Names accepted for list variables; they are embedded in PowerShell commands
+    VARIABLE_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+    def __init__(self, debug: bool = True, environment: Optional[Mapping[str, str]] = None,
+                 history: Optional[PathHistory] = None, variables: Optional[Iterable[str]] = None):
+        """
+        Initialize the model and load the list variables from the OS.
+
+        Args:
+            debug: Whether writes are only printed instead of executed
+            environment: Variables used to expand %VAR% entries
+            history: Optional snapshot store
+            variables: Names of the list variables to load and edit, LIST_VARIABLES by default;
+                Path is always included
+        """
         self.debug = debug
-        self.user_paths: List[str] = []
-        self.system_paths: List[str] = []
-        self.applications: List[str] = []  # Combined list for backward compatibility
+        self.environment: Mapping[str, str] = os.environ if environment is None else environment
+        # Casefolded variable name -> name as defined in the environment, see get_variable()
+        self._environment_keys: Dict[str, str] = {}
+        self._environment_size = -1
+        self.history = history
+        # Elevated helper writing the SYSTEM path when this process is not elevated (see broker)
+        self.broker = None
+        # The configured list variables, Path first
+        self.variable_names: List[str] = ['Path']
+        for name in self.LIST_VARIABLES if variables is None else variables:
+            self._check_variable_name(name)
+            if name.upper() not in [known.upper() for known in self.variable_names]:
+                self.variable_names.append(name)
+        # The entry store, variable name -> scope -> entries; entries is the Path store, and
+        # user_paths, system_paths and applications are views over it
+        self.variables: Dict[str, Dict[str, List[PathEntry]]] = {
+            name: {'user': [], 'system': []} for name in self.variable_names
+        }
+        self.entries: Dict[str, List[PathEntry]] = self.variables['Path']
+        # Canonical key -> entry whose probe results are reused while it is listed
+        self._known_entries: Dict[str, PathEntry] = {}
+        self._user_paths = PathList(self, 'user')
+        self._system_paths = PathList(self, 'system')
+        self._applications = CombinedPathList(self)
+        # What the OS holds as of the last load or save, variable name -> scope -> entries
+        self.loaded_variables: Dict[str, Dict[str, List[str]]] = {
+            name: {'user': [], 'system': []} for name in self.variable_names
+        }
+        # Raw entry -> (referenced variable names, their values at expansion time, expanded path)
+        self._expansion_cache: Dict[
+            str, Tuple[Tuple[str, ...], Tuple[Optional[str], ...], str]
+        ] = {}
+        # Expanded path -> filesystem identity, or None if the directory does not exist
+        self._identity_cache: Dict[str, Optional[Hashable]] = {}
         self.reload_path()
 
     def reload_path(self) -> None:
         """
-        Reload PATH environment variables from the OS.
+        Reload PATH and the other configured list variables from the OS in one round trip.
+        """
+        self._known_entries.clear()
+        self._identity_cache.clear()
+        values = self.get_variables_from_os(self.variable_names)
+        for name in self.variable_names:
+            for scope, paths in zip(('user', 'system'), values[name]):
+                self.variables[name][scope] = [self.create_entry(path, scope) for path in paths]
+                self.loaded_variables[name][scope] = list(paths)
+        if self.history is not None:
+            self.history.record(self.user_paths, self.system_paths, 'load')
+
+    @property
+    def loaded_user_paths(self) -> List[str]:
+        """USER path entries the OS holds, as of the last load or save."""
+        return self.loaded_variables['Path']['user']
+
+    @loaded_user_paths.setter
+    def loaded_user_paths(self, paths: List[str]) -> None:
+        self.loaded_variables['Path']['user'] = paths
+
+    @property
+    def loaded_system_paths(self) -> List[str]:
+        """SYSTEM path entries the OS holds, as of the last load or save."""
+        return self.loaded_variables['Path']['system']
+
+    @loaded_system_paths.setter
+    def loaded_system_paths(self, paths: List[str]) -> None:
+        self.loaded_variables['Path']['system'] = paths
+
+    @property
+    def user_paths(self) -> PathList:
+        """USER path entries as a list of strings."""
+        return self._user_paths
+
+    @user_paths.setter
+    def user_paths(self, paths: Iterable[str]) -> None:
+        self.entries['user'] = [self.create_entry(path, 'user') for path in paths]
+
+    @property
+    def system_paths(self) -> PathList:
+        """SYSTEM path entries as a list of strings."""
+        return self._system_paths
+
+    @system_paths.setter
+    def system_paths(self, paths: Iterable[str]) -> None:
+        self.entries['system'] = [self.create_entry(path, 'system') for path in paths]
+
+    @property
+    def applications(self) -> CombinedPathList:
+        """Combined SYSTEM and USER entries, kept for backward compatibility."""
+        return self._applications
+
+    def get_variable_name(self, name: str) -> str:
         """
-        self.user_paths, self.system_paths = self.get_path_from_os()
+        Get the configured spelling of a list variable; names are case-insensitive.
+
+        Args:
+            name: Name of the variable, e.g. 'pathext'
+
+        Returns:
+            The name as configured, e.g. 'PATHEXT'
+        """
+        for known in self.variable_names:
+            if known.upper() == name.upper():
+                return known
+        raise KeyError(f'List variable {name!r} is not loaded')
+
+    def get_list(self, name: str, scope: str) -> PathList:
+        """
+        Get the entries of one scope of a list variable as an editable list of strings.
+
+        Args:
+            name: Name of the variable
+            scope: 'user' or 'system'
+
+        Returns:
+            List view over the entry store; edits change the model, not the OS
+        """
+        if scope not in ('user', 'system'):
+            raise ValueError(f'Invalid scope {scope!r}')
+        return PathList(self, scope, self.get_variable_name(name))
+
+    def set_list(self, name: str, scope: str, paths: Iterable[str]) -> None:
+        """
+        Replace the entries of one scope of a list variable.
+
+        Args:
+            name: Name of the variable
+            scope: 'user' or 'system'
+            paths: The new entries
+        """
+        if scope not in ('user', 'system'):
+            raise ValueError(f'Invalid scope {scope!r}')
+        self.variables[self.get_variable_name(name)][scope] = [self.create_entry(path, scope)
+                                                               for path in paths]
+
+    def is_directory_list(self, name: str) -> bool:
+        """
+        Check if the entries of a list variable are directories.
+
+        Args:
+            name: Name of the variable
+
+        Returns:
+            False for variables like PATHEXT, True otherwise
+        """
+        return name.upper() not in [known.upper() for known in self.NON_DIRECTORY_VARIABLES]
+
+    def _check_variable_name(self, name: str) -> None:
+        if not self.VARIABLE_NAME_PATTERN.match(name):
+            raise ValueError(f'Invalid variable name {name!r}')
+
+    def create_entry(self, path: str, scope: str) -> PathEntry:
+        """
+        Create an entry record, reusing the probe results of a listed entry with the same key.
+
+        Args:
+            path: The entry string
+            scope: 'user' or 'system'
+
+        Returns:
+            The new entry
+        """
+        path = str(path)
+        key = self.normalize_path(path)
+        entry = PathEntry(path, path if key == path else key, scope)
+        known = self._get_known_entry(entry.key)
+        if known is not None:
+            entry.exists = known.exists
+            entry.filecount = known.filecount
+            entry.filecount_complete = known.filecount_complete
+        else:
+            self._known_entries[entry.key] = entry
+        return entry
+
+    def _get_known_entry(self, key: str) -> Optional[PathEntry]:
+        # Only probe results of listed entries are reused: a removed entry's results may be stale,
+        # e.g. its directory was created since, and must not mark a re-added entry as dead
+        known = self._known_entries.get(key)
+        if known is None or known.exists is None:
+            return None
+        for scopes in self.variables.values():
+            for entries in scopes.values():
+                if known in entries:
+                    return known
+        del self._known_entries[key]
+        return None
+
+    def probe_entry(self, entry: PathEntry, shared: bool = True) -> Tuple[bool, int]:
+        """
+        Get whether an entry exists and how many files it holds, probing it only once.
+
+        A directory listed in several variables (e.g. in both Path and PSModulePath) is only
+        probed once. Files are counted within FILECOUNT_ENTRY_LIMIT and FILECOUNT_TIME_LIMIT; for
+        larger directories the count is a lower bound and entry.filecount_complete is False.
+
+        Args:
+            entry: The entry to probe
+            shared: Whether to reuse the probe results of an entry with the same key and to keep
+                this entry's results for later ones; False probes a one-off entry directly
+
+        Returns:
+            Tuple of (exists, filecount)
+        """
+        if entry.exists is None:
+            known = self._get_known_entry(entry.key) if shared else None
+            if known is not None and known.exists is not None:
+                entry.exists = known.exists
+                entry.filecount = known.filecount
+                entry.filecount_complete = known.filecount_complete
+            else:
+                entry.exists = self.path_exists(entry.raw)
+                entry.filecount, entry.filecount_complete = (
+                    self.count_files(entry.raw, self.FILECOUNT_ENTRY_LIMIT,
+                                     self.FILECOUNT_TIME_LIMIT)
+                    if entry.exists else (0, True)
+                )
+                if shared:
+                    self._known_entries[entry.key] = entry
+        return entry.exists, entry.filecount
+
+    def complete_filecount(self, entry: PathEntry) -> int:
+        """
+        Replace a lower-bound file count of an entry with the exact count.
+
+        Args:
+            entry: A probed entry
+
+        Returns:
+            The exact number of files
+        """
+        if not entry.filecount_complete:
+            entry.filecount = self.get_filecount(entry.raw)
+            entry.filecount_complete = True
+        return entry.filecount
+
+    def format_filecount(self, entry: PathEntry) -> Union[int, str]:
+        """
+        Get the file count of a probed entry for display.
+
+        Args:
+            entry: A probed entry
+
+        Returns:
+            The exact count, or a lower bound such as '≥5000'
+        """
+        return entry.filecount if entry.filecount_complete else f'≥{entry.filecount}'
 
     def get_path_from_os(self) -> Tuple[List[str], List[str]]:
         """
@@ -29,32 +448,57 @@ class PathModel:
         Returns:
             Tuple containing USER paths and SYSTEM paths
         """
-        # Get SYSTEM path
-        system_completed = self.run_command('[Environment]::GetEnvironmentVariable(\'Path\',\'Machine\')')
-        system_completed.check_returncode()
+        return self.get_variables_from_os(['Path'])['Path']
+
+    def get_variables_from_os(self, names: Iterable[str]) -> Dict[str, Tuple[List[str], List[str]]]:
+        """
+        Get list variables of both scopes from the OS with a single command.
+
+        Args:
+            names: Names of the variables
+
+        Returns:
+            Dictionary mapping each name to a tuple of its USER and SYSTEM entries; variables
+            that are not defined have no entries
+        """
+        names = list(names)
+        for name in names:
+            self._check_variable_name(name)
 
-        system_env_path = str(system_completed.stdout)
-        system_env_path = system_env_path[2:-1]
-        system_env_path = system_env_path.replace('\\r\\n', '')
-        system_env_path = system_env_path.replace('\\\\', '/')
-        system_env_path = system_env_path.lower()
-        system_apps: List[str] = system_env_path.split(';')
+        # Read the raw registry values so %VAR% references survive a load/save round trip. The
+        # result is sent as base64-encoded UTF-8 JSON, so no console code page can mangle it
+        quoted_names = ', '.join(f"'{name}'" for name in names)
+        completed = self.run_command(
+            f"$values = @{{}}; "
+            f"foreach ($scope in @(@('user', '{self.USER_ENVIRONMENT_KEY}'), "
+            f"@('system', '{self.SYSTEM_ENVIRONMENT_KEY}'))) {{ "
+            f"$key = Get-Item $scope[1]; $values[$scope[0]] = @{{}}; "
+            f"foreach ($name in @({quoted_names})) {{ "
+            f"$values[$scope[0]][$name] = "
+            f"[string]$key.GetValue($name, '', 'DoNotExpandEnvironmentNames') }} }}; "
+            f"[Convert]::ToBase64String("
+            f"[Text.Encoding]::UTF8.GetBytes(($values | ConvertTo-Json -Compress)))"
+        )
+        completed.check_returncode()
 
-        # Get USER path
-        user_completed = self.run_command('[Environment]::GetEnvironmentVariable(\'Path\',\'User\')')
-        user_completed.check_returncode()
+        values = json.loads(base64.b64decode(completed.stdout).decode('utf-8'))
+        return {name: (self.split_value(values['user'].get(name) or ''),
+                       self.split_value(values['system'].get(name) or ''))
+                for name in names}
 
-        user_env_path = str(user_completed.stdout)
-        user_env_path = user_env_path[2:-1]
-        user_env_path = user_env_path.replace('\\r\\n', '')
-        user_env_path = user_env_path.replace('\\\\', '/')
-        user_env_path = user_env_path.lower()
-        user_apps: List[str] = user_env_path.split(';')
+    def split_value(self, value: str) -> List[str]:
+        """
+        Split a raw ';'-separated variable value into normalized entries.
 
-        # For backward compatibility, keep applications as the combined list
-        self.applications = system_apps + user_apps
+        Args:
+            value: The unexpanded value as stored in the registry
 
-        return user_apps, system_apps
+        Returns:
+            List of normalized entries; an empty value has no entries
+        """
+        if not value:
+            return []
+        return [self.normalize_path(entry) for entry in value.split(';')]
 
     def set_path_to_os(self, user_path: List[str] = None, system_path: List[str] = None) -> bool:
         """
@@ -67,32 +511,129 @@ class PathModel:
         Returns:
             True if successful, False if admin privileges are required for SYSTEM path
 
-        If system_path is provided, admin privileges are required to set it.
+        If system_path is provided, admin privileges or an elevated helper (see broker) are
+        required to set it.
         """
+        success = self.set_variable_to_os('Path', user_path, system_path)
+
+        if self.history is not None and not self.debug:
+            self.history.record(self.loaded_user_paths, self.loaded_system_paths, 'save')
+
+        return success
+
+    def set_variable_to_os(self, name: str, user_values: List[str] = None,
+                           system_values: List[str] = None) -> bool:
+        """
+        Set a list variable in the OS.
+
+        Args:
+            name: Name of the variable, e.g. 'Path' or 'PSModulePath'
+            user_values: List of entries to set for the USER scope
+            system_values: List of entries to set for the SYSTEM scope
+
+        Returns:
+            True if successful, False if admin privileges are required for the SYSTEM scope
+
+        Raises:
+            ValueError: If a value is longer than MAX_VALUE_LENGTH; nothing is written then
+            CalledProcessError: If the registry write fails
+        """
+        self._check_variable_name(name)
+        loaded = self.loaded_variables.get(name)
+        label = 'path' if name == 'Path' else name
         success = True
 
-        if user_path is not None:
-            # Normalize paths before saving to ensure consistency with how they're loaded
-            normalized_user_path = [self.normalize_path(path) for path in user_path]
-            user_command = f'[Environment]::SetEnvironmentVariable("Path", \'{";".join(normalized_user_path)}\', [System.EnvironmentVariableTarget]::User)'
-            print(f"Setting USER path: {user_command}")
-            if not self.debug:
-                self.run_command(user_command)
-
-        if system_path is not None:
-            if self.is_admin():
-                # Normalize paths before saving to ensure consistency with how they're loaded
-                normalized_system_path = [self.normalize_path(path) for path in system_path]
-                system_command = f'[Environment]::SetEnvironmentVariable("Path", \'{";".join(normalized_system_path)}\', [System.EnvironmentVariableTarget]::Machine)'
-                print(f"Setting SYSTEM path: {system_command}")
-                if not self.debug:
-                    self.run_command(system_command)
+        for scope, values in (('USER', user_values), ('SYSTEM', system_values)):
+            if values is not None:
+                length = len(';'.join(self.normalize_path(value) for value in values))
+                if length > self.MAX_VALUE_LENGTH:
+                    raise ValueError(f'{scope} {label} is {length} characters long; at most '
+                                     f'{self.MAX_VALUE_LENGTH} are allowed')
+
+        if user_values is not None:
+            # Normalize entries before saving to ensure consistency with how they're loaded
+            normalized_user = [self.normalize_path(value) for value in user_values]
+            if self.debug:
+                self._print_dry_run('user', label, loaded, normalized_user)
             else:
-                print("Admin privileges required to set SYSTEM path")
+                print(f"Setting USER {label}: {';'.join(normalized_user)}")
+                command = self.get_write_command(name, 'user', normalized_user)
+                self.run_command(command).check_returncode()
+                if loaded is not None:
+                    loaded['user'] = normalized_user
+
+        if system_values is not None:
+            # Normalize entries before saving to ensure consistency with how they're loaded
+            normalized_system = [self.normalize_path(value) for value in system_values]
+            if not self.can_write_system():
+                print(f"Admin privileges required to set SYSTEM {label}")
+                if self.debug:
+                    self._print_dry_run('system', label, loaded, normalized_system)
                 success = False
+            elif self.debug:
+                self._print_dry_run('system', label, loaded, normalized_system)
+            elif self.is_admin():
+                print(f"Setting SYSTEM {label}: {';'.join(normalized_system)}")
+                command = self.get_write_command(name, 'system', normalized_system)
+                self.run_command(command).check_returncode()
+                if loaded is not None:
+                    loaded['system'] = normalized_system
+            else:
+                # Hand the write to the elevated helper process
+                print(f"Setting SYSTEM {label} through the elevated helper: "
+                      f"{';'.join(normalized_system)}")
+                self.broker.set_system_variable(name, normalized_system)
+                if loaded is not None:
+                    loaded['system'] = normalized_system
 
         return success
 
+    def get_write_command(self, name: str, scope: str, values: List[str]) -> str:
+        """
+        Build the PowerShell command writing a list variable to the registry.
+
+        The value is written as REG_EXPAND_SZ, so %VAR% entries keep expanding for new processes,
+        and WM_SETTINGCHANGE is broadcast afterwards so Explorer picks up the new value. The name
+        and value travel as base64-encoded UTF-8 JSON and are never part of the command text.
+
+        Args:
+            name: Name of the variable
+            scope: 'user' or 'system'
+            values: The normalized entries
+
+        Returns:
+            The PowerShell command
+        """
+        payload = json.dumps({
+            'key': self.USER_ENVIRONMENT_KEY if scope == 'user' else self.SYSTEM_ENVIRONMENT_KEY,
+            'name': name,
+            'value': ';'.join(values),
+        })
+        encoded = base64.b64encode(payload.encode('utf-8')).decode('ascii')
+        return (
+            f"$ErrorActionPreference = 'Stop'; "
+            f"$data = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}')) "
+            f"| ConvertFrom-Json; "
+            f"Set-ItemProperty -LiteralPath $data.key -Name $data.name -Value $data.value "
+            f"-Type ExpandString; "
+            f"{self.BROADCAST_COMMAND}"
+        )
+
+    def _print_dry_run(self, scope: str, label: str, loaded: Optional[Dict[str, List[str]]],
+                       values: List[str]) -> None:
+        """
+        Print the edit script a write would apply, instead of writing.
+
+        Args:
+            scope: 'user' or 'system'
+            label: Name of the variable as shown to the user
+            loaded: The loaded entries of the variable per scope, or None if it was not loaded
+            values: The normalized entries that would be written
+        """
+        saved = loaded[scope] if loaded is not None else []
+        script = EditScript({scope: diff_entries(saved, values)})
+        print(f"Dry run, {scope.upper()} {label} not written:\n{script.describe()}")
+
     def run_command(self, command: str) -> Union[CompletedProcess, CompletedProcess[bytes]]:
         """
         Run a PowerShell command.
@@ -117,6 +658,15 @@ class PathModel:
         except:
             return False
 
+    def can_write_system(self) -> bool:
+        """
+        Check if the SYSTEM path can be written, directly or through the elevated helper.
+
+        Returns:
+            True if running as admin or connected to an elevated helper, False otherwise
+        """
+        return self.broker is not None or self.is_admin()
+
     def get_duplicate_count(self, paths: List[str]) -> int:
         """
         Count duplicates in a list of paths.
@@ -141,10 +691,189 @@ class PathModel:
         Returns:
             Number of files in the directory
         """
+        return self.count_files(directory)[0]
+
+    def count_files(self, directory: str, max_entries: Optional[int] = None,
+                    max_seconds: Optional[float] = None) -> Tuple[int, bool]:
+        """
+        Count files in a directory, optionally stopping early.
+
+        Args:
+            directory: Directory to count files in
+            max_entries: Number of directory entries after which counting stops, or None
+            max_seconds: Seconds after which counting stops, or None
+
+        Returns:
+            Tuple of (number of files, whether the count is complete); an incomplete count is a
+            lower bound
+        """
+        directory = self.expand_path(directory)
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        count = 0
         try:
-            return len([name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))])
-        except:
-            return 0
+            with os.scandir(directory) as entries:
+                for scanned, item in enumerate(entries):
+                    if max_entries is not None and scanned >= max_entries:
+                        return count, False
+                    # Checking the clock is cheap, but not cheap enough for every entry
+                    if (deadline is not None and scanned % 256 == 255
+                            and time.perf_counter() > deadline):
+                        return count, False
+                    # is_file() uses the type returned by the directory listing, without a stat call
+                    if item.is_file():
+                        count += 1
+        except (OSError, ValueError):
+            return 0, True
+        return count, True
+
+    def get_pathext(self) -> List[str]:
+        """
+        Get the executable extensions used for command lookup.
+
+        Returns:
+            Lowercase PATHEXT extensions including the leading dot
+        """
+        pathext = self.get_variable('PATHEXT') or self.DEFAULT_PATHEXT
+        return [ext.strip().lower() for ext in pathext.split(';') if ext.strip()]
+
+    def get_executables(self, directory: str) -> Optional[Set[str]]:
+        """
+        Collect the PATHEXT-matching files of a directory.
+
+        Args:
+            directory: Directory to scan
+
+        Returns:
+            Lowercase names of the executables in the directory, or None if the directory cannot
+            be read (e.g. access denied), so its contents are unknown
+        """
+        extensions = tuple(self.get_pathext())
+        try:
+            with os.scandir(self.expand_path(directory)) as entries:
+                return {entry.name.lower() for entry in entries
+                        if entry.name.lower().endswith(extensions) and entry.is_file()}
+        except OSError:
+            return None
+
+    def find_useless_paths(
+            self, user_paths: List[str], system_paths: List[str]
+    ) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        """
+        Find existing entries that can never satisfy a command lookup.
+
+        Entries are visited in lookup order (SYSTEM before USER). An entry is empty if it
+        contains no executables, and shadowed if every executable it contains is already
+        provided by an earlier entry. Entries that cannot be read are neither, since their
+        contents are unknown.
+
+        Args:
+            user_paths: List of USER path entries
+            system_paths: List of SYSTEM path entries
+
+        Returns:
+            Tuple of (empty, shadowed) entries, each given as ('user' | 'system', index)
+        """
+        empty: List[Tuple[str, int]] = []
+        shadowed: List[Tuple[str, int]] = []
+        provided: Set[str] = set()
+
+        for path_type, paths in (('system', system_paths), ('user', user_paths)):
+            for index, path in enumerate(paths):
+                if not path or not self.path_exists(path):
+                    continue
+                executables = self.get_executables(path)
+                if executables is None:
+                    continue
+                if not executables:
+                    empty.append((path_type, index))
+                elif executables <= provided:
+                    shadowed.append((path_type, index))
+                provided |= executables
+
+        return empty, shadowed
+
+    def get_probes_saved(self, entry_count: int) -> int:
+        """
+        Estimate the probes saved per command lookup by removing entries.
+
+        Every lookup that passes a directory probes it once per PATHEXT extension.
+
+        Args:
+            entry_count: Number of entries removed from the PATH
+
+        Returns:
+            Estimated number of file probes saved per lookup
+        """
+        return entry_count * len(self.get_pathext())
+
+    def get_path_identity(self, path_str: str) -> Optional[Hashable]:
+        """
+        Get the filesystem identity of the directory an entry points to.
+
+        Junctions, symlinks, 8.3 short names and alternate spellings of the same directory
+        share one identity. Results are cached per expanded path until the next reload.
+
+        Args:
+            path_str: Path entry, possibly containing %VAR% references
+
+        Returns:
+            (device, file ID) of the directory, its resolved real path on filesystems without
+            file IDs, or None if it does not exist
+        """
+        path = self.expand_path(path_str)
+        if path in self._identity_cache:
+            return self._identity_cache[path]
+
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            identity = None
+        else:
+            if stat.st_ino:
+                identity = (stat.st_dev, stat.st_ino)
+            else:
+                identity = os.path.normcase(os.path.realpath(path))
+        self._identity_cache[path] = identity
+        return identity
+
+    def find_identity_duplicates(self, user_paths: List[str], system_paths: List[str],
+                                 max_workers: int = 8) -> List[List[Tuple[str, int]]]:
+        """
+        Group entries that are spelled differently but point to the same directory.
+
+        Uncached entries are stat'ed in parallel. Groups whose entries all share one spelling
+        are left out, since get_duplicate_count() already counts those.
+
+        Args:
+            user_paths: List of USER path entries
+            system_paths: List of SYSTEM path entries
+            max_workers: Maximum number of entries stat'ed at the same time
+
+        Returns:
+            Groups of entries with two or more distinct spellings, each a list of
+            ('user' | 'system', index) in lookup order (SYSTEM before USER)
+        """
+        located = [(path_type, index, self.normalize_path(path))
+                   for path_type, paths in (('system', system_paths), ('user', user_paths))
+                   for index, path in enumerate(paths) if path]
+
+        uncached = {path for _, _, path in located
+                    if self.expand_path(path) not in self._identity_cache}
+        if len(uncached) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Fills the identity cache, which is read below
+                list(executor.map(self.get_path_identity, uncached))
+
+        groups: Dict[Hashable, List[Tuple[str, int]]] = {}
+        spellings: Dict[Hashable, Set[str]] = {}
+        for path_type, index, path in located:
+            identity = self.get_path_identity(path)
+            if identity is None:
+                continue
+            groups.setdefault(identity, []).append((path_type, index))
+            spellings.setdefault(identity, set()).add(path)
+
+        return [group for identity, group in groups.items() if len(spellings[identity]) > 1]
 
     def get_path_length(self, paths: List[str]) -> int:
         """
@@ -158,6 +887,45 @@ class PathModel:
         """
         return sum(map(lambda path: len(path), paths))
 
+    def get_variable_statistics(self, name: str) -> Dict[str, int]:
+        """
+        Get the statistics shown for PATH for any loaded list variable.
+
+        Probe results and directory identities are cached per directory, so entries shared with
+        other variables are not probed again. Dead and same-directory entries are only counted
+        for variables whose entries are directories.
+
+        Args:
+            name: Name of the variable
+
+        Returns:
+            Dictionary with entry counts, duplicate counts, dead entries and lengths
+        """
+        name = self.get_variable_name(name)
+        user_paths = self.get_list(name, 'user')
+        system_paths = self.get_list(name, 'system')
+        system_set = set(system_paths)
+        statistics = {
+            'user_count': len(user_paths),
+            'system_count': len(system_paths),
+            'user_duplicates': self.get_duplicate_count(list(user_paths)),
+            'system_duplicates': self.get_duplicate_count(list(system_paths)),
+            'cross_duplicates': len([path for path in user_paths if path in system_set]),
+            'identity_duplicates': 0,
+            'dead': 0,
+            'user_length': self.get_path_length(user_paths),
+            'system_length': self.get_path_length(system_paths)
+        }
+        if self.is_directory_list(name):
+            paths = {'user': user_paths, 'system': system_paths}
+            statistics['identity_duplicates'] = sum(
+                len({paths[scope][index] for scope, index in group}) - 1
+                for group in self.find_identity_duplicates(user_paths, system_paths))
+            statistics['dead'] = len([entry for scope in ('user', 'system')
+                                      for entry in self.variables[name][scope]
+                                      if entry.raw and not self.probe_entry(entry)[0]])
+        return statistics
+
     def path_exists(self, path_str: str) -> bool:
         """
         Check if a path exists.
@@ -168,7 +936,83 @@ class PathModel:
         Returns:
             True if the path exists, False otherwise
         """
-        return os.path.exists(path_str)
+        return os.path.exists(self.expand_path(path_str))
+
+    def paths_exist(self, paths: List[str]) -> List[bool]:
+        """
+        Check several paths at once.
+
+        Args:
+            paths: Paths to check
+
+        Returns:
+            Whether each path exists, in the order of paths
+        """
+        return [self.path_exists(path) for path in paths]
+
+    def get_variable(self, name: str) -> Optional[str]:
+        """
+        Look up an environment variable case-insensitively.
+
+        Args:
+            name: Variable name without the surrounding percent signs
+
+        Returns:
+            The variable value, or None if it is not defined
+        """
+        value = self.environment.get(name)
+        if value is not None:
+            return value
+        # Windows names are case-insensitive, so %localappdata% matches LocalAppData. The index
+        # is rebuilt when variables were added or removed since it was built.
+        key = self._environment_keys.get(name.casefold())
+        if len(self.environment) != self._environment_size or (
+                key is not None and key not in self.environment):
+            self._environment_keys = {key.casefold(): key for key in self.environment}
+            self._environment_size = len(self.environment)
+            key = self._environment_keys.get(name.casefold())
+        return self.environment.get(key) if key is not None else None
+
+    def expand_path(self, path_str: str) -> str:
+        """
+        Expand %VAR% references in a path entry.
+
+        Expansions are cached per entry together with the values of the variables it
+        references, so an entry is only re-expanded when one of those variables changes.
+        Undefined variables are left in place, matching how Windows expands REG_EXPAND_SZ values.
+
+        Args:
+            path_str: Path entry, possibly containing %VAR% references
+
+        Returns:
+            Normalized path with all known variables substituted
+        """
+        if '%' not in path_str:
+            return path_str
+
+        cached = self._expansion_cache.get(path_str)
+        if cached is not None:
+            names, values, expanded = cached
+            if tuple(self.get_variable(name) for name in names) == values:
+                return expanded
+
+        names = tuple(self.VARIABLE_PATTERN.findall(path_str))
+        values = tuple(self.get_variable(name) for name in names)
+        substitutions = dict(zip(names, values))
+
+        def substitute(match: re.Match) -> str:
+            value = substitutions[match.group(1)]
+            return match.group(0) if value is None else self.normalize_path(value)
+
+        expanded = self.VARIABLE_PATTERN.sub(substitute, path_str)
+        self._expansion_cache[path_str] = (names, values, expanded)
+        return expanded
+
+    def clear_expansion_cache(self) -> None:
+        """
+        Drop all cached %VAR% expansions.
+        """
+        self._expansion_cache.clear()
 
     def normalize_path(self, path_str: str) -> str:
         """
@@ -0,0 +1,268 @@
+import bisect
+import collections
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+SCOPES = ('user', 'system')
+
+# Number of differences after which match_entries stops the O(ND) search, which keeps one copy of
+# its frontier per difference, and matches only the entries that occur once in each list instead
+MAX_EDIT_DISTANCE = 1000
+
+
+class Edit:
+    """
+    One step of an edit script: an inserted, deleted or moved entry.
+    """
+    __slots__ = ('action', 'entry', 'old_index', 'new_index')
+
+    def __init__(self, action: str, entry: str, old_index: Optional[int] = None,
+                 new_index: Optional[int] = None):
+        """
+        Initialize the edit.
+
+        Args:
+            action: 'insert', 'delete' or 'move'
+            entry: The entry that is inserted, deleted or moved
+            old_index: Position in the old list ('delete' and 'move')
+            new_index: Position in the new list ('insert' and 'move')
+        """
+        self.action = action
+        self.entry = entry
+        self.old_index = old_index
+        self.new_index = new_index
+
+    def describe(self, scope: str) -> str:
+        """
+        Format the edit as one line, with positions counted from 1.
+
+        Args:
+            scope: 'user' or 'system'
+
+        Returns:
+            The formatted edit
+        """
+        if self.action == 'insert':
+            return f'+ [{scope.upper()}] #{self.new_index + 1} {self.entry}'
+        if self.action == 'delete':
+            return f'- [{scope.upper()}] #{self.old_index + 1} {self.entry}'
+        return f'~ [{scope.upper()}] #{self.old_index + 1} -> #{self.new_index + 1} {self.entry}'
+
+    def __repr__(self) -> str:
+        return f'Edit({self.action!r}, {self.entry!r}, {self.old_index!r}, {self.new_index!r})'
+
+
+class EditScript:
+    """
+    The edits turning the saved entries of each scope into the pending ones.
+    """
+    def __init__(self, edits: Dict[str, List[Edit]]):
+        """
+        Initialize the script.
+
+        Args:
+            edits: Mapping of 'user'/'system' to the edits of that scope
+        """
+        self.edits = edits
+
+    def is_empty(self) -> bool:
+        """Check whether no scope changes."""
+        return not any(self.edits.values())
+
+    def changed_scopes(self) -> List[str]:
+        """Get the scopes that change."""
+        return [scope for scope in SCOPES if self.edits.get(scope)]
+
+    def describe(self) -> str:
+        """Format the script as one line per edit, with a count per scope."""
+        if self.is_empty():
+            return 'No changes.'
+        lines = []
+        for scope in self.changed_scopes():
+            counts = collections.Counter(edit.action for edit in self.edits[scope])
+            lines.append(f'{scope.upper()}: {counts["insert"]} inserted, '
+                         f'{counts["delete"]} deleted, {counts["move"]} moved')
+            lines.extend(edit.describe(scope) for edit in self.edits[scope])
+        return '\n'.join(lines)
+
+
+def match_entries(old: Sequence[Hashable], new: Sequence[Hashable]) -> List[Tuple[int, int]]:
+    """
+    Find a longest common subsequence of two lists.
+
+    The common prefix and suffix are matched first. If every remaining common entry occurs once
+    in each list, as in a PATH without duplicates, the subsequence is found exactly as a longest
+    increasing subsequence in O(N log N). Otherwise Myers' O(ND) algorithm is used, whose cost
+    depends on the number of differences D; its trace takes O(D^2) memory and time, e.g. many
+    seconds for a shuffled list of thousands of entries. Beyond MAX_EDIT_DISTANCE differences it
+    falls back to matching only the entries that occur once in each list, which is fast but may
+    match fewer entries than possible.
+
+    Args:
+        old: The old list
+        new: The new list
+
+    Returns:
+        Matched (old index, new index) pairs in increasing order
+    """
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    # Entries found in only one list never match, and dropping them keeps D small when most
+    # entries were replaced; a_index and b_index map back to positions in old and new
+    common = set(old[start:old_end]) & set(new[start:new_end])
+    a_index = [index for index in range(start, old_end) if old[index] in common]
+    b_index = [index for index in range(start, new_end) if new[index] in common]
+    a = [old[index] for index in a_index]
+    b = [new[index] for index in b_index]
+    n, m = len(a), len(b)
+    if len(set(a)) == n and len(set(b)) == m:
+        middle = [(a_index[x], b_index[y]) for x, y in _match_unique(a, b)]
+    else:
+        middle = [(a_index[x], b_index[y]) for x, y in _match_myers(a, b)]
+
+    suffix = [(old_end + offset, new_end + offset) for offset in range(len(old) - old_end)]
+    return [(index, index) for index in range(start)] + middle + suffix
+
+
+def _match_myers(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Tuple[int, int]]:
+    """Find a longest common subsequence with Myers' algorithm, or fall back to _match_unique()."""
+    n, m = len(a), len(b)
+    middle: List[Tuple[int, int]] = []
+    if n and m:
+        # furthest[k] is the furthest x reached on diagonal k = x - y; trace keeps one copy per D
+        furthest = {1: 0}
+        trace = []
+        x = y = 0
+        for d in range(n + m + 1):
+            if d > MAX_EDIT_DISTANCE:
+                return _match_unique(a, b)
+            trace.append(dict(furthest))
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and furthest[k - 1] < furthest[k + 1]):
+                    x = furthest[k + 1]
+                else:
+                    x = furthest[k - 1] + 1
+                y = x - k
+                while x < n and y < m and a[x] == b[y]:
+                    x += 1
+                    y += 1
+                furthest[k] = x
+                if x >= n and y >= m:
+                    break
+            if x >= n and y >= m:
+                break
+
+        # Walk the trace back from the end, collecting the diagonal (matching) steps
+        x, y = n, m
+        for d in range(len(trace) - 1, -1, -1):
+            furthest = trace[d]
+            k = x - y
+            if k == -d or (k != d and furthest[k - 1] < furthest[k + 1]):
+                previous_k = k + 1
+            else:
+                previous_k = k - 1
+            previous_x = furthest[previous_k]
+            previous_y = previous_x - previous_k
+            while x > previous_x and y > previous_y:
+                x -= 1
+                y -= 1
+                middle.append((x, y))
+            x, y = previous_x, previous_y
+        middle.reverse()
+    return middle
+
+
+def _match_unique(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Tuple[int, int]]:
+    """
+    Match the entries occurring once in each list along a longest increasing subsequence.
+
+    This is a longest common subsequence if every common entry occurs once in each list.
+    """
+    counts_a = collections.Counter(a)
+    counts_b = collections.Counter(b)
+    positions = {entry: y for y, entry in enumerate(b) if counts_b[entry] == 1}
+    pairs = [(x, positions[entry]) for x, entry in enumerate(a)
+             if counts_a[entry] == 1 and entry in positions]
+
+    # Patience sorting: tails[i] is the pair ending the best increasing run of length i + 1 so far
+    tails: List[int] = []
+    tail_pairs: List[int] = []
+    previous: List[int] = []
+    for index, (_, y) in enumerate(pairs):
+        length = bisect.bisect_left(tails, y)
+        if length == len(tails):
+            tails.append(y)
+            tail_pairs.append(index)
+        else:
+            tails[length] = y
+            tail_pairs[length] = index
+        previous.append(tail_pairs[length - 1] if length else -1)
+
+    matches = []
+    index = tail_pairs[-1] if tail_pairs else -1
+    while index >= 0:
+        matches.append(pairs[index])
+        index = previous[index]
+    matches.reverse()
+    return matches
+
+
+def diff_entries(old: Sequence[str], new: Sequence[str]) -> List[Edit]:
+    """
+    Compute a minimal edit script between two entry lists.
+
+    Entries outside the longest common subsequence are deleted or inserted; an entry that is
+    both deleted and inserted is reported as one move instead.
+
+    Args:
+        old: The saved entries
+        new: The pending entries
+
+    Returns:
+        Deletions in old order, then moves and insertions in new order
+    """
+    matches = match_entries(old, new)
+    matched_old = {old_index for old_index, _ in matches}
+    matched_new = {new_index for _, new_index in matches}
+
+    inserted: Dict[str, collections.deque] = {}
+    for new_index, entry in enumerate(new):
+        if new_index not in matched_new:
+            inserted.setdefault(entry, collections.deque()).append(new_index)
+
+    deletes: List[Edit] = []
+    moves: List[Edit] = []
+    moved_to = set()
+    for old_index, entry in enumerate(old):
+        if old_index in matched_old:
+            continue
+        if inserted.get(entry):
+            new_index = inserted[entry].popleft()
+            moves.append(Edit('move', entry, old_index, new_index))
+            moved_to.add(new_index)
+        else:
+            deletes.append(Edit('delete', entry, old_index))
+
+    inserts = [Edit('insert', entry, new_index=new_index) for new_index, entry in enumerate(new)
+               if new_index not in matched_new and new_index not in moved_to]
+    return deletes + sorted(moves + inserts, key=lambda edit: edit.new_index)
+
+
+def diff_scopes(old: Dict[str, Sequence[str]], new: Dict[str, Sequence[str]]) -> EditScript:
+    """
+    Compute the edit script of every scope present in new.
+
+    Args:
+        old: Mapping of 'user'/'system' to the saved entries
+        new: Mapping of 'user'/'system' to the pending entries; missing scopes are not compared
+
+    Returns:
+        The edit script
+    """
+    return EditScript({scope: diff_entries(list(old.get(scope, [])), list(new[scope]))
+                       for scope in SCOPES if scope in new})
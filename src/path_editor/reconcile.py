@@ -0,0 +1,250 @@
+import argparse
+import fnmatch
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+from model import PathModel
+
+SCOPES = ('user', 'system')
+
+
+class DesiredState:
+    """
+    Declarative description of the PATH a machine should have.
+
+    A desired state consists of required entries (each kept in its scope, and inserted at the
+    start or end of that scope if it is missing; entries already present are not moved), forbidden
+    glob patterns, and ordering constraints of the form "entry A must come before entry B" within
+    a scope.
+    """
+    def __init__(self, required: List[Tuple[str, str, str]] = None, forbidden: List[str] = None,
+                 order: List[Tuple[str, str]] = None):
+        """
+        Initialize the desired state.
+
+        Args:
+            required: List of (path, scope, position) with position 'start' or 'end', where a
+                missing entry is inserted
+            forbidden: List of glob patterns that no entry may match
+            order: List of (before, after) path pairs
+        """
+        self.required = required or []
+        self.forbidden = forbidden or []
+        self.order = order or []
+
+        for path, scope, position in self.required:
+            if scope not in SCOPES:
+                raise ValueError(f'Invalid scope {scope!r} for required entry {path!r}')
+            if position not in ('start', 'end'):
+                raise ValueError(f'Invalid position {position!r} for required entry {path!r}')
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DesiredState':
+        """
+        Create a desired state from its JSON representation.
+
+        Args:
+            data: Dictionary with optional 'required', 'forbidden' and 'order' keys
+
+        Returns:
+            The parsed desired state
+        """
+        required = []
+        for item in data.get('required', []):
+            if isinstance(item, str):
+                item = {'path': item}
+            required.append((item['path'], item.get('scope', 'user'), item.get('position', 'end')))
+        order = [tuple(pair) for pair in data.get('order', [])]
+        if any(len(pair) != 2 for pair in order):
+            raise ValueError('Ordering constraints must be [before, after] pairs')
+        return cls(required, list(data.get('forbidden', [])), order)
+
+    @classmethod
+    def load(cls, filename: str) -> 'DesiredState':
+        """
+        Load a desired state from a JSON file.
+
+        Args:
+            filename: Path of the JSON file
+
+        Returns:
+            The parsed desired state
+        """
+        with open(filename, encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+
+class ReconcilePlan:
+    """
+    The changes needed to bring both PATH scopes to a desired state.
+    """
+    def __init__(self, user_paths: List[str], system_paths: List[str],
+                 changes: List[Tuple[str, str, str]]):
+        """
+        Initialize the plan.
+
+        Args:
+            user_paths: Target USER path entries
+            system_paths: Target SYSTEM path entries
+            changes: List of (action, scope, entry) with action 'add', 'remove' or 'move'
+        """
+        self.user_paths = user_paths
+        self.system_paths = system_paths
+        self.changes = changes
+
+    def is_empty(self) -> bool:
+        """Check whether the PATH already conforms to the desired state."""
+        return not self.changes
+
+    def changed_scopes(self) -> List[str]:
+        """Get the scopes that have to be written."""
+        return [scope for scope in SCOPES if any(change[1] == scope for change in self.changes)]
+
+    def describe(self) -> str:
+        """Format the plan as one line per change."""
+        if not self.changes:
+            return 'PATH already conforms to the desired state.'
+        symbols = {'add': '+', 'remove': '-', 'move': '~'}
+        return '\n'.join(f'{symbols[action]} [{scope.upper()}] {entry}'
+                         for action, scope, entry in self.changes)
+
+
+def plan(model: PathModel, state: DesiredState) -> ReconcilePlan:
+    """
+    Compute the minimal changes that bring the model to a desired state.
+
+    Only entries that violate the state are touched: forbidden entries and required entries in
+    the wrong scope are removed, missing required entries are added once, and entries that break
+    an ordering constraint are moved directly in front of the entry they must precede.
+    Running the plan against a conforming model yields no changes.
+
+    Args:
+        model: The PathModel holding the current entries
+        state: The desired state
+
+    Returns:
+        The reconcile plan
+    """
+    targets = {'user': list(model.user_paths), 'system': list(model.system_paths)}
+    changes: List[Tuple[str, str, str]] = []
+
+    forbidden = [model.normalize_path(pattern) for pattern in state.forbidden]
+    required = [(model.normalize_path(path), scope, position)
+                for path, scope, position in state.required]
+    required_scope = {path: scope for path, scope, _ in required}
+    for path, _, _ in required:
+        if any(fnmatch.fnmatchcase(path, pattern) for pattern in forbidden):
+            raise ValueError(f'Required entry {path!r} matches a forbidden pattern')
+
+    # Drop forbidden entries and required entries that live in the other scope
+    for scope in SCOPES:
+        kept = []
+        for entry in targets[scope]:
+            wrong_scope = required_scope.get(entry, scope) != scope
+            if wrong_scope or any(fnmatch.fnmatchcase(entry, pattern) for pattern in forbidden):
+                changes.append(('remove', scope, entry))
+            else:
+                kept.append(entry)
+        targets[scope] = kept
+
+    # Add missing required entries
+    for path, scope, position in required:
+        if path in targets[scope]:
+            continue
+        if position == 'start':
+            targets[scope].insert(0, path)
+        else:
+            targets[scope].append(path)
+        changes.append(('add', scope, path))
+
+    # Satisfy ordering constraints; each pass moves at most one entry per violated constraint
+    order = [(model.normalize_path(before), model.normalize_path(after))
+             for before, after in state.order]
+    for scope in SCOPES:
+        paths = targets[scope]
+        for _ in range((len(order) + 1) ** 2):
+            moved = False
+            for before, after in order:
+                if before not in paths or after not in paths:
+                    continue
+                before_index = paths.index(before)
+                after_index = paths.index(after)
+                if before_index > after_index:
+                    paths.insert(after_index, paths.pop(before_index))
+                    changes.append(('move', scope, before))
+                    moved = True
+            if not moved:
+                break
+        else:
+            raise ValueError(f'Ordering constraints for the {scope.upper()} path are contradictory')
+
+    return ReconcilePlan(targets['user'], targets['system'], changes)
+
+
+def apply(model: PathModel, reconcile_plan: ReconcilePlan, write: bool = True) -> bool:
+    """
+    Apply a reconcile plan to the model and optionally write it to the OS.
+
+    Only scopes with changes are written, so applying an empty plan writes nothing.
+
+    Args:
+        model: The PathModel to update
+        reconcile_plan: The plan returned by plan()
+        write: Whether to write the changed scopes to the OS
+
+    Returns:
+        True if successful, False if admin privileges are required for the SYSTEM path
+    """
+    scopes = reconcile_plan.changed_scopes()
+    if not scopes:
+        return True
+
+    model.user_paths = reconcile_plan.user_paths
+    model.system_paths = reconcile_plan.system_paths
+
+    if not write:
+        return True
+    return model.set_path_to_os(
+        user_path=model.user_paths if 'user' in scopes else None,
+        system_path=model.system_paths if 'system' in scopes else None
+    )
+
+
+def reconcile(model: PathModel, state: DesiredState, write: bool = True) -> ReconcilePlan:
+    """
+    Bring the model (and, if requested, the OS) to a desired state.
+
+    Args:
+        model: The PathModel to update
+        state: The desired state
+        write: Whether to write the changed scopes to the OS
+
+    Returns:
+        The plan that was applied
+    """
+    reconcile_plan = plan(model, state)
+    apply(model, reconcile_plan, write)
+    return reconcile_plan
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Bring the PATH to the desired state described in a JSON file.')
+    parser.add_argument('state', help='JSON file describing the desired state')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print the minimal edit script of each changed scope instead of '
+                             'writing it')
+    args = parser.parse_args()
+
+    model = PathModel(debug=args.dry_run)
+    reconcile_plan = plan(model, DesiredState.load(args.state))
+    if reconcile_plan.is_empty():
+        print(reconcile_plan.describe())
+        return
+    if not apply(model, reconcile_plan):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import collections
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+
+class PathIndex:
+    """
+    Search index over the canonical form of PATH entries.
+
+    Entries are keyed by an opaque item ID (the Treeview row). A query is split into
+    whitespace-separated tokens which must all occur in an entry; a plain query is therefore a
+    substring search. When a query extends the previous one, only the previous matches are
+    searched again, so typing narrows the result set incrementally.
+    """
+    STATES = ('dead', 'empty', 'duplicate', 'alias', 'sys32')
+
+    def __init__(self):
+        # Item ID -> canonical entry, and item ID -> probe states
+        self.entries: Dict[str, str] = {}
+        self.states: Dict[str, FrozenSet[str]] = {}
+        self._counts: collections.Counter = collections.Counter()
+        self._duplicates: Optional[Set[str]] = None
+        # Items pointing to the same directory as a differently spelled item, set from outside
+        self._aliases: Set[str] = set()
+        # (query, state) of the last search and its matches, reused while the user keeps typing
+        self._last_search: Optional[Tuple[str, Optional[str]]] = None
+        self._last_matches: Dict[str, str] = {}
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, item: str, entry: str, states: Iterable[str]) -> None:
+        """
+        Add or replace an entry.
+
+        Args:
+            item: Item ID of the entry
+            entry: The path entry
+            states: Probe states of the entry, e.g. 'dead', 'empty' or 'sys32'
+        """
+        if item in self.entries:
+            self.remove(item)
+        canonical = self.canonicalize(entry)
+        self.entries[item] = canonical
+        self.states[item] = frozenset(states)
+        self._counts[canonical] += 1
+        self._invalidate()
+
+    def remove(self, item: str) -> None:
+        """
+        Remove an entry.
+
+        Args:
+            item: Item ID of the entry
+        """
+        canonical = self.entries.pop(item)
+        del self.states[item]
+        self._counts[canonical] -= 1
+        if not self._counts[canonical]:
+            del self._counts[canonical]
+        self._invalidate()
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.entries.clear()
+        self.states.clear()
+        self._counts.clear()
+        self._aliases = set()
+        self._invalidate()
+
+    def set_aliases(self, items: Iterable[str]) -> None:
+        """
+        Set the items matched by the 'alias' state.
+
+        Whether two entries point to the same directory is a filesystem property, so it is
+        determined by the caller rather than from the entry strings.
+
+        Args:
+            items: Item IDs of all entries in groups of differently spelled, identical directories
+        """
+        self._aliases = set(items)
+        self._invalidate()
+
+    @staticmethod
+    def canonicalize(text: str) -> str:
+        """
+        Bring an entry or a query into the form entries are matched in.
+
+        Args:
+            text: The entry or query
+
+        Returns:
+            The text lowercased, with backslashes turned into forward slashes like normalized
+            entries
+        """
+        return str(text).replace('\\', '/').lower()
+
+    def search(self, query: str, state: Optional[str] = None) -> Set[str]:
+        """
+        Find the entries matching a query and an optional state.
+
+        Args:
+            query: Whitespace-separated tokens that must all occur in an entry; either slash and
+                any case match
+            state: One of STATES, or None to match any state
+
+        Returns:
+            Set of matching item IDs
+        """
+        query = self.canonicalize(query)
+        tokens = query.split()
+
+        entries = self.entries
+
+        # Extending the previous query can only remove matches, so search within them
+        if (self._last_search is not None and self._last_search[1] == state
+                and query.startswith(self._last_search[0])):
+            candidates = self._last_matches
+        elif state == 'duplicate':
+            duplicates = self._get_duplicates()
+            candidates = {item: canonical for item, canonical in entries.items()
+                          if canonical in duplicates}
+        elif state == 'alias':
+            candidates = {item: canonical for item, canonical in entries.items()
+                          if item in self._aliases}
+        elif state is not None:
+            candidates = {item: entries[item] for item, states in self.states.items()
+                          if state in states}
+        else:
+            candidates = entries
+
+        for token in tokens:
+            candidates = {item: canonical for item, canonical in candidates.items()
+                          if token in canonical}
+
+        self._last_search = (query, state)
+        self._last_matches = candidates
+        return set(candidates)
+
+    def _get_duplicates(self) -> Set[str]:
+        if self._duplicates is None:
+            self._duplicates = {canonical for canonical, count in self._counts.items() if count > 1}
+        return self._duplicates
+
+    def _invalidate(self) -> None:
+        self._duplicates = None
+        self._last_search = None
@@ -0,0 +1,222 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from model import PathModel
+
+# Values longer than this are truncated by the Environment Variables dialog and by setx
+WARN_VALUE_LENGTH = 2047
+
+# Variables that may replace a prefix of an entry, per scope. SYSTEM values are expanded without
+# a user profile, so they may only reference machine-wide variables
+SYSTEM_PREFIX_VARIABLES = ('SystemRoot', 'ProgramFiles', 'ProgramFiles(x86)', 'ProgramData',
+                           'CommonProgramFiles', 'CommonProgramFiles(x86)')
+USER_PREFIX_VARIABLES = SYSTEM_PREFIX_VARIABLES + ('LOCALAPPDATA', 'APPDATA', 'USERPROFILE')
+
+
+def get_prefixes(model: PathModel, scope: str) -> List[Tuple[str, str]]:
+    """
+    Get the directory prefixes that can be written as a variable reference in a scope.
+
+    Args:
+        model: The PathModel whose environment defines the variables
+        scope: 'user' or 'system'
+
+    Returns:
+        List of (normalized directory, '%name%'), longest directory first
+    """
+    prefixes = []
+    for name in USER_PREFIX_VARIABLES if scope == 'user' else SYSTEM_PREFIX_VARIABLES:
+        value = model.get_variable(name)
+        if not value:
+            continue
+        directory = model.normalize_path(value).rstrip('/')
+        reference = f'%{name.lower()}%'
+        # Entries are saved lowercased, so the reference must expand in that spelling
+        if len(reference) < len(directory) and model.expand_path(reference) == directory:
+            prefixes.append((directory, reference))
+    prefixes.sort(key=lambda prefix: len(prefix[0]), reverse=True)
+    return prefixes
+
+
+def compact_entry(entry: str, prefixes: List[Tuple[str, str]]) -> str:
+    """
+    Replace the longest known directory prefix of an entry with its variable reference.
+
+    Entries that already reference a variable are left alone. The compacted entry expands to the
+    same directory as the original one.
+
+    Args:
+        entry: Normalized entry
+        prefixes: Prefixes as returned by get_prefixes()
+
+    Returns:
+        The compacted entry, or the entry itself if no prefix applies
+    """
+    if '%' in entry:
+        return entry
+    for directory, reference in prefixes:
+        if entry == directory or entry.startswith(directory + '/'):
+            return reference + entry[len(directory):]
+    return entry
+
+
+def compact_entries(model: PathModel, entries: Iterable[str], scope: str) -> List[str]:
+    """
+    Compact all entries of a scope.
+
+    Args:
+        model: The PathModel whose environment defines the variables
+        entries: The entries
+        scope: 'user' or 'system'
+
+    Returns:
+        The normalized, compacted entries
+    """
+    prefixes = get_prefixes(model, scope)
+    return [compact_entry(model.normalize_path(entry), prefixes) for entry in entries]
+
+
+def serialize(model: PathModel, entries: Iterable[str], scope: str, compact: bool = False) -> str:
+    """
+    Build the value written to the registry for a scope.
+
+    Args:
+        model: The PathModel used to normalize and compact the entries
+        entries: The entries
+        scope: 'user' or 'system'
+        compact: Whether to replace known prefixes with variable references
+
+    Returns:
+        The ';'-separated value
+    """
+    if compact:
+        return ';'.join(compact_entries(model, entries, scope))
+    return ';'.join(model.normalize_path(entry) for entry in entries)
+
+
+def get_value_bytes(value: str) -> int:
+    """
+    Get the size of a value as stored in the registry and in a process environment block.
+
+    Args:
+        value: The value
+
+    Returns:
+        Bytes taken by the UTF-16 value and its terminating null
+    """
+    return len(value.encode('utf-16-le')) + 2
+
+
+class LengthReport:
+    """
+    Lengths of the values a save would write, with and without prefix compaction.
+    """
+    def __init__(self, lengths: Dict[str, int], compacted_lengths: Dict[str, int],
+                 saved_bytes: Dict[str, int], expanded_length: int,
+                 max_length: int = PathModel.MAX_VALUE_LENGTH):
+        """
+        Initialize the report.
+
+        Args:
+            lengths: Length of the value of each written scope as it is
+            compacted_lengths: Length of the value of each written scope after compaction
+            saved_bytes: Registry bytes saved by compaction, per written scope
+            expanded_length: Length of the PATH a new process sees (SYSTEM, then USER, expanded)
+            max_length: Longest value Windows accepts
+        """
+        self.lengths = lengths
+        self.compacted_lengths = compacted_lengths
+        self.saved_bytes = saved_bytes
+        self.expanded_length = expanded_length
+        self.max_length = max_length
+
+    def get_errors(self, compact: bool = False) -> List[str]:
+        """
+        Get the problems that prevent saving.
+
+        Args:
+            compact: Whether the values are compacted before saving
+
+        Returns:
+            One message per scope whose value is longer than Windows accepts
+        """
+        lengths = self.compacted_lengths if compact else self.lengths
+        return [f'{scope.upper()} value is {length} characters long; Windows accepts at most '
+                f'{self.max_length}.'
+                for scope, length in lengths.items() if length > self.max_length]
+
+    def get_warnings(self, compact: bool = False) -> List[str]:
+        """
+        Get the problems that allow saving but break some tools or processes.
+
+        Args:
+            compact: Whether the values are compacted before saving
+
+        Returns:
+            The warning messages
+        """
+        lengths = self.compacted_lengths if compact else self.lengths
+        warnings = [f'{scope.upper()} value is {length} characters long; the Environment '
+                    f'Variables dialog and setx truncate values longer than {WARN_VALUE_LENGTH}.'
+                    for scope, length in lengths.items()
+                    if WARN_VALUE_LENGTH < length <= self.max_length]
+        if self.expanded_length > self.max_length:
+            # Compaction cannot help here: processes see the expanded value
+            warnings.append(f'The expanded PATH is {self.expanded_length} characters long; new '
+                            f'processes only see the first {self.max_length}.')
+        return warnings
+
+    def can_compact(self) -> bool:
+        """Check if compaction shortens any written value."""
+        return any(self.saved_bytes.values())
+
+    def describe(self) -> str:
+        """
+        Format the lengths and savings per scope.
+
+        Returns:
+            The formatted report
+        """
+        lines = []
+        for scope, length in self.lengths.items():
+            lines.append(f'{scope.upper()}: {length} characters, '
+                         f'{self.compacted_lengths[scope]} after compaction '
+                         f'({self.saved_bytes[scope]} bytes saved)')
+        lines.append(f'Expanded PATH seen by new processes: {self.expanded_length} characters')
+        return '\n'.join(lines)
+
+
+def check_lengths(model: PathModel, user_path: Optional[Iterable[str]] = None,
+                  system_path: Optional[Iterable[str]] = None) -> LengthReport:
+    """
+    Measure the values a save of the given scopes would write.
+
+    Args:
+        model: The PathModel holding the entries of the scopes that are not saved
+        user_path: USER entries to save, or None if the USER path is not saved
+        system_path: SYSTEM entries to save, or None if the SYSTEM path is not saved
+
+    Returns:
+        The report
+    """
+    written = {'user': user_path, 'system': system_path}
+    lengths, compacted_lengths, saved_bytes = {}, {}, {}
+    for scope, entries in written.items():
+        if entries is None:
+            continue
+        # Materialized once, so an iterator is still complete for the combined value below
+        entries = written[scope] = list(entries)
+        value = serialize(model, entries, scope)
+        compacted = serialize(model, entries, scope, compact=True)
+        lengths[scope] = len(value)
+        compacted_lengths[scope] = len(compacted)
+        saved_bytes[scope] = get_value_bytes(value) - get_value_bytes(compacted)
+
+    # The Path of a new process is the expanded SYSTEM value followed by the expanded USER value
+    combined = [entry for scope in ('system', 'user')
+                for entry in (written[scope] if written[scope] is not None
+                              else model.get_list('Path', scope))
+                if entry]
+    expanded_length = len(';'.join(model.expand_path(model.normalize_path(entry))
+                                   for entry in combined))
+    return LengthReport(lengths, compacted_lengths, saved_bytes, expanded_length,
+                        model.MAX_VALUE_LENGTH)
@@ -0,0 +1,462 @@
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socketserver
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from model import PathEntry, PathModel
+
+SCOPES = ('user', 'system')
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVICE_ERROR = -32000
+UNAUTHORIZED = -32001
+
+
+class ServiceError(Exception):
+    """
+    Error reported to the client as a JSON-RPC error response.
+    """
+    def __init__(self, message: str, code: int = SERVICE_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+class PathService:
+    """
+    Answers PATH queries and edits from a long-lived PathModel.
+
+    Probe results stay cached on the model's entries, and the executables of every directory
+    are cached together with the directory's modification time, so a lookup costs one stat per
+    directory instead of a scan. All calls are serialized by one lock; an edit request is
+    applied as a whole and written with a single write per changed scope.
+    """
+    def __init__(self, model: PathModel, refresh_interval: Optional[float] = None):
+        """
+        Initialize the service.
+
+        Args:
+            model: The PathModel to serve
+            refresh_interval: Seconds between checks for PATH changes made outside the service,
+                or None to only reload on request
+        """
+        self.model = model
+        self.refresh_interval = refresh_interval
+        self.lock = threading.RLock()
+        # Expanded directory -> (modification time, lowercase executable names)
+        self._executables: Dict[str, Tuple[int, Set[str]]] = {}
+        self._stop = threading.Event()
+        self.methods: Dict[str, Callable[..., Any]] = {
+            'list': self.list_paths,
+            'exists': self.exists,
+            'which': self.which,
+            'stats': self.stats,
+            'edit': self.edit,
+            'reload': self.reload
+        }
+
+    def call(self, method: str, params: Any = None) -> Any:
+        """
+        Dispatch a call to one of the service methods.
+
+        Args:
+            method: Name of the method
+            params: List of positional or dictionary of keyword arguments
+
+        Returns:
+            The method's result
+        """
+        function = self.methods.get(method)
+        if function is None:
+            raise ServiceError(f'Unknown method {method!r}', METHOD_NOT_FOUND)
+        args, kwargs = ([], params or {}) if isinstance(params, dict) else (params or [], {})
+        with self.lock:
+            try:
+                return function(*args, **kwargs)
+            except TypeError as e:
+                raise ServiceError(str(e), INVALID_PARAMS)
+
+    def handle_request(self, line: str) -> Optional[Dict[str, Any]]:
+        """
+        Handle one JSON-RPC request.
+
+        Args:
+            line: The JSON-encoded request
+
+        Returns:
+            The response, or None for a notification (a request without an id)
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': str(e)}}
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return {'jsonrpc': '2.0', 'id': None,
+                    'error': {'code': INVALID_REQUEST, 'message': 'Invalid request'}}
+
+        try:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'result': self.call(request['method'], request.get('params'))}
+        except ServiceError as e:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            # Any other failure (OS, registry, elevated helper) still gets an error response, so the
+            # client is not left waiting on a dropped connection
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': SERVICE_ERROR, 'message': f'{type(e).__name__}: {e}'}}
+        return response if 'id' in request else None
+
+    def list_paths(self, variable: str = 'Path') -> Dict[str, List[str]]:
+        """
+        Get the current entries.
+
+        Args:
+            variable: Name of the loaded list variable, e.g. 'Path' or 'PSModulePath'
+
+        Returns:
+            Dictionary with 'user' and 'system' entry lists
+        """
+        try:
+            return {scope: list(self.model.get_list(variable, scope)) for scope in SCOPES}
+        except KeyError as e:
+            raise ServiceError(str(e), INVALID_PARAMS)
+
+    def exists(self, path: str) -> Dict[str, Any]:
+        """
+        Check an entry, reusing the probe results of an entry that is already loaded.
+
+        Paths that are not loaded are probed on every call.
+
+        Args:
+            path: The entry to check
+
+        Returns:
+            Dictionary with 'exists', 'filecount', 'filecount_complete' (False if the count is a
+            lower bound) and the scopes the entry is listed in
+        """
+        key = self.model.normalize_path(path)
+        loaded = [entry for scope in SCOPES for entry in self.model.entries[scope]
+                  if entry.key == key]
+        scopes = [scope for scope in SCOPES if any(entry.scope == scope for entry in loaded)]
+        if loaded:
+            entry = loaded[0]
+            exists, filecount = self.model.probe_entry(entry)
+        else:
+            # Probed on every call and not registered with the model, so queries for arbitrary
+            # paths neither grow its caches nor leave results that go stale
+            entry = PathEntry(key, key, 'user')
+            exists, filecount = self.model.probe_entry(entry, shared=False)
+        return {'exists': exists, 'filecount': filecount,
+                'filecount_complete': entry.filecount_complete, 'scopes': scopes}
+
+    def which(self, command: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the entry that wins the lookup of a command, as cmd.exe would resolve it.
+
+        Args:
+            command: Command name with or without extension, e.g. 'python' or 'python.exe'
+
+        Returns:
+            Dictionary with the winning 'directory', its 'scope' and 'index', and the matched
+            'file', or None if no entry provides the command
+        """
+        command = command.lower()
+        pathext = self.model.get_pathext()
+        if command.endswith(tuple(pathext)):
+            names = [command]
+        else:
+            names = [command + ext for ext in pathext]
+
+        for scope in ('system', 'user'):
+            for index, entry in enumerate(self.model.entries[scope]):
+                if not entry.raw:
+                    continue
+                executables = self._get_executables(entry.raw)
+                for name in names:
+                    if name in executables:
+                        return {'directory': entry.raw, 'scope': scope, 'index': index,
+                                'file': name}
+        return None
+
+    def stats(self, variable: str = 'Path') -> Dict[str, int]:
+        """
+        Get the statistics shown in the editor.
+
+        Args:
+            variable: Name of the loaded list variable, e.g. 'Path' or 'PSModulePath'
+
+        Returns:
+            Dictionary with entry counts, duplicate counts, dead entries and lengths
+        """
+        try:
+            return self.model.get_variable_statistics(variable)
+        except KeyError as e:
+            raise ServiceError(str(e), INVALID_PARAMS)
+
+    def edit(self, operations: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Apply a list of edits and write each changed scope once.
+
+        Supported operations are {'op': 'add', 'path', 'scope', 'index'?},
+        {'op': 'remove', 'path', 'scope'?} (both scopes if omitted) and
+        {'op': 'move', 'path', 'scope', 'index'}. If any operation is invalid or a write is
+        refused or fails, no change is kept: a USER value written before the SYSTEM write failed
+        is written back.
+
+        Args:
+            operations: The edits in the order they are applied
+
+        Returns:
+            The entries after the edits, as returned by list_paths()
+        """
+        before = {scope: list(self.model.entries[scope]) for scope in SCOPES}
+        loaded_user = list(self.model.loaded_user_paths)
+        try:
+            for operation in operations:
+                self._apply_operation(operation)
+            changed = [scope for scope in SCOPES if self.model.entries[scope] != before[scope]]
+            # Refuse before writing anything, instead of after the USER write
+            if 'system' in changed and not self.model.can_write_system():
+                raise ServiceError('Admin privileges required to set SYSTEM path')
+            if changed:
+                user_path = self.model.user_paths if 'user' in changed else None
+                system_path = self.model.system_paths if 'system' in changed else None
+                self.model.set_path_to_os(user_path=user_path, system_path=system_path)
+        except Exception as e:
+            for scope in SCOPES:
+                self.model.entries[scope] = before[scope]
+            if self.model.loaded_user_paths != loaded_user:
+                # The USER write went through before the SYSTEM write failed
+                try:
+                    self.model.set_path_to_os(user_path=loaded_user)
+                except Exception as restore_error:
+                    raise ServiceError(f'{type(e).__name__}: {e}; the USER path was written and '
+                                       f'could not be restored: {restore_error}')
+            if isinstance(e, ServiceError):
+                raise
+            if isinstance(e, (KeyError, IndexError, TypeError, ValueError)):
+                raise ServiceError(f'Invalid edit: {e!r}', INVALID_PARAMS)
+            raise
+        return self.list_paths()
+
+    def _apply_operation(self, operation: Dict[str, Any]) -> None:
+        op = operation['op']
+        key = self.model.normalize_path(operation['path'])
+        scope = operation.get('scope')
+        if scope is not None and scope not in SCOPES:
+            raise ValueError(f'Invalid scope {scope!r}')
+
+        if op == 'add':
+            entries = self.model.entries[scope or 'user']
+            index = operation.get('index', len(entries))
+            entries.insert(index, self.model.create_entry(key, scope or 'user'))
+        elif op == 'remove':
+            for name in [scope] if scope else SCOPES:
+                self.model.entries[name] = [entry for entry in self.model.entries[name]
+                                            if entry.key != key]
+        elif op == 'move':
+            entries = self.model.entries[scope]
+            position = [entry.key for entry in entries].index(key)
+            entries.insert(operation['index'], entries.pop(position))
+        else:
+            raise ValueError(f'Unknown operation {op!r}')
+
+    def reload(self) -> Dict[str, List[str]]:
+        """
+        Reload the PATH from the OS and drop all cached probe results.
+
+        Returns:
+            The reloaded entries, as returned by list_paths()
+        """
+        self.model.reload_path()
+        self.model.clear_expansion_cache()
+        self._executables.clear()
+        return self.list_paths()
+
+    def _get_executables(self, directory: str) -> Set[str]:
+        path = self.model.expand_path(directory)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except (OSError, ValueError):
+            self._executables.pop(path, None)
+            return set()
+
+        # Adding or removing a file updates the directory's modification time
+        cached = self._executables.get(path)
+        if cached is None or cached[0] != mtime:
+            # An unreadable directory answers no lookup
+            cached = (mtime, self.model.get_executables(directory) or set())
+            self._executables[path] = cached
+        return cached[1]
+
+    def start_refresh(self) -> None:
+        """Start watching for PATH changes made outside the service, if an interval is set."""
+        if self.refresh_interval is not None:
+            threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop watching for outside PATH changes."""
+        self._stop.set()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                user_paths, system_paths = self.model.get_path_from_os()
+                with self.lock:
+                    if (user_paths, system_paths) != (self.model.loaded_user_paths,
+                                                      self.model.loaded_system_paths):
+                        self.reload()
+            except Exception as e:
+                # A failed check (e.g. PowerShell not answering) is retried at the next interval
+                print(f'Checking for PATH changes failed: {type(e).__name__}: {e}')
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads newline-delimited JSON-RPC requests and writes one response line per request.
+
+    The first request of a connection must be {"method": "authenticate", "params": [token]}; any
+    other first line, such as the request line of an HTTP POST sent by a browser, closes the
+    connection.
+    """
+    def handle(self):
+        authenticated = False
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            if not authenticated:
+                authenticated, response = self.server.authenticate(line.decode('utf-8', 'replace'))
+                self._send(response)
+                if not authenticated:
+                    return
+                continue
+            try:
+                request = line.decode('utf-8')
+            except UnicodeDecodeError as e:
+                self._send({'jsonrpc': '2.0', 'id': None,
+                            'error': {'code': PARSE_ERROR, 'message': str(e)}})
+                continue
+            self._send(self.server.service.handle_request(request))
+
+    def _send(self, response: Optional[Dict[str, Any]]) -> None:
+        if response is not None:
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class PathServer(socketserver.ThreadingTCPServer):
+    """
+    Serves a PathService over a local TCP socket.
+
+    Only the loopback interface is bound, and every connection must first authenticate with a
+    random token (see write_token), so other users of the machine and web pages cannot call the
+    service.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service: PathService, port: int = 0, token: Optional[str] = None):
+        """
+        Initialize the server.
+
+        Args:
+            service: The service answering the requests
+            port: Port to listen on, or 0 to pick a free one (see server_address)
+            token: Secret clients authenticate with; a random one is created if omitted
+        """
+        self.service = service
+        self.token = token or secrets.token_hex(32)
+        super().__init__(('127.0.0.1', port), _RequestHandler)
+
+    def authenticate(self, line: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check the first request of a connection.
+
+        Args:
+            line: The JSON-encoded request
+
+        Returns:
+            Tuple of (whether the token matches, the response to send)
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if isinstance(request, dict) and request.get('method') == 'authenticate':
+            params = request.get('params')
+            if isinstance(params, dict):
+                token = params.get('token')
+            else:
+                token = params[0] if isinstance(params, list) and params else None
+            if isinstance(token, str) and hmac.compare_digest(token.encode('utf-8'),
+                                                              self.token.encode('utf-8')):
+                return True, {'jsonrpc': '2.0', 'id': request.get('id'), 'result': True}
+        request_id = request.get('id') if isinstance(request, dict) else None
+        return False, {'jsonrpc': '2.0', 'id': request_id,
+                       'error': {'code': UNAUTHORIZED,
+                                 'message': 'Authenticate with the service token first'}}
+
+
+def get_token_file() -> str:
+    """
+    Get the default location of the service token.
+
+    Returns:
+        A file in the user's profile, which only the user can read
+    """
+    return os.path.join(os.path.expanduser('~'), '.path-editor-service.token')
+
+
+def write_token(path: str, token: str) -> None:
+    """
+    Write the service token to a file only the current user can read.
+
+    Args:
+        path: The token file; an existing file is replaced
+        token: The token
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    # O_EXCL makes sure no other user pre-created the file with their own permissions
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, 'w') as file:
+        file.write(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve PATH queries and edits over local JSON-RPC.')
+    parser.add_argument('--port', type=int, default=8765, help='port on 127.0.0.1 to listen on')
+    parser.add_argument('--refresh', type=float, default=None,
+                        help='seconds between checks for PATH changes made outside the service')
+    parser.add_argument('--write', action='store_true',
+                        help='write edits to the OS instead of printing them')
+    parser.add_argument('--token-file', default=get_token_file(),
+                        help='file the authentication token is written to; deleted on exit')
+    args = parser.parse_args()
+
+    service = PathService(PathModel(debug=not args.write), refresh_interval=args.refresh)
+    with PathServer(service, args.port) as server:
+        write_token(args.token_file, server.token)
+        service.start_refresh()
+        host, port = server.server_address[:2]
+        print(f'Serving on {host}:{port}, token in {args.token_file}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.stop()
+            os.remove(args.token_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from model import PathModel
+
+# Export formats: ';'-separated text, one entry per line, JSON with both scopes, and a .reg file
+FORMATS = ('text', 'lines', 'json', 'reg')
+
+EXTENSIONS = {
+    '.json': 'json',
+    '.reg': 'reg',
+    '.txt': 'lines'
+}
+
+REGISTRY_KEYS = {
+    'user': 'HKEY_CURRENT_USER\\Environment',
+    'system': 'HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment'
+}
+
+# Size of the chunks text imports are read in
+CHUNK_SIZE = 64 * 1024
+
+
+def detect_format(filename: str) -> str:
+    """
+    Guess the format of a PATH file from its extension.
+
+    Args:
+        filename: Name of the file
+
+    Returns:
+        One of FORMATS; unknown extensions are treated as ';'-separated text
+    """
+    return EXTENSIONS.get(os.path.splitext(filename)[1].lower(), 'text')
+
+
+def iter_text_entries(file: TextIO) -> Iterator[str]:
+    """
+    Stream entries from ';'-separated or newline-separated text.
+
+    Both separators are accepted in the same file, since neither can occur inside an entry.
+
+    Args:
+        file: Open text file
+
+    Yields:
+        The stripped, non-empty entries in file order
+    """
+    remainder = ''
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parts = (remainder + chunk).replace('\r', '').replace('\n', ';').split(';')
+        remainder = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part.strip()
+    if remainder.strip():
+        yield remainder.strip()
+
+
+def iter_reg_entries(file: TextIO) -> Iterator[Tuple[str, str]]:
+    """
+    Stream Path entries from a .reg file, line by line.
+
+    Both the plain string form ("Path"="...") and the REG_EXPAND_SZ form ("Path"=hex(2):...)
+    are understood; values of other keys and variables are skipped.
+
+    Args:
+        file: Open .reg file
+
+    Yields:
+        Tuples of (scope, entry)
+    """
+    key_scopes = {key.lower(): scope for scope, key in REGISTRY_KEYS.items()}
+    scope = None
+    value = None
+    for line in file:
+        line = line.strip()
+        if value is not None:
+            # Continuation line of a hex(2) value
+            value += line.rstrip('\\')
+            if not line.endswith('\\'):
+                yield from _split_reg_value(scope, _decode_hex_value(value))
+                value = None
+            continue
+
+        if line.startswith('[') and line.endswith(']'):
+            scope = key_scopes.get(line[1:-1].lower())
+        elif scope is not None and line.lower().startswith('"path"='):
+            data = line[len('"path"='):]
+            if data.lower().startswith('hex(2):'):
+                value = data[len('hex(2):'):].rstrip('\\')
+                if not data.endswith('\\'):
+                    yield from _split_reg_value(scope, _decode_hex_value(value))
+                    value = None
+            elif data.startswith('"') and data.endswith('"'):
+                unescaped = data[1:-1].replace('\\\\', '\\').replace('\\"', '"')
+                yield from _split_reg_value(scope, unescaped)
+
+
+def _decode_hex_value(value: str) -> str:
+    # hex(2) data is the UTF-16LE value as comma-separated bytes
+    return bytes.fromhex(value.replace(',', '')).decode('utf-16-le')
+
+
+def _split_reg_value(scope: str, value: str) -> Iterator[Tuple[str, str]]:
+    for entry in value.rstrip('\0').split(';'):
+        if entry.strip():
+            yield scope, entry.strip()
+
+
+def read_entries(filename: str, default_scope: str,
+                 fmt: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the entries of a PATH file.
+
+    Args:
+        filename: Name of the file
+        default_scope: Scope ('user' or 'system') for formats that do not carry one
+        fmt: One of FORMATS, or None to detect it from the extension
+
+    Yields:
+        Tuples of (scope, entry)
+    """
+    fmt = fmt or detect_format(filename)
+    # .reg files exported by regedit are UTF-16; everything else is expected to be UTF-8
+    encoding = 'utf-16' if fmt == 'reg' and _has_utf16_bom(filename) else 'utf-8-sig'
+    with open(filename, encoding=encoding) as file:
+        if fmt == 'json':
+            data = json.load(file)
+            if isinstance(data, list):
+                data = {default_scope: data}
+            for scope, entries in _check_json_document(data).items():
+                for entry in entries:
+                    yield scope, entry
+        elif fmt == 'reg':
+            yield from iter_reg_entries(file)
+        else:
+            for entry in iter_text_entries(file):
+                yield default_scope, entry
+
+
+def _check_json_document(data) -> Dict[str, List[str]]:
+    """
+    Check that a JSON document maps scopes to lists of entry strings.
+
+    Args:
+        data: The parsed document
+
+    Returns:
+        The entries of each scope present in the document, USER first
+
+    Raises:
+        ValueError: If the document has another shape
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f'Expected a JSON object with "user" and "system" lists, or a list of '
+                         f'entries, got {type(data).__name__}')
+    scopes = {}
+    for scope in ('user', 'system'):
+        entries = data.get(scope, [])
+        if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+            raise ValueError(f'"{scope}" must be a list of strings')
+        scopes[scope] = entries
+    return scopes
+
+
+def _has_utf16_bom(filename: str) -> bool:
+    with open(filename, 'rb') as file:
+        return file.read(2) in (b'\xff\xfe', b'\xfe\xff')
+
+
+def plan_import(model: PathModel, entries: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Normalize imported entries and drop those already present, in a single pass.
+
+    Args:
+        model: The PathModel holding the existing entries
+        entries: Tuples of (scope, entry), e.g. from read_entries()
+
+    Returns:
+        Dictionary mapping 'user' and 'system' to the new entries in import order
+    """
+    seen = {'user': set(model.user_paths), 'system': set(model.system_paths)}
+    new_entries: Dict[str, List[str]] = {'user': [], 'system': []}
+    for scope, entry in entries:
+        if scope not in new_entries:
+            raise ValueError(f'Invalid scope {scope!r}')
+        entry = model.normalize_path(entry)
+        if entry and entry not in seen[scope]:
+            seen[scope].add(entry)
+            new_entries[scope].append(entry)
+    return new_entries
+
+
+def probe_entries(model: PathModel, entries: Iterable[str],
+                  max_workers: int = 8) -> Dict[str, Tuple[bool, int, bool]]:
+    """
+    Check existence and count files of many directories in parallel.
+
+    Files are counted within the model's file count budget, like PathModel.probe_entry().
+
+    Args:
+        model: The PathModel used for probing
+        entries: The entries to probe
+        max_workers: Maximum number of directories probed at the same time
+
+    Returns:
+        Dictionary mapping each entry to (exists, filecount, whether the count is complete)
+    """
+    def probe(entry: str) -> Tuple[bool, int, bool]:
+        if not model.path_exists(entry):
+            return False, 0, True
+        return (True, *model.count_files(entry, model.FILECOUNT_ENTRY_LIMIT,
+                                         model.FILECOUNT_TIME_LIMIT))
+
+    entries = list(dict.fromkeys(entries))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(entries, executor.map(probe, entries)))
+
+
+def export_paths(filename: str, user_paths: List[str], system_paths: List[str], scope: str = 'user',
+                 fmt: Optional[str] = None) -> None:
+    """
+    Write PATH entries to a file.
+
+    JSON and .reg files contain both scopes; the text formats contain only the given scope.
+    Entries are written with backslashes, as Windows stores them.
+
+    Args:
+        filename: Name of the file
+        user_paths: List of USER path entries
+        system_paths: List of SYSTEM path entries
+        scope: Scope written by the text formats
+        fmt: One of FORMATS, or None to detect it from the extension
+    """
+    fmt = fmt or detect_format(filename)
+    paths = {
+        'user': [path.replace('/', '\\') for path in user_paths if path],
+        'system': [path.replace('/', '\\') for path in system_paths if path]
+    }
+
+    if fmt == 'json':
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(paths, file, indent=2)
+    elif fmt == 'reg':
+        with open(filename, 'w', encoding='utf-16', newline='\r\n') as file:
+            file.write('Windows Registry Editor Version 5.00\n')
+            for path_type in ('user', 'system'):
+                file.write(f'\n[{REGISTRY_KEYS[path_type]}]\n')
+                file.write(f'"Path"={_format_reg_expand_sz(";".join(paths[path_type]))}\n')
+    else:
+        separator = '\n' if fmt == 'lines' else ';'
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(separator.join(paths[scope]))
+            if fmt == 'lines':
+                file.write('\n')
+
+
+def _format_reg_expand_sz(value: str) -> str:
+    data = (value + '\0').encode('utf-16-le').hex()
+    pairs = [data[i:i + 2] for i in range(0, len(data), 2)]
+    # regedit wraps hex values at roughly 80 characters per line
+    lines = [','.join(pairs[i:i + 25]) for i in range(0, len(pairs), 25)]
+    return 'hex(2):' + ',\\\n  '.join(lines)
@@ -1,6 +1,38 @@
+import itertools
+import time
 import tkinter as tk
-from tkinter import Tk, Label, Button, Frame, Text, StringVar, Scrollbar, Radiobutton, LEFT
-from tkinter import ttk, messagebox
+from tkinter import Tk, Label, Button, Entry, Frame, Menu, Text, StringVar, Scrollbar, Radiobutton
+from tkinter import Listbox, LEFT
+from tkinter import ttk, messagebox, filedialog, simpledialog
+
+from search import PathIndex
+
+# Filter choices shown next to the search box, mapped to PathIndex states
+FILTER_STATES = {
+    'All': None,
+    'Dead': 'dead',
+    'Empty': 'empty',
+    'Duplicate': 'duplicate',
+    'Same directory': 'alias',
+    'SYSTEM32': 'sys32'
+}
+
+# Tcl procedure inserting many rows in one call; rows is a list of {id path filecount tags}
+INSERT_ROWS_SCRIPT = '''{tree parent rows} {
+    foreach row $rows {
+        lassign $row id path filecount tags
+        $tree insert $parent end -id $id -values [list $path $filecount] -tags $tags
+    }
+}'''
+
+# File types offered when importing or exporting a PATH
+PATH_FILETYPES = [
+    ('JSON (USER and SYSTEM)', '*.json'),
+    ('Registry file (USER and SYSTEM)', '*.reg'),
+    ('One entry per line (selected section)', '*.txt'),
+    ('Semicolon-separated (selected section)', '*.path'),
+    ('All files', '*.*')
+]
 
 
 class PathView:
@@ -23,6 +55,13 @@ class PathView:
         self.total_entries_label = None
         self.total_length_label = None
 
+        # Search and filter state
+        self.filter_text = None
+        self.filter_state = None
+        self.path_index = PathIndex()
+        self._section_children = {}  # Header item -> all its rows while a filter is active
+        self._row_ids = itertools.count(1)  # IDs of rows inserted by insert_paths
+
         # Popup windows and their components
         self.add_popup = None
         self.add_text = None
@@ -34,6 +73,19 @@ class PathView:
         self.edit_error_label = None
         self.edit_path_type = None
 
+        self.history_popup = None
+        self.history_listbox = None
+        self.history_text = None
+        self.history_ids = []
+
+        self.binary_popup = None
+        self.review_popup = None
+
+        # Drag and drop state: the pressed row, the press position and whether the pointer moved
+        self._drag = None
+        self._drop_command = None
+        self._item_selected = None
+
     def setup_window(self):
         """Set up the main window properties."""
         self.root.title('AstralJaeger\'s path editor v2.0.0 - USER & SYSTEM Path Manager')
@@ -50,8 +102,23 @@ class PathView:
         """
         columns = ('path', 'filecount')
 
+        # Search box and state filter above the treeview
+        self.filter_text = StringVar()
+        self.filter_state = StringVar(value='All')
+
+        filter_entry = Entry(self.root, textvariable=self.filter_text)
+        filter_entry.place(relx=0.05, rely=0.045, relwidth=0.55, relheight=0.045)
+
+        filter_combobox = ttk.Combobox(self.root, textvariable=self.filter_state,
+                                       values=list(FILTER_STATES), state='readonly')
+        filter_combobox.place(relx=0.61, rely=0.045, relwidth=0.19, relheight=0.045)
+
+        self.filter_text.trace_add('write', lambda *args: self.apply_filter())
+        filter_combobox.bind('<<ComboboxSelected>>', lambda event: self.apply_filter())
+
         # Create treeview
-        self.treeview = ttk.Treeview(self.root, columns=columns, show='tree headings', selectmode='browse')
+        self.treeview = ttk.Treeview(self.root, columns=columns, show='tree headings',
+                                     selectmode='extended')
         self.treeview.heading('path', text='Path')
         self.treeview.heading('filecount', text='Filecount')
         self.treeview.column('#0', width=120)  # Width for the tree column
@@ -64,15 +131,33 @@ class PathView:
         self.treeview.tag_configure('user_path', foreground='blue')
         self.treeview.tag_configure('system_path', foreground='green')
 
-        self.treeview.place(relx=0.05, rely=0.05, relwidth=0.75, relheight=0.75)
+        self.treeview.place(relx=0.05, rely=0.1, relwidth=0.75, relheight=0.7)
 
         # Add scrollbar
         scrollbar = Scrollbar(self.root, orient=tk.VERTICAL, command=self.treeview.yview)
         self.treeview.configure(yscroll=scrollbar.set)
-        scrollbar.place(relx=0.8, rely=0.05, relwidth=0.025, relheight=0.75)
+        scrollbar.place(relx=0.8, rely=0.1, relwidth=0.025, relheight=0.7)
 
         # Bind selection event
         self.treeview.bind('<ButtonRelease-1>', item_selected_callback)
+        self._item_selected = item_selected_callback
+
+        # Drag and drop reordering of the selected rows
+        self.treeview.bind('<ButtonPress-1>', self._start_drag, add='+')
+        self.treeview.bind('<B1-Motion>', self._drag_motion, add='+')
+        self.treeview.bind('<ButtonRelease-1>', self._end_drag, add='+')
+
+        # Menu bar for file based operations, filled in by bind_commands
+        self.menubar = Menu(self.root)
+        self.file_menu = Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label='File', menu=self.file_menu)
+        self.analyze_menu = Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label='Analyze', menu=self.analyze_menu)
+        self.root.config(menu=self.menubar)
+
+        # Context menu with the bulk operations, filled in by bind_commands
+        self.context_menu = Menu(self.root, tearoff=0)
+        self.treeview.bind('<Button-3>', self._show_context_menu)
 
         # Statistics labels
         self.duplicates_label = Label(self.root, text='Duplicates: 0')
@@ -99,6 +184,9 @@ class PathView:
         remove_entry_btn = Button(self.root, text='Remove')
         remove_entry_btn.place(relx=0.85, rely=0.17, relwidth=0.125, relheight=0.05)
 
+        undo_btn = Button(self.root, text='Undo')
+        undo_btn.place(relx=0.85, rely=0.23, relwidth=0.125, relheight=0.05)
+
         # Entry movement buttons
         up_btn = Button(self.root, text='Up')
         up_btn.place(relx=0.85, rely=0.30, relwidth=0.125, relheight=0.05)
@@ -106,6 +194,9 @@ class PathView:
         down_btn = Button(self.root, text='Down')
         down_btn.place(relx=0.85, rely=0.36, relwidth=0.125, relheight=0.05)
 
+        reconcile_btn = Button(self.root, text='Reconcile')
+        reconcile_btn.place(relx=0.85, rely=0.42, relwidth=0.125, relheight=0.05)
+
         # Path management buttons
         reload_btn = Button(self.root, text='Reload')
         reload_btn.place(relx=0.85, rely=0.49, relwidth=0.125, relheight=0.05)
@@ -119,6 +210,9 @@ class PathView:
         save_both_btn = Button(self.root, text='Save Both')
         save_both_btn.place(relx=0.85, rely=0.67, relwidth=0.125, relheight=0.05)
 
+        history_btn = Button(self.root, text='History')
+        history_btn.place(relx=0.85, rely=0.73, relwidth=0.125, relheight=0.05)
+
         # Cleanup buttons
         remove_duplicates_btn = Button(self.root, text='RM Duplicate')
         remove_duplicates_btn.place(relx=0.85, rely=0.825, relwidth=0.125, relheight=0.05)
@@ -126,18 +220,25 @@ class PathView:
         remove_nonexistent_btn = Button(self.root, text='RM Dead')
         remove_nonexistent_btn.place(relx=0.85, rely=0.885, relwidth=0.125, relheight=0.05)
 
+        remove_useless_btn = Button(self.root, text='RM Useless')
+        remove_useless_btn.place(relx=0.85, rely=0.945, relwidth=0.125, relheight=0.05)
+
         # Store buttons as attributes for later command binding
         self.add_btn = add_entry_btn
         self.edit_btn = edit_entry_btn
         self.remove_btn = remove_entry_btn
+        self.undo_btn = undo_btn
         self.up_btn = up_btn
         self.down_btn = down_btn
+        self.reconcile_btn = reconcile_btn
         self.reload_btn = reload_btn
         self.save_user_btn = save_user_btn
         self.save_system_btn = save_system_btn
         self.save_both_btn = save_both_btn
+        self.history_btn = history_btn
         self.remove_duplicates_btn = remove_duplicates_btn
         self.remove_nonexistent_btn = remove_nonexistent_btn
+        self.remove_useless_btn = remove_useless_btn
 
     def bind_commands(self, commands):
         """
@@ -149,17 +250,164 @@ class PathView:
         self.add_btn.config(command=commands.get('add', lambda: None))
         self.edit_btn.config(command=commands.get('edit', lambda: None))
         self.remove_btn.config(command=commands.get('remove', lambda: None))
+        self.undo_btn.config(command=commands.get('undo', lambda: None))
         self.up_btn.config(command=commands.get('up', lambda: None))
         self.down_btn.config(command=commands.get('down', lambda: None))
+        self.reconcile_btn.config(command=commands.get('reconcile', lambda: None))
         self.reload_btn.config(command=commands.get('reload', lambda: None))
         self.save_user_btn.config(command=commands.get('save_user', lambda: None))
         self.save_system_btn.config(command=commands.get('save_system', lambda: None))
         self.save_both_btn.config(command=commands.get('save_both', lambda: None))
+        self.history_btn.config(command=commands.get('history', lambda: None))
         self.remove_duplicates_btn.config(command=commands.get('remove_duplicates', lambda: None))
         self.remove_nonexistent_btn.config(command=commands.get('remove_dead', lambda: None))
+        self.remove_useless_btn.config(command=commands.get('remove_useless', lambda: None))
+
+        self.file_menu.add_command(label='Import...', command=commands.get('import', lambda: None))
+        self.file_menu.add_command(label='Export...', command=commands.get('export', lambda: None))
+        self.analyze_menu.add_command(label='Duplicate binaries...',
+                                      command=commands.get('duplicate_binaries', lambda: None))
+        self.analyze_menu.add_command(label='Compact entries with %VAR% prefixes',
+                                      command=commands.get('compact', lambda: None))
+
+        # Context menu and keyboard shortcuts act on the whole selection
+        self.context_menu.add_command(label='Move to top',
+                                      command=commands.get('top', lambda: None))
+        self.context_menu.add_command(label='Move up', command=commands.get('up', lambda: None))
+        self.context_menu.add_command(label='Move down',
+                                      command=commands.get('down', lambda: None))
+        self.context_menu.add_command(label='Move to bottom',
+                                      command=commands.get('bottom', lambda: None))
+        self.context_menu.add_command(label='Move to position...',
+                                      command=commands.get('move_to', lambda: None))
+        self.context_menu.add_command(label='Move to other scope (USER <-> SYSTEM)',
+                                      command=commands.get('other_scope', lambda: None))
+        self.context_menu.add_command(label='Count files exactly',
+                                      command=commands.get('count_files', lambda: None))
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label='Remove', command=commands.get('remove', lambda: None))
+        self.context_menu.add_command(label='Undo', command=commands.get('undo', lambda: None))
+
+        self._drop_command = commands.get('drop')
+
+        self.treeview.bind('<Delete>', lambda event: commands.get('remove', lambda: None)())
+        self.root.bind('<Control-z>',
+                       lambda event: self._undo_shortcut(event, commands.get('undo')))
+
+    def _undo_shortcut(self, event, undo):
+        """
+        Undo the last PATH edit, unless Ctrl+Z was pressed in a text field such as the filter.
+
+        Args:
+            event: The key event
+            undo: The undo command, if any
+        """
+        if undo is not None and not isinstance(event.widget, (Entry, ttk.Entry, Text)):
+            undo()
+
+    def _show_context_menu(self, event):
+        """
+        Show the context menu, selecting the clicked row first if it is not selected yet.
+
+        Args:
+            event: The mouse event
+        """
+        row = self.treeview.identify_row(event.y)
+        if row and row not in self.treeview.selection():
+            self.treeview.selection_set(row)
+            self.treeview.focus(row)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
+
+    def _start_drag(self, event):
+        """
+        Remember the pressed row as a possible drag source.
+
+        Args:
+            event: The mouse event
+        """
+        self._drag = None
+        row = self.treeview.identify_row(event.y)
+        # Shift and Control clicks change the selection and never start a drag
+        if not row or not self.treeview.item(row)['values'] or event.state & 0x0005:
+            return None
+
+        self._drag = {'row': row, 'y': event.y, 'moved': False, 'keep': False}
+        if row in self.treeview.selection() and len(self.treeview.selection()) > 1:
+            # Keep the selection so it can be dragged as a whole; a click selects the row on release
+            self._drag['keep'] = True
+            return 'break'
+        return None
+
+    def _drag_motion(self, event):
+        """
+        Track the pointer while a row is dragged.
+
+        Args:
+            event: The mouse event
+        """
+        if (self._drag is not None and not self._drag['moved']
+                and abs(event.y - self._drag['y']) > 3):
+            self._drag['moved'] = True
+            self.treeview.config(cursor='fleur')
+
+    def _end_drag(self, event):
+        """
+        Drop the dragged rows next to the row under the pointer.
+
+        Args:
+            event: The mouse event
+        """
+        drag, self._drag = self._drag, None
+        if drag is None:
+            return
+        self.treeview.config(cursor='')
+
+        if not drag['moved']:
+            if drag['keep']:
+                # The press kept the multi-selection; treat the release as a plain click
+                self.treeview.selection_set(drag['row'])
+                self.treeview.focus(drag['row'])
+                self._item_selected(event)
+            return
+
+        target = self.treeview.identify_row(event.y)
+        if not target or target in self.treeview.selection() or self._drop_command is None:
+            return
+        # Dropping on the lower half of a row inserts after it
+        bbox = self.treeview.bbox(target)
+        after = bool(bbox) and event.y > bbox[1] + bbox[3] / 2
+        self._drop_command(target, after)
+
+    def ask_position(self, count):
+        """
+        Ask for the position to move the selected entries to.
+
+        Args:
+            count: Number of entries in the largest affected section
+
+        Returns:
+            The 1-based position, or None if the dialog was cancelled
+        """
+        return simpledialog.askinteger('Move to position', f'New position (1-{count}):',
+                                       parent=self.root, minvalue=1, maxvalue=max(count, 1))
+
+    def retag_rows(self, rows, old_tag, new_tag):
+        """
+        Replace a tag on many rows with two treeview calls.
+
+        Args:
+            rows: The rows to retag
+            old_tag: Tag to remove
+            new_tag: Tag to add
+        """
+        if not rows:
+            return
+        self.treeview.tk.call(self.treeview, 'tag', 'remove', old_tag, rows)
+        self.treeview.tk.call(self.treeview, 'tag', 'add', new_tag, rows)
 
     def update_statistics(self, user_duplicates, system_duplicates, cross_duplicates, 
-                         user_count, system_count, user_length, system_length):
+                         user_count, system_count, user_length, system_length,
+                         identity_duplicates=0, user_savings=0, system_savings=0):
         """
         Update statistics labels.
 
@@ -171,56 +419,193 @@ class PathView:
             system_count: Number of SYSTEM path entries
             user_length: Total length of USER path entries
             system_length: Total length of SYSTEM path entries
+            identity_duplicates: Number of differently spelled entries pointing to an already
+                listed directory
+            user_savings: Bytes %VAR% prefix compaction would save in the USER value
+            system_savings: Bytes %VAR% prefix compaction would save in the SYSTEM value
         """
         total_duplicates = user_duplicates + system_duplicates + cross_duplicates
-        self.duplicates_label['text'] = f'Duplicates found: {total_duplicates} (USER: {user_duplicates}, SYSTEM: {system_duplicates}, Cross: {cross_duplicates})'
+        self.duplicates_label['text'] = (
+            f'Duplicates found: {total_duplicates} (USER: {user_duplicates}, '
+            f'SYSTEM: {system_duplicates}, Cross: {cross_duplicates}, '
+            f'Same directory: {identity_duplicates})'
+        )
         self.total_entries_label['text'] = f'Total entries: {user_count + system_count} (USER: {user_count}, SYSTEM: {system_count})'
-        self.total_length_label['text'] = f'Total length: {user_length + system_length} (USER: {user_length}, SYSTEM: {system_length})'
+        self.total_length_label['text'] = (
+            f'Total length: {user_length + system_length} (USER: {user_length}, '
+            f'SYSTEM: {system_length}), compaction saves {user_savings + system_savings} bytes '
+            f'(USER: {user_savings}, SYSTEM: {system_savings})'
+        )
 
-    def populate_treeview(self, user_paths, system_paths, get_filecount_callback, path_exists_callback):
+    def populate_treeview(self, user_rows, system_rows):
         """
         Populate the treeview with path entries.
 
         Args:
-            user_paths: List of USER path entries
-            system_paths: List of SYSTEM path entries
-            get_filecount_callback: Callback to get file count for a path
-            path_exists_callback: Callback to check if a path exists
+            user_rows: List of (path, exists, filecount) for the USER path entries, where filecount
+                may be a lower bound such as '≥5000'
+            system_rows: List of (path, exists, filecount) for the SYSTEM path entries
         """
-        # Clear existing items
+        # Clear existing items, including rows detached by the filter
+        self.show_all_rows()
+        self.path_index.clear()
         self.treeview.delete(*self.treeview.get_children())
 
-        # Create a parent node for USER paths
+        # Create a parent node for USER paths and add the USER paths
         user_parent = self.treeview.insert('', tk.END, text='USER PATH', open=True, tags=['header'])
+        self.insert_paths(user_parent, user_rows, 'user')
 
-        # Add USER paths
-        for app in user_paths:
-            exists = path_exists_callback(app)
-            filecount = get_filecount_callback(app) if exists else 0
-            system = 'windows/system32' in app
-            data = (app, filecount)
-            self.treeview.insert(user_parent, tk.END, values=data, tags=[
-                ('exists' if exists else 'nexists'),
-                ('sys32' if system else 'nsys32'),
-                ('empty' if filecount == 0 else 'nempty'),
-                'user_path'
-            ])
-
-        # Create a parent node for SYSTEM paths
+        # Create a parent node for SYSTEM paths and add the SYSTEM paths
         system_parent = self.treeview.insert('', tk.END, text='SYSTEM PATH', open=True, tags=['header'])
+        self.insert_paths(system_parent, system_rows, 'system')
+
+        self.apply_filter()
+
+    def apply_filter(self):
+        """
+        Show only the rows matching the search box and the state filter.
+
+        Non-matching rows are detached rather than deleted, so narrowing and widening the filter
+        never rebuilds the treeview.
+        """
+        query = self.filter_text.get()
+        state = FILTER_STATES.get(self.filter_state.get())
+        if not query.strip() and state is None:
+            self.show_all_rows()
+            return
+
+        if not self._section_children:
+            self._sync_index()
+
+        matches = self.path_index.search(query, state)
+        for parent, children in self._section_children.items():
+            self.treeview.set_children(parent, *[child for child in children if child in matches])
+
+    def set_identity_groups(self, groups):
+        """
+        Mark the rows of entries that point to the same directory under different spellings.
+
+        Args:
+            groups: Groups of entries, each a list of ('user' | 'system', index)
+        """
+        parents = {self.treeview.item(parent)['text'].split()[0].lower(): parent
+                   for parent in self.treeview.get_children()}
+        items = set()
+        for group in groups:
+            for path_type, index in group:
+                parent = parents[path_type]
+                # Index into all rows of the section, including rows detached by the filter
+                children = self._section_children.get(parent) or self.treeview.get_children(parent)
+                items.add(children[index])
+        self.path_index.set_aliases(items)
+
+        if FILTER_STATES.get(self.filter_state.get()) == 'alias':
+            self.apply_filter()
+
+    def show_all_rows(self):
+        """Reattach all rows detached by the filter in their original order."""
+        for parent, children in self._section_children.items():
+            self.treeview.set_children(parent, *children)
+        self._section_children = {}
+
+    def _sync_index(self):
+        """Bring the search index up to date with the (fully attached) treeview rows."""
+        current = set()
+        for parent in self.treeview.get_children():
+            children = self.treeview.get_children(parent)
+            self._section_children[parent] = children
+            current.update(children)
+
+            # Only rows that are new since the last sync need a round trip to read them
+            for child in children:
+                if child in self.path_index:
+                    continue
+                item = self.treeview.item(child)
+                if not item['values']:
+                    continue
+                self.path_index.add(child, item['values'][0], self._row_states(item['tags']))
+
+        for item in [item for item in self.path_index.entries if item not in current]:
+            self.path_index.remove(item)
+
+    def insert_path(self, parent, path, exists, filecount, path_type):
+        """
+        Append a path entry row to a section.
+
+        Args:
+            parent: Header item of the section
+            path: The path entry
+            exists: Whether the path exists
+            filecount: Number of files in the path, or a lower bound such as '≥5000'
+            path_type: 'user' or 'system'
+
+        Returns:
+            The new row
+        """
+        return self.treeview.insert(parent, tk.END, values=(path, filecount),
+                                    tags=self._row_tags(path, exists, filecount, path_type))
 
-        # Add SYSTEM paths
-        for app in system_paths:
-            exists = path_exists_callback(app)
-            filecount = get_filecount_callback(app) if exists else 0
-            system = 'windows/system32' in app
-            data = (app, filecount)
-            self.treeview.insert(system_parent, tk.END, values=data, tags=[
-                ('exists' if exists else 'nexists'),
-                ('sys32' if system else 'nsys32'),
-                ('empty' if filecount == 0 else 'nempty'),
-                'system_path'
-            ])
+    def insert_paths(self, parent, rows, path_type):
+        """
+        Append many path entry rows to a section with a single call into Tcl.
+
+        This replaces one Python to Tcl round trip per entry with a single call. The new rows are
+        added to the search index directly, so a filter does not have to read them back either.
+
+        Args:
+            parent: Header item of the section
+            rows: List of (path, exists, filecount)
+            path_type: 'user' or 'system'
+
+        Returns:
+            The new rows
+        """
+        items = []
+        tcl_rows = []
+        for path, exists, filecount in rows:
+            item = f'row{next(self._row_ids)}'
+            tags = self._row_tags(path, exists, filecount, path_type)
+            items.append(item)
+            tcl_rows.append((item, path, filecount, tuple(tags)))
+            self.path_index.add(item, path, self._row_states(tags))
+
+        if tcl_rows:
+            self.treeview.tk.call('apply', INSERT_ROWS_SCRIPT, str(self.treeview), parent,
+                                  tuple(tcl_rows))
+        return items
+
+    def update_path(self, row, path, exists, filecount, path_type):
+        """
+        Replace the contents of a path entry row in place.
+
+        Args:
+            row: The row to update
+            path: The path entry
+            exists: Whether the path exists
+            filecount: Number of files in the path, or a lower bound such as '≥5000'
+            path_type: 'user' or 'system'
+        """
+        self.treeview.item(row, values=(path, filecount),
+                           tags=self._row_tags(path, exists, filecount, path_type))
+        # The row keeps its ID, so the search index has to forget its old contents
+        if row in self.path_index:
+            self.path_index.remove(row)
+
+    @staticmethod
+    def _row_tags(path, exists, filecount, path_type):
+        """Get the tags describing a path entry row."""
+        return [
+            ('exists' if exists else 'nexists'),
+            ('sys32' if 'windows/system32' in path else 'nsys32'),
+            ('empty' if filecount == 0 else 'nempty'),
+            f'{path_type}_path'
+        ]
+
+    @staticmethod
+    def _row_states(tags):
+        """Get the search index states of a row from its tags."""
+        states = (('dead', 'nexists'), ('empty', 'empty'), ('sys32', 'sys32'))
+        return [state for state, tag in states if tag in tags]
 
     def show_add_dialog(self, path_type, is_admin):
         """
@@ -228,7 +613,7 @@ class PathView:
 
         Args:
             path_type: Current path type ('user' or 'system')
-            is_admin: Whether the application is running with admin privileges
+            is_admin: Whether the SYSTEM path can be modified
 
         Returns:
             The add dialog window
@@ -275,7 +660,7 @@ class PathView:
         Args:
             selected_path: Currently selected path
             path_type: Current path type ('user' or 'system')
-            is_admin: Whether the application is running with admin privileges
+            is_admin: Whether the SYSTEM path can be modified
 
         Returns:
             The edit dialog window
@@ -316,18 +701,238 @@ class PathView:
         return button
 
     def show_admin_required_message(self):
-        """Show a message that admin privileges are required and offer to restart with elevated permissions."""
+        """Show that admin privileges are required and offer to start the elevated helper."""
         result = messagebox.askyesno(
             "Admin privileges required", 
-            "You need to run this application as administrator to save the SYSTEM path.\n\nDo you want to restart the application with administrator privileges?",
+            "Administrator privileges are required to modify the SYSTEM path.\n\n"
+            "Do you want to start a helper with administrator privileges? "
+            "Your unsaved changes are kept.",
             icon='warning'
         )
 
         if result:
-            # Return True to indicate that the user wants to restart with elevated permissions
+            # Return True to indicate that the user wants to start the elevated helper
             return True
         return False
 
+    def show_length_warning(self, problems, description, can_compact, required=False):
+        """
+        Warn that a value about to be saved is too long and ask how to continue.
+
+        Args:
+            problems: One line per length problem
+            description: Lengths and compaction savings per scope
+            can_compact: Whether compacting the entries shortens the values
+            required: Whether the values can only be saved compacted
+
+        Returns:
+            True to compact the entries first, False to save them as they are, or None to cancel
+        """
+        message = f"{problems}\n\n{description}\n\n"
+        if required:
+            return messagebox.askokcancel(
+                "PATH too long", message + "Compact the entries with %VAR% references and save?",
+                icon='warning'
+            ) or None
+        if can_compact:
+            return messagebox.askyesnocancel(
+                "PATH length", message + "Compact the entries with %VAR% references before saving?",
+                icon='warning'
+            )
+        if messagebox.askokcancel("PATH length", message + "Save anyway?", icon='warning'):
+            return False
+        return None
+
+    def show_useless_report(self, empty_count, shadowed_count, probes_saved):
+        """
+        Show the useless entry analysis and ask whether to remove them.
+
+        Args:
+            empty_count: Number of existing entries without any executables
+            shadowed_count: Number of entries whose executables are all provided earlier
+            probes_saved: Estimated number of file probes saved per command lookup
+
+        Returns:
+            True if the user confirmed the removal, False otherwise
+        """
+        return messagebox.askyesno(
+            "Remove useless entries",
+            f"Entries without executables: {empty_count}\n"
+            f"Entries fully shadowed by earlier entries: {shadowed_count}\n\n"
+            f"Removing them saves an estimated {probes_saved} file probes per command lookup.\n\n"
+            "Do you want to remove these entries?"
+        )
+
+    def show_binary_report(self, description, redundant_count):
+        """
+        Show the identical executables found across PATH entries.
+
+        Args:
+            description: The formatted report
+            redundant_count: Number of entries that can be removed without changing any lookup
+
+        Returns:
+            The button removing the redundant entries
+        """
+        self.binary_popup = tk.Toplevel(self.root)
+        self.binary_popup.wm_title('Duplicate binaries')
+        self.binary_popup.geometry('640x480')
+
+        text = Text(self.binary_popup, wrap=tk.NONE)
+        text.place(relx=0.02, rely=0.02, relwidth=0.96, relheight=0.86)
+        text.insert(tk.END, description)
+        text.config(state=tk.DISABLED)
+
+        remove_button = Button(self.binary_popup,
+                               text=f'Remove {redundant_count} redundant entries')
+        remove_button.place(relx=0.02, rely=0.9, relwidth=0.4, relheight=0.07)
+        if not redundant_count:
+            remove_button.config(state=tk.DISABLED)
+
+        return remove_button
+
+    def close_binary_report(self):
+        """Close the duplicate binaries report."""
+        if self.binary_popup:
+            self.binary_popup.destroy()
+
+    def show_review_dialog(self, description):
+        """
+        Show the changes a save would write.
+
+        Args:
+            description: The edit script, one line per change
+
+        Returns:
+            The button confirming the save
+        """
+        self.review_popup = tk.Toplevel(self.root)
+        self.review_popup.wm_title('Review changes')
+        self.review_popup.geometry('640x480')
+
+        text = Text(self.review_popup, wrap=tk.NONE)
+        text.place(relx=0.02, rely=0.02, relwidth=0.96, relheight=0.86)
+        text.insert(tk.END, description)
+        text.config(state=tk.DISABLED)
+
+        save_button = Button(self.review_popup, text='Save')
+        save_button.place(relx=0.02, rely=0.9, relwidth=0.2, relheight=0.07)
+
+        cancel_button = Button(self.review_popup, text='Cancel', command=self.close_review_dialog)
+        cancel_button.place(relx=0.24, rely=0.9, relwidth=0.2, relheight=0.07)
+
+        return save_button
+
+    def close_review_dialog(self):
+        """Close the review dialog."""
+        if self.review_popup:
+            self.review_popup.destroy()
+
+    def show_history_dialog(self, snapshots):
+        """
+        Show the snapshot history browser.
+
+        Args:
+            snapshots: List of (snapshot ID, timestamp, reason), newest first
+
+        Returns:
+            Tuple of the diff and restore buttons
+        """
+        self.history_popup = tk.Toplevel(self.root)
+        self.history_popup.wm_title('PATH history')
+        self.history_popup.geometry('640x480')
+
+        self.history_listbox = Listbox(self.history_popup, selectmode=tk.EXTENDED,
+                                       exportselection=False)
+        self.history_listbox.place(relx=0.02, rely=0.02, relwidth=0.3, relheight=0.86)
+        self.history_ids = [snapshot_id for snapshot_id, _, _ in snapshots]
+        self.history_listbox.insert(tk.END, *[
+            f'#{snapshot_id} {time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))} '
+            f'{reason}'
+            for snapshot_id, timestamp, reason in snapshots
+        ])
+
+        self.history_text = Text(self.history_popup, wrap=tk.NONE)
+        self.history_text.place(relx=0.34, rely=0.02, relwidth=0.64, relheight=0.86)
+        self.set_history_text('Select two snapshots and click "Diff", or one snapshot and click '
+                              '"Restore".')
+
+        diff_button = Button(self.history_popup, text='Diff')
+        diff_button.place(relx=0.02, rely=0.9, relwidth=0.14, relheight=0.07)
+
+        restore_button = Button(self.history_popup, text='Restore')
+        restore_button.place(relx=0.18, rely=0.9, relwidth=0.14, relheight=0.07)
+
+        return diff_button, restore_button
+
+    def get_selected_snapshots(self):
+        """Get the IDs of the snapshots selected in the history browser."""
+        return [self.history_ids[index] for index in self.history_listbox.curselection()]
+
+    def set_history_text(self, text):
+        """Replace the text shown in the history browser."""
+        self.history_text.delete(1.0, tk.END)
+        self.history_text.insert(1.0, text)
+
+    def show_history_diff(self, old_id, new_id, diff):
+        """
+        Show the differences between two snapshots.
+
+        Args:
+            old_id: ID of the older snapshot
+            new_id: ID of the newer snapshot
+            diff: Mapping of 'user'/'system' to (added entries, removed entries, order changed)
+        """
+        lines = [f'Changes from #{old_id} to #{new_id}', '']
+        for path_type in ('user', 'system'):
+            added, removed, reordered = diff[path_type]
+            lines.append(f'{path_type.upper()} PATH')
+            lines.extend(f'  + {entry}' for entry in added)
+            lines.extend(f'  - {entry}' for entry in removed)
+            if reordered:
+                lines.append('  ~ order changed')
+            if not added and not removed and not reordered:
+                lines.append('  (unchanged)')
+            lines.append('')
+        self.set_history_text('\n'.join(lines))
+
+    def close_history_dialog(self):
+        """Close the history browser."""
+        if self.history_popup:
+            self.history_popup.destroy()
+
+    def ask_desired_state_file(self):
+        """Ask for the JSON file describing the desired PATH state."""
+        return filedialog.askopenfilename(
+            parent=self.root,
+            title='Open desired state',
+            filetypes=[('JSON files', '*.json'), ('All files', '*.*')]
+        )
+
+    def ask_import_file(self):
+        """Ask for a PATH file to import."""
+        return filedialog.askopenfilename(parent=self.root, title='Import PATH',
+                                          filetypes=PATH_FILETYPES)
+
+    def ask_export_file(self):
+        """Ask where to export the PATH to."""
+        return filedialog.asksaveasfilename(parent=self.root, title='Export PATH',
+                                            filetypes=PATH_FILETYPES, defaultextension='.json')
+
+    def show_reconcile_plan(self, description):
+        """
+        Show the changes needed to reach the desired state and ask whether to apply them.
+
+        Args:
+            description: One line per change
+
+        Returns:
+            True if the user confirmed the changes, False otherwise
+        """
+        return messagebox.askyesno("Reconcile",
+                                   f"The following changes are needed:\n\n{description}\n\n"
+                                   "Apply them?")
+
     def get_add_path(self):
         """Get the path from the add dialog."""
         return self.add_text.get(1.0, "end-1c")
@@ -0,0 +1,15 @@
+import subprocess
+
+from backends import RemotePathModel
+
+
+def test_remote_command_quotes_computer_name(monkeypatch):
+    calls = []
+    monkeypatch.setattr(subprocess, 'run', lambda args, **kwargs: calls.append(args))
+    model = RemotePathModel.__new__(RemotePathModel)
+    model.computer_name = "host'; Remove-Item c:/x; '\u2019"
+    model.timeout = None
+
+    model.run_command('Get-Date')
+    assert calls == [['powershell.exe', "Invoke-Command -ComputerName "
+                      "'host''; Remove-Item c:/x; ''\u2019\u2019' -ScriptBlock { Get-Date }"]]
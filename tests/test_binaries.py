@@ -0,0 +1,77 @@
+import os
+
+import binaries
+from backends import MemoryPathModel
+
+
+def make_dirs(tmp_path, layout):
+    """Create one directory per name holding the given {file name: contents}."""
+    paths = {}
+    for name, files in layout.items():
+        directory = tmp_path / name
+        directory.mkdir()
+        for file_name, contents in files.items():
+            (directory / file_name).write_text(contents)
+        paths[name] = str(directory).replace('\\', '/')
+    return paths
+
+
+def analyze(paths, user, system, pathext='.EXE;.BAT', cache=None):
+    model = MemoryPathModel([paths[name] for name in user], [paths[name] for name in system],
+                            environment={'PATHEXT': pathext})
+    return binaries.find_duplicate_binaries(model, list(model.user_paths),
+                                            list(model.system_paths), cache)
+
+
+def test_later_identical_copy_is_redundant(tmp_path):
+    paths = make_dirs(tmp_path, {'a': {'git.exe': 'v1'}, 'b': {'git.exe': 'v1'}})
+    report = analyze(paths, ['b'], ['a'])
+    assert report.redundant == [('user', 0)]
+    assert report.groups == [[('system', 0, 'git.exe'), ('user', 0, 'git.exe')]]
+    assert report.wasted_bytes == 2
+
+
+def resolve(directories, name):
+    """Get the contents of the file a lookup of name finds first, or None."""
+    for directory in directories:
+        if os.path.exists(os.path.join(directory, name)):
+            return open(os.path.join(directory, name)).read()
+    return None
+
+
+def test_removal_never_changes_the_winning_binary(tmp_path):
+    # Removing only x would make git resolve to the different git.exe in b
+    paths = make_dirs(tmp_path, {'x': {'git.exe': 'v1'}, 'b': {'git.exe': 'v2'},
+                                 'a': {'git.exe': 'v1', 'foo.exe': 'foo'}})
+    order = ['x', 'b', 'a']
+    report = analyze(paths, [], order)
+    kept = [paths[name] for index, name in enumerate(order)
+            if ('system', index) not in report.redundant]
+
+    assert ('system', 2) not in report.redundant
+    for name in ('git.exe', 'foo.exe'):
+        assert resolve(kept, name) == resolve([paths[name] for name in order], name)
+
+
+def test_entry_with_unique_executable_is_kept(tmp_path):
+    paths = make_dirs(tmp_path, {'a': {'git.exe': 'v1'}, 'b': {'git.exe': 'v1', 'only.exe': 'x'}})
+    # a is covered by b's identical git.exe, but b is the only entry providing only.exe
+    assert analyze(paths, ['b'], ['a']).redundant == [('system', 0)]
+
+
+def test_extension_precedence_is_respected(tmp_path):
+    # 'git' resolves to c/git.bat first; removing d would break the explicit git.exe lookup
+    paths = make_dirs(tmp_path, {'c': {'git.bat': 'v1'}, 'd': {'git.exe': 'v1'},
+                                 'e': {'git.exe': 'v1'}})
+    report = analyze(paths, ['e'], ['c', 'd'])
+    assert ('system', 1) not in report.redundant
+    assert ('user', 0) in report.redundant
+
+
+def test_hash_cache_is_reused(tmp_path):
+    paths = make_dirs(tmp_path, {'a': {'git.exe': 'v1'}, 'b': {'git.exe': 'v1'}})
+    cache = binaries.HashCache(str(tmp_path / 'cache' / 'hashes.sqlite3'))
+    first = analyze(paths, ['b'], ['a'], cache=cache)
+    second = analyze(paths, ['b'], ['a'], cache=cache)
+    assert (first.hashed, first.cached) == (2, 0)
+    assert (second.hashed, second.cached) == (0, 2)
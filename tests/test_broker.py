@@ -0,0 +1,96 @@
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import pytest
+
+import broker
+from backends import MemoryPathModel
+from broker import BrokerClient, BrokerError, WriteBroker
+
+AUTHKEY = b'0123456789abcdef0123456789abcdef'
+
+
+@pytest.fixture
+def served():
+    """Serve a WriteBroker over a fresh address and yield (model, address)."""
+    model = MemoryPathModel(['c:/user'], ['c:/windows'],
+                            variables={'PSModulePath': ([], ['c:/modules'])})
+    listener = Listener(broker.new_address(), authkey=AUTHKEY)
+    thread = threading.Thread(target=WriteBroker(model).serve, args=(listener, 30.0), daemon=True)
+    thread.start()
+    yield model, listener.address
+    thread.join(5)
+    listener.close()
+
+
+@pytest.fixture
+def client(served):
+    client = BrokerClient.connect(served[1], AUTHKEY, timeout=5)
+    yield client
+    client.close()
+
+
+def test_wrong_authkey_is_rejected(served):
+    model, address = served
+    with pytest.raises(AuthenticationError):
+        Client(address, authkey=b'wrong key')
+
+    # The broker keeps waiting for the editor after a failed handshake
+    client = BrokerClient.connect(address, AUTHKEY, timeout=5)
+    assert client.ping()
+    client.close()
+
+
+def test_set_system_path_round_trip(served, client):
+    model, _ = served
+    client.set_system_path(['C:\\Windows', 'c:/tools'])
+    assert model.os_system_paths == ['c:/windows', 'c:/tools']
+    assert model.os_user_paths == ['c:/user']
+
+
+def test_set_system_variable_round_trip(served, client):
+    model, _ = served
+    client.set_system_variable('PSModulePath', ['c:/modules', 'c:/more'])
+    assert model.os_variables['PSModulePath']['system'] == ['c:/modules', 'c:/more']
+
+    # Path goes through the dedicated request
+    client.set_system_variable('Path', ['c:/windows'])
+    assert model.os_system_paths == ['c:/windows']
+
+
+@pytest.mark.parametrize('entry', ['c:/a;c:/b', 'c:/a\0c:/b'])
+def test_entries_with_separators_are_rejected(served, client, entry):
+    model, _ = served
+    with pytest.raises(BrokerError, match='Invalid character'):
+        client.set_system_path(['c:/windows', entry])
+    assert model.os_system_paths == ['c:/windows']
+
+
+def test_invalid_requests_are_rejected(client):
+    with pytest.raises(BrokerError, match='Unsupported request'):
+        client.request('run', 'calc.exe')
+    with pytest.raises(BrokerError, match='Entries must be a list of strings'):
+        client.request('set_system_path', 'c:/windows')
+    with pytest.raises(BrokerError, match='Invalid variable name'):
+        client.request('set_system_variable', 'Path; calc', ['c:/a'])
+    # The connection stays usable after a rejected request
+    assert client.ping()
+
+
+def test_unprivileged_write_is_refused():
+    model = MemoryPathModel([], ['c:/windows'], admin=False)
+    status, message = WriteBroker(model).handle(('set_system_path', ['c:/tools']))
+    assert status == 'error'
+    assert model.os_system_paths == ['c:/windows']
+
+
+def test_launch_unelevated_stand_in():
+    client = broker.launch(elevated=False, timeout=30)
+    try:
+        assert client.ping()
+        client.set_system_path(['c:/windows'])
+        with pytest.raises(BrokerError):
+            client.set_system_path(['c:/a;c:/b'])
+    finally:
+        client.close()
@@ -0,0 +1,126 @@
+import threading
+import time
+
+from backends import MemoryPathModel
+from fleet import FleetRunner, FleetSummary, TargetResult, read_paths
+
+
+def make_runner(**kwargs) -> FleetRunner:
+    kwargs.setdefault('retry_delay', 0.0)
+    return FleetRunner(**kwargs)
+
+
+def test_run_reports_every_target():
+    targets = {
+        'a': lambda: MemoryPathModel(['c:/a'], ['c:/windows']),
+        'b': lambda: MemoryPathModel([], ['c:/b']),
+    }
+    results = {result.name: result for result in make_runner().run(targets, read_paths)}
+    assert results['a'].ok and results['a'].attempts == 1
+    assert results['a'].value == {'user': ['c:/a'], 'system': ['c:/windows']}
+    assert results['b'].value == {'user': [], 'system': ['c:/b']}
+
+
+def test_timing_out_factory_reports_timeout():
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait(5)
+        return MemoryPathModel([], [])
+
+    try:
+        runner = make_runner(timeout=0.05, retries=2)
+        (result,) = runner.run({'slow': slow_factory}, read_paths, idempotent=True)
+    finally:
+        release.set()
+    assert isinstance(result.error, TimeoutError)
+    assert result.attempts == 3
+
+
+def test_slot_wait_counts_towards_timeout():
+    release = threading.Event()
+    runner = make_runner(max_workers=1, timeout=0.05, retries=0)
+    # Occupy the only slot with an attempt that outlives its timeout
+    stuck = runner._run_target('stuck', lambda: release.wait(5), lambda model: None, False)
+    try:
+        start = time.perf_counter()
+        result = runner._run_target('next', lambda: MemoryPathModel([], []), read_paths, False)
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+    assert isinstance(stuck.error, TimeoutError)
+    assert isinstance(result.error, TimeoutError)
+    assert elapsed < 1.0
+
+
+def test_failing_factory_is_retried_when_idempotent():
+    calls = []
+
+    def flaky_factory():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ConnectionError('unreachable')
+        return MemoryPathModel(['c:/a'], [])
+
+    (result,) = make_runner(retries=1).run({'flaky': flaky_factory}, read_paths, idempotent=True)
+    assert result.ok
+    assert result.attempts == 2
+    assert len(calls) == 2
+
+
+def test_failing_factory_is_not_retried_by_default():
+    calls = []
+
+    def failing_factory():
+        calls.append(None)
+        raise ConnectionError('unreachable')
+
+    (result,) = make_runner(retries=3).run({'down': failing_factory}, read_paths)
+    assert isinstance(result.error, ConnectionError)
+    assert result.attempts == 1
+    assert len(calls) == 1
+
+
+def test_non_idempotent_edit_is_not_retried():
+    model = MemoryPathModel(['c:/a'], [])
+    edits = []
+
+    def add_entry(target: MemoryPathModel):
+        edits.append(None)
+        target.set_path_to_os(user_path=list(target.user_paths) + ['c:/b'])
+        raise RuntimeError('connection lost after the write')
+
+    (result,) = make_runner(retries=3).run({'host': lambda: model}, add_entry)
+    assert isinstance(result.error, RuntimeError)
+    assert result.attempts == 1
+    assert len(edits) == 1
+    assert model.os_user_paths == ['c:/a', 'c:/b']
+
+
+def test_summarize_aggregates_results():
+    targets = {
+        'a': lambda: MemoryPathModel(['c:/a', 'c:/a', 'c:/missing'], ['c:/windows']),
+        'b': lambda: MemoryPathModel(['c:/b'], ['c:/b']),
+        'down': lambda: (_ for _ in ()).throw(ConnectionError('unreachable')),
+    }
+    seen = []
+    summary = make_runner(retries=0).summarize(targets, on_result=seen.append)
+
+    assert sorted(result.name for result in seen) == ['a', 'b', 'down']
+    assert summary.targets == 3
+    assert summary.failed == 1
+    # One duplicate within USER and one entry in both scopes
+    assert summary.duplicates == 2
+    # None of the entries exists on this filesystem
+    assert summary.dead == 6
+    # Sum of the entry lengths, separators not included
+    assert summary.length == len('c:/a' 'c:/a' 'c:/missing' 'c:/windows' 'c:/b' 'c:/b')
+
+
+def test_summary_counts_failed_targets():
+    summary = FleetSummary()
+    summary.add(TargetResult('a', {'duplicates': 1, 'dead': 2, 'length': 10}, attempts=1))
+    summary.add(TargetResult('b', error=TimeoutError(), attempts=2))
+    assert (summary.targets, summary.failed) == (2, 1)
+    assert (summary.duplicates, summary.dead, summary.length) == (1, 2, 10)
+    assert str(summary).startswith('Targets: 2 (1 failed)')
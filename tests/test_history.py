@@ -0,0 +1,51 @@
+import pytest
+
+from history import PathHistory
+
+
+def test_record_and_get_snapshot(tmp_path):
+    history = PathHistory(str(tmp_path / 'history.sqlite3'))
+    snapshot_id = history.record(['c:/a', 'c:/b'], ['c:/windows'], 'load')
+    history.close()
+
+    reopened = PathHistory(str(tmp_path / 'history.sqlite3'))
+    assert reopened.get_snapshot(snapshot_id) == (['c:/a', 'c:/b'], ['c:/windows'])
+    assert [(i, reason) for i, _, reason in reopened.list_snapshots()] == [(snapshot_id, 'load')]
+
+
+def test_identical_snapshot_is_not_stored_again():
+    history = PathHistory(':memory:')
+    first = history.record(['c:/a'], [], 'load')
+    assert history.record(['c:/a'], [], 'save') == first
+    second = history.record(['c:/a', 'c:/b'], [], 'save')
+    assert second != first
+    assert [i for i, _, _ in history.list_snapshots()] == [second, first]
+
+
+def test_duplicate_entries_round_trip():
+    history = PathHistory(':memory:')
+    snapshot_id = history.record(['c:/a', 'c:/a', ''], ['c:/a'], 'load')
+    assert history.get_snapshot(snapshot_id) == (['c:/a', 'c:/a', ''], ['c:/a'])
+
+
+def test_diff_reports_added_removed_and_reorders():
+    history = PathHistory(':memory:')
+    old = history.record(['c:/a', 'c:/b', 'c:/c'], ['c:/s'], 'load')
+    new = history.record(['c:/c', 'c:/a', 'c:/d'], ['c:/s'], 'save')
+
+    diff = history.diff(old, new)
+    assert diff['user'] == (['c:/d'], ['c:/b'], True)
+    assert diff['system'] == ([], [], False)
+
+
+def test_diff_ignores_order_of_removed_entries():
+    history = PathHistory(':memory:')
+    old = history.record(['c:/a', 'c:/b', 'c:/c'], [], 'load')
+    new = history.record(['c:/a', 'c:/c'], [], 'save')
+    assert history.diff(old, new)['user'] == ([], ['c:/b'], False)
+
+
+def test_unknown_snapshot_raises_key_error():
+    history = PathHistory(':memory:')
+    with pytest.raises(KeyError):
+        history.get_snapshot(42)
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import lookup
+from backends import MemoryPathModel
+from lookup import ColdCacheFilesystem
+
+PATHEXT = ['.com', '.exe', '.bat', '.cmd']
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create bin directories a (tool.bat), b (tool.exe, tool.com), empty and missing ones."""
+    directories = {}
+    for name, files in (('a', ['tool.bat']), ('b', ['tool.exe', 'tool.com']), ('empty', [])):
+        directory = tmp_path / name
+        directory.mkdir()
+        for file in files:
+            (directory / file).touch()
+        directories[name] = str(directory)
+    directories['missing'] = str(tmp_path / 'missing')
+    return directories
+
+
+def test_resolve_tries_extensions_in_pathext_order(tree):
+    path, probes = lookup.resolve('tool', [tree['empty'], tree['b']], PATHEXT)
+    # .com comes before .exe in PATHEXT
+    assert path == os.path.join(tree['b'], 'tool.com')
+    assert probes == len(PATHEXT) + 1
+
+    # Directories are searched before extensions: a's .bat wins over b's .com
+    path, probes = lookup.resolve('tool', [tree['a'], tree['b']], PATHEXT)
+    assert path == os.path.join(tree['a'], 'tool.bat')
+    assert probes == PATHEXT.index('.bat') + 1
+
+
+def test_resolve_explicit_extension_probes_that_name_only(tree):
+    path, probes = lookup.resolve('Tool.EXE', [tree['a'], tree['missing'], tree['b']], PATHEXT)
+    assert path == os.path.join(tree['b'], 'tool.exe')
+    assert probes == 3
+
+
+def test_miss_probes_every_entry(tree):
+    directories = [tree['a'], tree['b'], tree['empty'], tree['missing']]
+    bare = lookup.resolve('absent', directories, PATHEXT)
+    explicit = lookup.resolve('absent.exe', directories, PATHEXT)
+    assert bare == (None, len(directories) * len(PATHEXT))
+    assert explicit == (None, len(directories))
+    # Missing both the bare and the explicit name costs 1 + len(PATHEXT) probes per entry
+    assert bare[1] + explicit[1] == len(directories) * (1 + len(PATHEXT))
+
+
+def test_cold_cache_charges_first_probe_per_directory(tree):
+    directories = [tree['a'], tree['missing']]
+    filesystem = ColdCacheFilesystem(directories, cold_cost=1.0, warm_cost=0.01)
+
+    assert lookup.resolve('absent', directories, PATHEXT, filesystem.is_file) == (None, 8)
+    assert filesystem.cost == pytest.approx(2 * 1.0 + 6 * 0.01)
+
+    # Both directories are cached now
+    filesystem.cost = 0.0
+    lookup.resolve('absent', directories, PATHEXT, filesystem.is_file)
+    assert filesystem.cost == pytest.approx(8 * 0.01)
+
+    filesystem.reset()
+    path, probes = lookup.resolve('TOOL', directories, PATHEXT, filesystem.is_file)
+    assert path == os.path.join(tree['a'], 'tool.bat')
+    assert filesystem.cost == pytest.approx(1.0 + 2 * 0.01)
+
+
+def test_simulate_reports_probes_and_cost(tree):
+    directories = [tree['missing'], tree['empty'], tree['b']]
+    report = lookup.simulate('test', ['tool', 'absent'], directories, PATHEXT,
+                             cold_cost=1.0, warm_cost=0.01)
+    assert (report.directories, report.commands, report.found) == (3, 2, 1)
+    assert report.probes == 9 + 12
+    # Three cold probes, every other probe is warm
+    assert report.seconds == pytest.approx(3 * 1.0 + 18 * 0.01)
+
+
+def test_compare_after_removing_dead_entries(tree):
+    entries = [tree['missing'], tree['empty'], tree['a'], tree['missing'] + '2', tree['b']]
+    model = MemoryPathModel(entries, [], environment={'PATHEXT': '.COM;.EXE;.BAT;.CMD'})
+    model.user_paths = [path for path in model.user_paths if model.path_exists(path)]
+
+    reports = lookup.compare(model, ['tool', 'absent'], repeat=1)
+    reports = {report.label: report for report in reports}
+    current, edited = reports['current (cold cache)'], reports['edited (cold cache)']
+    assert (current.directories, edited.directories) == (5, 3)
+    assert current.found == edited.found == 1
+    # 'tool' passed one dead entry before it was found, 'absent' passed both
+    assert current.probes - edited.probes == 3 * len(PATHEXT)
+    assert edited.seconds < current.seconds
+    assert reports['edited (filesystem)'].probes == edited.probes
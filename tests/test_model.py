@@ -0,0 +1,61 @@
+import pytest
+
+from backends import MemoryPathModel
+
+
+def test_readded_entry_is_probed_again(tmp_path):
+    directory = str(tmp_path / 'tools')
+    model = MemoryPathModel([directory], [])
+    assert model.probe_entry(model.entries['user'][0]) == (False, 0)
+
+    del model.user_paths[0]
+    (tmp_path / 'tools').mkdir()
+    (tmp_path / 'tools' / 'tool.exe').touch()
+    model.user_paths.append(directory)
+
+    # The removed entry's result is stale and must not mark the entry as dead
+    assert model.probe_entry(model.entries['user'][0]) == (True, 1)
+    assert model.get_variable_statistics('Path')['dead'] == 0
+
+
+def test_listed_entries_share_probe_results(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    model = MemoryPathModel([directory], [directory], variables={'PSModulePath': ([directory], [])})
+    probed = []
+    path_exists = model.path_exists
+    monkeypatch.setattr(model, 'path_exists', lambda path: probed.append(path) or path_exists(path))
+
+    for entry in model.entries['user'] + model.entries['system']:
+        model.probe_entry(entry)
+    model.probe_entry(model.variables['PSModulePath']['user'][0])
+    # Moving an entry keeps its probe results
+    model.system_paths = list(model.system_paths)
+    assert model.entries['system'][0].exists is True
+    assert probed == [directory]
+
+
+def test_applications_index_both_scopes_in_lookup_order():
+    model = MemoryPathModel(['c:/u1', 'c:/u2'], ['c:/s1'])
+    applications = model.applications
+    assert [applications[index] for index in range(3)] == ['c:/s1', 'c:/u1', 'c:/u2']
+    assert [applications[index] for index in range(-3, 0)] == ['c:/s1', 'c:/u1', 'c:/u2']
+    assert applications[1:] == ['c:/u1', 'c:/u2']
+    for index in (3, -4):
+        with pytest.raises(IndexError):
+            applications[index]
+
+
+def test_variables_are_looked_up_case_insensitively():
+    environment = {'LocalAppData': 'C:\\Users\\someone\\AppData\\Local'}
+    model = MemoryPathModel(['%localappdata%/bin'], [], environment=environment)
+    assert model.get_variable('LOCALAPPDATA') == environment['LocalAppData']
+    assert model.expand_path('%localappdata%/bin') == 'c:/users/someone/appdata/local/bin'
+    assert model.get_variable('ProgramFiles') is None
+
+    # Variables added or removed later are found, or no longer found
+    environment['ProgramFiles'] = 'C:\\Program Files'
+    assert model.get_variable('PROGRAMFILES') == 'C:\\Program Files'
+    del environment['ProgramFiles']
+    environment['SystemRoot'] = 'C:\\Windows'
+    assert model.get_variable('programfiles') is None
+    assert model.get_variable('systemroot') == 'C:\\Windows'
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+import pathdiff
+from pathdiff import diff_entries, diff_scopes, match_entries
+
+
+def lcs_length(old, new):
+    """Length of a longest common subsequence by dynamic programming."""
+    lengths = [[0] * (len(new) + 1) for _ in range(len(old) + 1)]
+    for i in range(len(old) - 1, -1, -1):
+        for j in range(len(new) - 1, -1, -1):
+            lengths[i][j] = (lengths[i + 1][j + 1] + 1 if old[i] == new[j]
+                             else max(lengths[i + 1][j], lengths[i][j + 1]))
+    return lengths[0][0]
+
+
+def is_common_subsequence(old, new, matches):
+    return (all(old[i] == new[j] for i, j in matches)
+            and all(a[0] < b[0] and a[1] < b[1] for a, b in zip(matches, matches[1:])))
+
+
+def apply_edits(old, edits):
+    """Rebuild the new list from the old one and an edit script."""
+    removed = {edit.old_index for edit in edits if edit.action in ('delete', 'move')}
+    kept = [entry for index, entry in enumerate(old) if index not in removed]
+    placed = sorted((edit.new_index, edit.entry) for edit in edits
+                    if edit.action in ('insert', 'move'))
+    for new_index, entry in placed:
+        kept.insert(new_index, entry)
+    return kept
+
+
+@pytest.mark.parametrize('unique', [True, False])
+def test_match_entries_is_a_longest_common_subsequence(unique):
+    rng = random.Random(1)
+    for _ in range(500):
+        alphabet = rng.randint(2, 20)
+        old = [rng.randrange(alphabet) for _ in range(rng.randint(0, 20))]
+        new = [entry if rng.random() < 0.7 else rng.randrange(alphabet + 5) for entry in old]
+        if rng.random() < 0.5:
+            rng.shuffle(new)
+        if unique:
+            old, new = list(dict.fromkeys(old)), list(dict.fromkeys(new))
+        matches = match_entries(old, new)
+        assert is_common_subsequence(old, new, matches)
+        assert len(matches) == lcs_length(old, new)
+
+
+def test_diff_entries_rebuilds_the_new_list():
+    rng = random.Random(2)
+    for _ in range(300):
+        old = [f'c:/p{rng.randrange(12)}' for _ in range(rng.randint(0, 12))]
+        new = [entry for entry in old if rng.random() < 0.8]
+        new += [f'c:/n{i}' for i in range(rng.randint(0, 3))]
+        rng.shuffle(new)
+        assert apply_edits(old, diff_entries(old, new)) == new
+
+
+def test_moved_entry_is_reported_once():
+    edits = diff_entries(['c:/a', 'c:/b', 'c:/c'], ['c:/c', 'c:/a', 'c:/b'])
+    assert ([(edit.action, edit.entry, edit.old_index, edit.new_index) for edit in edits]
+            == [('move', 'c:/c', 2, 0)])
+
+
+def test_edit_script_description():
+    script = diff_scopes({'user': ['c:/a', 'c:/old'], 'system': ['c:/s']},
+                         {'user': ['c:/a', 'c:/new'], 'system': ['c:/s']})
+    assert script.changed_scopes() == ['user']
+    assert script.describe().splitlines() == ['USER: 1 inserted, 1 deleted, 0 moved',
+                                              '- [USER] #2 c:/old', '+ [USER] #2 c:/new']
+    assert diff_scopes({'user': ['c:/a']}, {'user': ['c:/a']}).describe() == 'No changes.'
+
+
+def test_large_reorderings_stay_fast_and_valid(monkeypatch):
+    rng = random.Random(3)
+    old = [f'c:/p{i}' for i in range(5000)]
+    new = old[:]
+    rng.shuffle(new)
+    matches = match_entries(old, new)
+    assert is_common_subsequence(old, new, matches)
+
+    # With duplicates, Myers' search gives up after MAX_EDIT_DISTANCE differences
+    monkeypatch.setattr(pathdiff, 'MAX_EDIT_DISTANCE', 50)
+    old = [f'c:/p{i % 250}' for i in range(500)]
+    new = old[:]
+    rng.shuffle(new)
+    assert is_common_subsequence(old, new, match_entries(old, new))
+    assert apply_edits(old, diff_entries(old, new)) == new
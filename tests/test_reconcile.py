@@ -0,0 +1,73 @@
+import pytest
+
+import reconcile
+from backends import MemoryPathModel
+from reconcile import DesiredState
+
+
+def test_from_dict_defaults_and_validation():
+    state = DesiredState.from_dict({
+        'required': ['c:/a', {'path': 'c:/b', 'scope': 'system', 'position': 'start'}],
+    })
+    assert state.required == [('c:/a', 'user', 'end'), ('c:/b', 'system', 'start')]
+
+    with pytest.raises(ValueError):
+        DesiredState.from_dict({'required': [{'path': 'c:/a', 'scope': 'machine'}]})
+    with pytest.raises(ValueError):
+        DesiredState.from_dict({'order': [['c:/a', 'c:/b', 'c:/c']]})
+
+
+def test_plan_removes_forbidden_and_adds_required():
+    model = MemoryPathModel(['c:/old-java/bin', 'c:/tools'], ['c:/windows'])
+    state = DesiredState.from_dict({
+        'required': [{'path': 'C:\\Git\\cmd', 'scope': 'system', 'position': 'start'}],
+        'forbidden': ['c:/old-java/*'],
+    })
+
+    plan = reconcile.plan(model, state)
+    assert plan.user_paths == ['c:/tools']
+    assert plan.system_paths == ['c:/git/cmd', 'c:/windows']
+    assert plan.changes == [('remove', 'user', 'c:/old-java/bin'), ('add', 'system', 'c:/git/cmd')]
+    assert plan.changed_scopes() == ['user', 'system']
+
+
+def test_plan_moves_required_entry_to_its_scope():
+    model = MemoryPathModel(['c:/git/cmd'], [])
+    state = DesiredState.from_dict({'required': [{'path': 'c:/git/cmd', 'scope': 'system'}]})
+    plan = reconcile.plan(model, state)
+    assert plan.user_paths == []
+    assert plan.system_paths == ['c:/git/cmd']
+
+
+def test_plan_satisfies_ordering_constraints():
+    model = MemoryPathModel(['c:/c', 'c:/b', 'c:/a'], [])
+    state = DesiredState.from_dict({'order': [['c:/a', 'c:/b'], ['c:/b', 'c:/c']]})
+    plan = reconcile.plan(model, state)
+    paths = plan.user_paths
+    assert paths.index('c:/a') < paths.index('c:/b') < paths.index('c:/c')
+
+
+def test_contradictory_constraints_raise():
+    model = MemoryPathModel(['c:/a', 'c:/b'], [])
+    state = DesiredState.from_dict({'order': [['c:/a', 'c:/b'], ['c:/b', 'c:/a']]})
+    with pytest.raises(ValueError):
+        reconcile.plan(model, state)
+
+
+def test_required_entry_matching_forbidden_pattern_raises():
+    model = MemoryPathModel([], [])
+    state = DesiredState.from_dict({'required': ['c:/tmp/x'], 'forbidden': ['c:/tmp/*']})
+    with pytest.raises(ValueError):
+        reconcile.plan(model, state)
+
+
+def test_reconcile_is_idempotent_and_writes_changed_scopes_only():
+    model = MemoryPathModel(['c:/a'], ['c:/windows'])
+    state = DesiredState.from_dict({'required': ['c:/b']})
+
+    first = reconcile.reconcile(model, state)
+    assert model.os_user_paths == ['c:/a', 'c:/b']
+    assert model.os_system_paths == ['c:/windows']
+    assert first.changed_scopes() == ['user']
+
+    assert reconcile.reconcile(model, state).is_empty()
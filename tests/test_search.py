@@ -0,0 +1,57 @@
+from search import PathIndex
+
+
+def make_index():
+    index = PathIndex()
+    index.add('a', 'c:/windows/system32', ['sys32'])
+    index.add('b', 'C:/Program Files/Git/cmd', [])
+    index.add('c', 'c:/missing', ['dead'])
+    index.add('d', 'c:/windows/system32', ['sys32'])
+    return index
+
+
+def test_tokens_must_all_match_case_insensitively():
+    index = make_index()
+    assert index.search('') == {'a', 'b', 'c', 'd'}
+    assert index.search('GIT') == {'b'}
+    assert index.search('windows 32') == {'a', 'd'}
+    assert index.search('windows git') == set()
+
+
+def test_backslash_query_matches_normalized_entries():
+    index = make_index()
+    assert index.search('C:\\Windows') == {'a', 'd'}
+    assert index.search('C:\\Windows\\System32') == {'a', 'd'}
+    assert index.search('program files\\git') == {'b'}
+
+
+def test_backslash_entries_are_indexed_like_normalized_ones():
+    index = PathIndex()
+    index.add('a', 'C:\\Tools\\Bin', [])
+    assert index.search('c:/tools/bin') == {'a'}
+
+
+def test_incremental_search_matches_full_search():
+    index = make_index()
+    for query in ('c', 'c:', 'c:\\', 'c:\\w', 'c:\\windows\\', 'c:\\windows\\system32'):
+        incremental = index.search(query)
+        index._invalidate()
+        assert incremental == index.search(query)
+
+
+def test_states():
+    index = make_index()
+    assert index.search('', 'dead') == {'c'}
+    assert index.search('', 'sys32') == {'a', 'd'}
+    assert index.search('', 'duplicate') == {'a', 'd'}
+    index.set_aliases(['b', 'c'])
+    assert index.search('missing', 'alias') == {'c'}
+
+
+def test_remove_updates_duplicates_and_results():
+    index = make_index()
+    index.search('windows')
+    index.remove('d')
+    assert index.search('windows') == {'a'}
+    assert index.search('', 'duplicate') == set()
+    assert 'd' not in index and len(index) == 3
@@ -0,0 +1,87 @@
+import pytest
+
+import serializer
+from backends import MemoryPathModel
+
+# Keys are uppercase, as in os.environ on Windows
+ENVIRONMENT = {
+    'SYSTEMROOT': 'C:\\Windows',
+    'PROGRAMFILES': 'C:\\Program Files',
+    'PROGRAMFILES(X86)': 'C:\\Program Files (x86)',
+    'LOCALAPPDATA': 'C:\\Users\\someone\\AppData\\Local',
+    'USERPROFILE': 'C:\\Users\\someone',
+}
+
+
+def make_model(user_paths=(), system_paths=()):
+    return MemoryPathModel(list(user_paths), list(system_paths), environment=ENVIRONMENT)
+
+
+def test_prefixes_are_longest_first_and_scoped():
+    model = make_model()
+    user = [reference for _, reference in serializer.get_prefixes(model, 'user')]
+    system = [reference for _, reference in serializer.get_prefixes(model, 'system')]
+    assert user[0] == '%localappdata%'
+    assert '%userprofile%' in user
+    assert '%userprofile%' not in system and '%localappdata%' not in system
+    lengths = [len(directory) for directory, _ in serializer.get_prefixes(model, 'user')]
+    assert lengths == sorted(lengths, reverse=True)
+
+
+def test_compacted_entries_expand_to_the_original_directories():
+    entries = ['c:/users/someone/appdata/local/programs/python', 'c:/program files (x86)/git/cmd',
+               'c:/program files/tool', 'c:/windowsapps', '%userprofile%/bin', 'd:/other']
+    model = make_model()
+    compacted = serializer.compact_entries(model, entries, 'user')
+    assert compacted[:3] == ['%localappdata%/programs/python', '%programfiles(x86)%/git/cmd',
+                             '%programfiles%/tool']
+    # Only whole directory names are replaced, and existing references are left alone
+    assert compacted[3:] == ['c:/windowsapps', '%userprofile%/bin', 'd:/other']
+    assert ([model.expand_path(entry) for entry in compacted]
+            == [model.expand_path(entry) for entry in entries])
+
+
+def test_serialize_and_value_bytes():
+    model = make_model()
+    assert (serializer.serialize(model, ['C:\\Windows\\System32', 'c:/x'], 'system')
+            == 'c:/windows/system32;c:/x')
+    assert (serializer.serialize(model, ['C:\\Program Files\\Git'], 'system', compact=True)
+            == '%programfiles%/git')
+    # %systemroot% is longer than c:/windows, so it is not used
+    assert (serializer.serialize(model, ['C:\\Windows\\System32'], 'system', compact=True)
+            == 'c:/windows/system32')
+    assert serializer.get_value_bytes('abc') == 8
+
+
+def test_check_lengths_reports_errors_warnings_and_savings(monkeypatch):
+    model = make_model(system_paths=['c:/windows'])
+    monkeypatch.setattr(serializer, 'WARN_VALUE_LENGTH', 50)
+    monkeypatch.setattr(model, 'MAX_VALUE_LENGTH', 60)
+    user_path = [f'c:/users/someone/appdata/local/tool{i}' for i in range(2)]
+
+    report = serializer.check_lengths(model, user_path=user_path)
+    assert list(report.lengths) == ['user']
+    assert report.lengths['user'] == len(';'.join(user_path)) > 60
+    assert report.get_errors() and not report.get_errors(compact=True)
+    # Compaction cannot shorten the expanded PATH new processes see
+    warnings = report.get_warnings(compact=True)
+    assert len(warnings) == 1 and 'expanded' in warnings[0]
+    assert report.can_compact() and report.saved_bytes['user'] > 0
+    assert report.expanded_length == len('c:/windows;' + ';'.join(user_path))
+    assert 'USER' in report.describe()
+
+
+def test_check_lengths_accepts_iterators():
+    model = make_model(user_paths=['c:/old'], system_paths=['c:/windows'])
+    report = serializer.check_lengths(model, user_path=(path for path in ['c:/a', 'c:/b']))
+    assert report.lengths['user'] == len('c:/a;c:/b')
+    assert report.expanded_length == len('c:/windows;c:/a;c:/b')
+
+
+@pytest.mark.parametrize('scope', ['user', 'system'])
+def test_mixed_case_variable_names_round_trip(scope):
+    # Windows spells the names like this; the lowercased %programfiles% still expands
+    model = MemoryPathModel([], [], environment={'ProgramFiles': 'C:\\Program Files'})
+    assert serializer.get_prefixes(model, scope) == [('c:/program files', '%programfiles%')]
+    compacted = serializer.compact_entries(model, ['c:/program files/git'], scope)
+    assert compacted == ['%programfiles%/git']
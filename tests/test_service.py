@@ -0,0 +1,170 @@
+import base64
+import json
+import re
+import socket
+import threading
+from subprocess import CompletedProcess
+
+import pytest
+
+import service
+from backends import MemoryPathModel
+from service import PathServer, PathService
+
+TOKEN = 'test-token'
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a bin directory holding tool.exe and tool.bat, and an empty directory."""
+    (tmp_path / 'bin').mkdir()
+    (tmp_path / 'bin' / 'tool.exe').touch()
+    (tmp_path / 'bin' / 'tool.bat').touch()
+    (tmp_path / 'empty').mkdir()
+    return {name: str(tmp_path / name) for name in ('bin', 'empty', 'missing')}
+
+
+@pytest.fixture
+def model(tree):
+    return MemoryPathModel([tree['empty'], tree['missing']], [tree['bin']],
+                           environment={'PATHEXT': '.EXE;.BAT'})
+
+
+@pytest.fixture
+def server(model):
+    server = PathServer(PathService(model), token=TOKEN)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class Connection:
+    """Newline-delimited JSON-RPC client for the tests."""
+    def __init__(self, server: PathServer):
+        self.socket = socket.create_connection(server.server_address, timeout=5)
+        self.file = self.socket.makefile('rwb')
+        self.ids = 0
+
+    def send(self, line: bytes) -> dict:
+        self.file.write(line + b'\n')
+        self.file.flush()
+        response = self.file.readline()
+        return json.loads(response) if response else None
+
+    def call(self, method: str, params=None) -> dict:
+        self.ids += 1
+        request = {'jsonrpc': '2.0', 'id': self.ids, 'method': method, 'params': params}
+        return self.send(json.dumps(request).encode('utf-8'))
+
+    def is_closed(self) -> bool:
+        return self.file.readline() == b''
+
+    def close(self) -> None:
+        self.file.close()
+        self.socket.close()
+
+
+@pytest.fixture
+def connection(server):
+    connection = Connection(server)
+    assert connection.call('authenticate', [TOKEN])['result'] is True
+    yield connection
+    connection.close()
+
+
+@pytest.mark.parametrize('params', [['wrong'], {'token': 'wrong'}, None, []])
+def test_wrong_or_missing_token_is_rejected(server, params):
+    connection = Connection(server)
+    response = connection.call('authenticate', params)
+    assert response['error']['code'] == service.UNAUTHORIZED
+    assert connection.is_closed()
+    connection.close()
+
+
+def test_request_before_authenticating_is_rejected(server):
+    connection = Connection(server)
+    assert connection.call('list')['error']['code'] == service.UNAUTHORIZED
+    assert connection.is_closed()
+    connection.close()
+
+
+def test_http_request_is_rejected(server):
+    connection = Connection(server)
+    body = b'{"jsonrpc": "2.0", "id": 1, "method": "edit", "params": [[]]}'
+    response = connection.send(b'POST / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n' + body)
+    assert response['error']['code'] == service.UNAUTHORIZED
+    assert connection.is_closed()
+    connection.close()
+
+
+def test_list_exists_which_and_stats(connection, tree):
+    listed = connection.call('list')['result']
+    assert listed == {'user': [tree['empty'], tree['missing']], 'system': [tree['bin']]}
+
+    assert connection.call('exists', [tree['bin']])['result'] == {
+        'exists': True, 'filecount': 2, 'filecount_complete': True, 'scopes': ['system']}
+    assert connection.call('exists', {'path': tree['missing'] + '2'})['result']['exists'] is False
+
+    which = connection.call('which', ['tool'])['result']
+    assert which == {'directory': tree['bin'], 'scope': 'system', 'index': 0, 'file': 'tool.exe'}
+    assert connection.call('which', ['tool.bat'])['result']['file'] == 'tool.bat'
+    assert connection.call('which', ['absent'])['result'] is None
+
+    stats = connection.call('stats')['result']
+    assert (stats['user_count'], stats['system_count'], stats['dead']) == (2, 1, 1)
+
+
+def test_edit_writes_each_changed_scope(connection, model, tree):
+    result = connection.call('edit', [[
+        {'op': 'remove', 'path': tree['missing']},
+        {'op': 'move', 'path': tree['bin'], 'scope': 'system', 'index': 0},
+        {'op': 'add', 'path': 'C:\\Tools', 'scope': 'user', 'index': 0},
+    ]])['result']
+    assert result == {'user': ['c:/tools', tree['empty']], 'system': [tree['bin']]}
+    assert model.os_user_paths == ['c:/tools', tree['empty']]
+
+
+def test_failed_write_rolls_back_the_edit(connection, model, tree):
+    run_command = model.run_command
+
+    def fail_system_writes(command):
+        payload = re.search(r"FromBase64String\('([^']*)'\)", command).group(1)
+        if json.loads(base64.b64decode(payload))['key'] == model.SYSTEM_ENVIRONMENT_KEY:
+            return CompletedProcess(['powershell.exe', command], 1, stdout=b'', stderr=b'denied')
+        return run_command(command)
+
+    model.run_command = fail_system_writes
+
+    response = connection.call('edit', [[
+        {'op': 'add', 'path': 'c:/user-tool', 'scope': 'user'},
+        {'op': 'add', 'path': 'c:/system-tool', 'scope': 'system'},
+    ]])
+    assert response['error']['code'] == service.SERVICE_ERROR
+    assert 'CalledProcessError' in response['error']['message']
+    # The USER value written before the SYSTEM write failed is written back
+    assert model.os_user_paths == [tree['empty'], tree['missing']]
+    assert model.os_system_paths == [tree['bin']]
+    assert connection.call('list')['result'] == {'user': [tree['empty'], tree['missing']],
+                                                 'system': [tree['bin']]}
+
+
+def test_invalid_edit_changes_nothing(connection, model, tree):
+    response = connection.call('edit', [[
+        {'op': 'add', 'path': 'c:/tools', 'scope': 'user'},
+        {'op': 'move', 'path': 'c:/not-listed', 'scope': 'user', 'index': 0},
+    ]])
+    assert response['error']['code'] == service.INVALID_PARAMS
+    assert connection.call('list')['result']['user'] == [tree['empty'], tree['missing']]
+    assert model.os_user_paths == [tree['empty'], tree['missing']]
+
+
+def test_error_replies(connection):
+    assert connection.call('format_disk')['error']['code'] == service.METHOD_NOT_FOUND
+    assert connection.call('which', ['a', 'b', 'c'])['error']['code'] == service.INVALID_PARAMS
+    assert connection.send(b'{not json')['error']['code'] == service.PARSE_ERROR
+    assert connection.send(b'\xff\xfe')['error']['code'] == service.PARSE_ERROR
+    assert connection.send(b'[1, 2]')['error']['code'] == service.INVALID_REQUEST
+    # The connection stays usable after errors
+    assert 'user' in connection.call('list')['result']
@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+import transfer
+from backends import MemoryPathModel
+
+
+@pytest.mark.parametrize('fmt', ['json', 'reg', 'lines', 'text'])
+def test_export_and_read_round_trip(tmp_path, fmt):
+    filename = str(tmp_path / 'path.out')
+    user_paths = ['c:/users/me/bin', '%userprofile%/tools']
+    system_paths = ['c:/windows/system32', 'c:/program files/git/cmd']
+    transfer.export_paths(filename, user_paths, system_paths, fmt=fmt)
+
+    entries = [(scope, entry.replace('\\', '/'))
+               for scope, entry in transfer.read_entries(filename, 'user', fmt)]
+    expected = [('user', path) for path in user_paths]
+    if fmt in ('json', 'reg'):
+        expected += [('system', path) for path in system_paths]
+    assert sorted(entries) == sorted(expected)
+
+
+def test_detect_format():
+    assert transfer.detect_format('PATH.JSON') == 'json'
+    assert transfer.detect_format('backup.reg') == 'reg'
+    assert transfer.detect_format('entries.txt') == 'lines'
+    assert transfer.detect_format('path') == 'text'
+
+
+def test_text_entries_span_chunks_and_mixed_separators(monkeypatch):
+    monkeypatch.setattr(transfer, 'CHUNK_SIZE', 4)
+    text = 'c:/a;c:/bbbbbb\r\n c:/c ;;\nc:/d'
+    entries = list(transfer.iter_text_entries(io.StringIO(text)))
+    assert entries == ['c:/a', 'c:/bbbbbb', 'c:/c', 'c:/d']
+
+
+def test_reg_hex_value_with_continuation_lines():
+    value = 'c:\\a;%SystemRoot%\\x'.encode('utf-16-le') + b'\0\0'
+    hex_bytes = ','.join(f'{byte:02x}' for byte in value)
+    half = len(hex_bytes) // 2 // 3 * 3
+    reg = ('Windows Registry Editor Version 5.00\n\n[HKEY_CURRENT_USER\\Environment]\n'
+           f'"Path"=hex(2):{hex_bytes[:half]}\\\n  {hex_bytes[half:]}\n'
+           '"Other"="ignored"\n')
+    entries = list(transfer.iter_reg_entries(io.StringIO(reg)))
+    assert entries == [('user', 'c:\\a'), ('user', '%SystemRoot%\\x')]
+
+
+def test_json_list_uses_default_scope(tmp_path):
+    filename = tmp_path / 'list.json'
+    filename.write_text('["c:/a", "c:/b"]', encoding='utf-8')
+    entries = list(transfer.read_entries(str(filename), 'system'))
+    assert entries == [('system', 'c:/a'), ('system', 'c:/b')]
+
+
+@pytest.mark.parametrize('document', ['"c:/a"', '42', 'null', '{"user": "c:/abc"}',
+                                      '{"system": ["c:/a", 1]}', '[1, 2]'])
+def test_json_with_wrong_shape_raises_value_error(tmp_path, document):
+    filename = tmp_path / 'bad.json'
+    filename.write_text(document, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(transfer.read_entries(str(filename), 'user'))
+
+
+def test_plan_import_normalizes_and_skips_existing():
+    model = MemoryPathModel(['c:/a'], ['c:/s'])
+    entries = [('user', 'C:\\A'), ('user', 'c:\\b'), ('user', 'c:/b'), ('system', 'c:/a'),
+               ('system', '')]
+    assert transfer.plan_import(model, entries) == {'user': ['c:/b'], 'system': ['c:/a']}
+
+    with pytest.raises(ValueError):
+        transfer.plan_import(model, [('machine', 'c:/x')])